@@ -285,6 +285,17 @@ class MainWindow(QMainWindow):
             e.ignore()
             return
 
+        # Сохранения, ещё идущие в фоне, дописываем до проверки: иначе они сочтутся несохранёнными
+        try:
+            for w in self.findChildren(QWidget):
+                try:
+                    if hasattr(w, "flush_saves") and callable(w.flush_saves):
+                        w.flush_saves()
+                except Exception:
+                    pass
+        except Exception:
+            pass
+
         try:
             if self._has_unsaved_changes():
                 btn = QMessageBox.warning(
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, List, Optional
+
+from smithanatool_qt.tabs.parsers.kakao.shared.utils.kakao_common import build_resource_url
+
+
+def _image_files(viewer_data: dict[str, Any]) -> list[dict]:
+    """Список файлов страниц из viewerData (ImageViewerData и его вариации)."""
+    for holder in (viewer_data.get('imageDownloadData'), viewer_data):
+        if not isinstance(holder, dict):
+            continue
+        for key in ('files', 'imageList', 'images'):
+            files = holder.get(key)
+            if isinstance(files, list) and files:
+                return [f for f in files if isinstance(f, dict)]
+    return []
+
+
+def _file_order(item: tuple[int, dict]) -> tuple[int, int]:
+    pos, f = item
+    for key in ('no', 'order', 'index', 'seq'):
+        try:
+            return int(f.get(key)), pos
+        except (TypeError, ValueError):
+            continue
+    return pos, pos
+
+
+def _resolve_image_urls_via_api(
+    api,
+    series_id: int,
+    product_id: int,
+    *,
+    log: Optional[Callable[[str], None]] = None,
+) -> Optional[List[str]]:
+    """URL страниц главы из viewer-data API, без браузера.
+
+    None — если ответ не похож на картиночный viewer (нет доступа, другой тип,
+    пустой список); тогда вызывающий идёт обычным путём через DOM.
+    """
+    try:
+        root = api.viewer_data(int(series_id), int(product_id)) or {}
+    except Exception as e:
+        if log: log(f'[DEBUG] viewer_data {product_id}: {e}')
+        return None
+
+    viewer_data = root.get('viewerData') or {}
+    if not isinstance(viewer_data, dict):
+        return None
+    viewer_type = viewer_data.get('__typename') or viewer_data.get('type') or ''
+    if viewer_type and 'Image' not in str(viewer_type):
+        if log: log(f'[DEBUG] viewer_data {product_id}: тип {viewer_type!r}, нужен DOM')
+        return None
+
+    base_url = viewer_data.get('atsServerUrl') or ''
+    urls: list[str] = []
+    for _, f in sorted(enumerate(_image_files(viewer_data)), key=_file_order):
+        try:
+            urls.append(build_resource_url(base_url, f.get('secureUrl') or f.get('url') or ''))
+        except RuntimeError:
+            continue
+    return urls or None
+
+
+def _save_urls_json(urls: List[str], urls_json_path: str) -> str:
+    with open(urls_json_path, 'w', encoding='utf-8') as f:
+        json.dump(urls, f, ensure_ascii=False, indent=0)
+    return urls_json_path
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from playwright.sync_api import sync_playwright
+
+# Через сколько секунд простоя фоновый браузер закрывается (поток остаётся)
+IDLE_TIMEOUT_S = 300
+_IDLE_CHECK_S = 5
+
+_CONTEXT_KWARGS = dict(
+    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123 Safari/537.36',
+    viewport={'width': 1280, 'height': 860},
+    locale='ko-KR',
+    timezone_id='Asia/Seoul',
+)
+
+
+class BrowserService:
+    """Тёплый headless Chromium для сбора DOM, общий для всех запусков парсера вкладки.
+
+    Sync Playwright привязан к потоку, в котором запущен, поэтому браузер живёт
+    в собственном потоке сервиса и вся работа со страницами идёт там же, через
+    `run(fn)`. Браузер поднимается при первой надобности, после падения
+    перезапускается при следующем вызове, а после `idle_timeout_s` простоя
+    закрывается. Окно входа в аккаунт (auth/session.py) остаётся отдельным:
+    оно видимое и интерактивное.
+    """
+
+    def __init__(self, *, idle_timeout_s: float = IDLE_TIMEOUT_S):
+        self._idle_timeout_s = max(0.0, float(idle_timeout_s))
+        self._tasks: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        # Доступны только из потока сервиса
+        self._pw = None
+        self._browser = None
+        self._last_used = time.monotonic()
+
+    def run(
+        self,
+        fn: Callable[[Callable[[], Any]], Any],
+        *,
+        storage_state: Optional[str] = None,
+        log: Optional[Callable[[str], None]] = None,
+    ):
+        """Выполнить `fn(open_ctx)` в потоке браузера и вернуть результат (или пробросить ошибку).
+
+        open_ctx() лениво создаёт контекст с сохранённой авторизацией;
+        после `fn` контекст закрывается, браузер — нет.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('Фоновый браузер уже остановлен.')
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name='kakao-browser', daemon=True)
+                self._thread.start()
+        done = threading.Event()
+        box: dict = {}
+        self._tasks.put((fn, storage_state, log or (lambda *_: None), done, box))
+        done.wait()
+        if 'error' in box:
+            raise box['error']
+        return box.get('result')
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._tasks.put(None)
+            thread.join(timeout)
+
+    # ---- поток сервиса ----
+    def _loop(self) -> None:
+        while True:
+            try:
+                task = self._tasks.get(timeout=_IDLE_CHECK_S)
+            except queue.Empty:
+                if self._browser is not None and time.monotonic() - self._last_used > self._idle_timeout_s:
+                    self._stop_browser()
+                continue
+            if task is None:
+                self._stop_browser()
+                return
+            fn, storage_state, log, done, box = task
+            try:
+                box['result'] = self._run_task(fn, storage_state, log)
+            except BaseException as e:
+                box['error'] = e
+            finally:
+                self._last_used = time.monotonic()
+                done.set()
+
+    def _run_task(self, fn, storage_state: Optional[str], log: Callable[[str], None]):
+        ctx = None
+
+        def open_ctx():
+            nonlocal ctx
+            if ctx is None:
+                browser = self._ensure_browser(log)
+                kwargs = dict(_CONTEXT_KWARGS)
+                if storage_state:
+                    kwargs['storage_state'] = storage_state
+                log(f"[DEBUG] Storage state path: {storage_state or '(нет файла)'}")
+                ctx = browser.new_context(**kwargs)
+            return ctx
+
+        try:
+            return fn(open_ctx)
+        finally:
+            if ctx is not None:
+                try:
+                    ctx.close()
+                except Exception as e:
+                    log(f'[WARN] Не удалось закрыть контекст браузера: {e}')
+            if self._browser is not None and not self._is_connected():
+                log('[WARN] Фоновый браузер упал; при следующем запуске будет перезапущен.')
+                self._stop_browser()
+
+    def _is_connected(self) -> bool:
+        try:
+            return bool(self._browser.is_connected())
+        except Exception:
+            return False
+
+    def _ensure_browser(self, log: Callable[[str], None]):
+        if self._browser is not None and self._is_connected():
+            log('[INFO] Используется уже запущенный фоновый браузер.')
+            return self._browser
+        self._stop_browser()
+        self._pw = sync_playwright().start()
+        try:
+            self._browser = self._pw.chromium.launch(headless=True, channel='msedge')
+        except Exception:
+            self._browser = self._pw.chromium.launch(headless=True)
+        log('[INFO] Запущен фоновый браузер.')
+        return self._browser
+
+    def _stop_browser(self) -> None:
+        browser, pw = self._browser, self._pw
+        self._browser = self._pw = None
+        try:
+            if browser is not None:
+                browser.close()
+        except Exception:
+            pass
+        try:
+            if pw is not None:
+                pw.stop()
+        except Exception:
+            pass
@@ -1,73 +1,345 @@
 from __future__ import annotations
 from typing import Optional, Callable
 from pathlib import Path
-import time, json, re
+import hashlib, os, shutil, time, json, re
+from urllib.parse import urlsplit
 from playwright.sync_api import sync_playwright
 
 
 from smithanatool_qt.tabs.parsers.kakao.shared.auth.session import get_session_path
 from .utils import _viewer_url
 
-def _collect_dom_urls_in_ctx(ctx, url, urls_json_path, log=None, stop_flag=None, pre_action=None, scroll_ms=45000):
-    page = ctx.new_page()
-    try:
-        page.goto(url, wait_until="domcontentloaded")
+# Одновременно открытых viewer-страниц при сборе DOM (общий потолок)
+MAX_DOM_PAGES = 6
+
+# Конец прокрутки: низ страницы достигнут и число найденных картинок
+# не меняется столько миллисекунд
+STABLE_WINDOW_MS = 1500
+
+# URL картинок собираются по мере появления элементов (MutationObserver),
+# без финального обхода всего DOM через getComputedStyle.
+_JS_INSTALL_OBSERVER = """() => {
+    if (window.__smUrls) return window.__smUrls.size;
+    const out = window.__smUrls = new Set();
+    const add = (u) => { if (u) { try { out.add(new URL(u, location.href).href); } catch (e) { out.add(u); } } };
+    const addSrcset = (ss) => { if (ss) for (const part of ss.split(',')) add(part.trim().split(' ')[0]); };
+    const addStyle = (el) => {
+        const bg = (el.style && el.style.backgroundImage) || '';
+        for (const m of bg.matchAll(/url\\(([^)]+)\\)/g)) add((m[1] || '').trim().replace(/^['"]|['"]$/g, ''));
+    };
+    const scan = (el) => {
+        if (!el || el.nodeType !== 1) return;
+        const tag = el.tagName;
+        if (tag === 'IMG') { add(el.currentSrc); add(el.getAttribute('src')); addSrcset(el.getAttribute('srcset')); }
+        else if (tag === 'SOURCE') { add(el.getAttribute('src')); addSrcset(el.getAttribute('srcset')); }
+        if (el.hasAttribute('style')) addStyle(el);
+    };
+    const scanTree = (root) => {
+        scan(root);
+        if (root.querySelectorAll) for (const el of root.querySelectorAll('img, source, [style*="url("]')) scan(el);
+    };
+    scanTree(document.documentElement);
+    new MutationObserver((records) => {
+        for (const r of records) {
+            if (r.type === 'attributes') scan(r.target);
+            else for (const n of r.addedNodes) scanTree(n);
+        }
+    }).observe(document.documentElement, {
+        subtree: true, childList: true, attributes: true, attributeFilter: ['src', 'srcset', 'style'],
+    });
+    // currentSrc меняется без мутации атрибутов — ловим загрузку
+    document.addEventListener('load', (e) => scan(e.target), true);
+    return out.size;
+}"""
+
+# Что не нужно для поиска URL картинок: такие запросы при сборе DOM обрываются.
+# Картинки и стили не трогаем — от них зависят ленивая подгрузка и перехват ответов.
+BLOCKED_RESOURCE_TYPES = frozenset({"font", "media", "websocket", "manifest", "texttrack", "eventsource", "ping"})
+BLOCKED_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "googleadservices.com", "facebook.net", "facebook.com", "tiara.kakao.com", "ad.daum.net",
+    "adfit.kakao.com", "appsflyer.com", "branch.io", "criteo.com", "criteo.net",
+)
+
+
+class ResourceBlocker:
+    """Фильтр запросов для `page.route`: обрывает лишние типы ресурсов и хосты."""
+
+    def __init__(self, types=BLOCKED_RESOURCE_TYPES, hosts=BLOCKED_HOSTS):
+        self.types = frozenset(types or ())
+        self.hosts = tuple(h.lower().lstrip(".") for h in (hosts or ()))
+
+    def blocks(self, resource_type: str, url: str) -> bool:
+        if resource_type in self.types:
+            return True
+        host = (urlsplit(url).hostname or "").lower()
+        return any(host == h or host.endswith("." + h) for h in self.hosts)
+
+
+_JS_PROGRESS = """() => ({
+    bottom: Math.ceil(window.scrollY + window.innerHeight) >= document.documentElement.scrollHeight - 2,
+    y: Math.floor(window.scrollY + window.innerHeight),
+    n: window.__smUrls ? window.__smUrls.size : 0,
+})"""
+
+
+class _PageHarvest:
+    """Сбор URL картинок с одной viewer-страницы, по шагам прокрутки.
+
+    Шаги разных страниц можно чередовать в одном потоке: sync Playwright
+    привязан к потоку, но страниц в контексте может быть несколько.
+    """
+
+    def __init__(self, ctx, url, urls_json_path, *, log=None, pre_action=None, scroll_ms=45000, capture=False,
+                 blocker: Optional[ResourceBlocker] = None):
+        self.ctx = ctx
+        self.url = url
+        self.urls_json_path = urls_json_path
+        self.log = log
+        self.pre_action = pre_action
+        self.scroll_ms = scroll_ms
+        self.page = None
+        self._t0 = 0.0
+        self._stable_rounds = 0
+        self._last_scroll_y = -1
+        self._last_count = -1
+        self._count_since = 0.0
+        # Картинки, которые браузер уже скачал во время прокрутки: url → файл
+        self.capture_dir = _capture_dir(urls_json_path) if capture else None
+        self._captured = {}
+        self.blocker = blocker
+        self.blocked = 0
+        self._opened_at = 0.0
+
+    def start(self):
+        self._opened_at = time.time()
+        self.page = self.ctx.new_page()
+        page = self.page
+        if self.blocker is not None:
+            page.route("**/*", self._route)
+        if self.capture_dir:
+            os.makedirs(self.capture_dir, exist_ok=True)
+            page.on("response", self._on_response)
+        page.goto(self.url, wait_until="domcontentloaded")
         try:
             page.wait_for_load_state("networkidle", timeout=5000)
         except Exception:
             pass
 
-        if callable(pre_action):
+        if callable(self.pre_action):
             try:
-                ok = pre_action(page)
-                if log: log("[INFO] Попытка использовать тикет: " + ("успех" if ok else "не потребовалась/не найдена"))
+                ok = self.pre_action(page)
+                if self.log: self.log("[INFO] Попытка использовать тикет: " + ("успех" if ok else "не потребовалась/не найдена"))
             except Exception as e:
-                if log: log(f"[WARN] Ошибка pre_action: {e}")
+                if self.log: self.log(f"[WARN] Ошибка pre_action: {e}")
 
-        t0, stable_rounds, last_scroll_y = time.time(), 0, -1
-        while True:
-            if stop_flag and stop_flag(): raise RuntimeError("[CANCEL] Остановлено пользователем.")
-            page.evaluate("window.scrollBy(0, Math.floor(window.innerHeight * 0.95))")
-            page.wait_for_timeout(180)
-            try: page.wait_for_load_state("networkidle", timeout=1500)
-            except Exception: pass
-            scroll_y = page.evaluate("Math.floor(window.scrollY + window.innerHeight)")
-            stable_rounds = stable_rounds + 1 if scroll_y == last_scroll_y else 0
-            last_scroll_y = scroll_y
-            if (time.time() - t0) * 1000 > scroll_ms and stable_rounds >= 3:
-                break
+        page.evaluate(_JS_INSTALL_OBSERVER)
+        self._t0 = time.time()
 
-        urls = page.evaluate("""() => {
-            const out = new Set();
-            for (const img of Array.from(document.querySelectorAll('img'))) {
-                if (img.currentSrc) out.add(img.currentSrc);
-                if (img.src) out.add(img.src);
-                const ss = img.getAttribute('srcset');
-                if (ss) for (const part of ss.split(',')) { const u = part.trim().split(' ')[0]; if (u) out.add(u); }
-            }
-            for (const s of Array.from(document.querySelectorAll('source'))) {
-                const ss = s.getAttribute('srcset');
-                if (ss) for (const part of ss.split(',')) { const u = part.trim().split(' ')[0]; if (u) out.add(u); }
-                const src = s.getAttribute('src'); if (src) out.add(src);
-            }
-            for (const el of Array.from(document.querySelectorAll('*'))) {
-                const st = getComputedStyle(el); const bg = (st && st.backgroundImage) || '';
-                const m = Array.from(bg.matchAll(/url\(([^)]+)\)/g));
-                for (const mm of m) { let u = (mm[1] || '').trim().replace(/^['"]|['"]$/g, ''); if (u) out.add(u); }
-            }
-            return Array.from(out);
-        }""")
-        urls_abs = page.evaluate("""(list) => list.map(u => { try { return new URL(u, location.href).href; } catch { return u; } })""", urls)
-
-        with open(urls_json_path, "w", encoding="utf-8") as f:
+    def _route(self, route):
+        try:
+            req = route.request
+            if self.blocker.blocks(req.resource_type, req.url):
+                self.blocked += 1
+                route.abort()
+                return
+        except Exception:
+            pass
+        try:
+            route.continue_()
+        except Exception:
+            pass
+
+    def _on_response(self, response):
+        try:
+            if response.request.resource_type != "image" or not response.ok:
+                return
+            url = response.url
+            if url in self._captured or not url.startswith("http"):
+                return
+            body = response.body()
+            if not body:
+                return
+            dst = os.path.join(self.capture_dir, hashlib.sha1(url.encode("utf-8")).hexdigest())
+            with open(dst, "wb") as f:
+                f.write(body)
+            self._captured[url] = dst
+        except Exception:
+            pass  # не попало в перехват — докачает HTTP-загрузчик
+
+    def scroll(self):
+        self.page.evaluate("window.scrollBy(0, Math.floor(window.innerHeight * 0.95))")
+
+    def settle(self, idle_ms=1500) -> bool:
+        """Дождаться подгрузки после прокрутки. True — страница долистана.
+
+        Ранний выход: низ достигнут и новых картинок нет `STABLE_WINDOW_MS`.
+        `scroll_ms` — верхняя граница для страниц, где низ не определяется.
+        """
+        try: self.page.wait_for_load_state("networkidle", timeout=idle_ms)
+        except Exception: pass
+        st = self.page.evaluate(_JS_PROGRESS)
+        now = time.time()
+        if st["n"] != self._last_count:
+            self._last_count, self._count_since = st["n"], now
+        self._stable_rounds = self._stable_rounds + 1 if st["y"] == self._last_scroll_y else 0
+        self._last_scroll_y = st["y"]
+
+        if st["bottom"] and st["n"] > 0 and (now - self._count_since) * 1000 >= STABLE_WINDOW_MS:
+            return True
+        return (now - self._t0) * 1000 > self.scroll_ms and self._stable_rounds >= 3
+
+    def finish(self) -> str:
+        page = self.page
+        page.evaluate(_JS_INSTALL_OBSERVER)  # на случай перезагрузки страницы посреди прокрутки
+        urls_abs = page.evaluate("() => Array.from(window.__smUrls)")
+
+        with open(self.urls_json_path, "w", encoding="utf-8") as f:
             json.dump(urls_abs, f, ensure_ascii=False, indent=0)
-        page.wait_for_timeout(400)
-        if log: log(f"[URLS] Собрано: {len(urls_abs)}")
-    finally:
+        if self.log: self.log(f"[URLS] Собрано: {len(urls_abs)}")
+        if self.blocker is not None and self.log:
+            self.log(f"[URLS] Заблокировано лишних запросов: {self.blocked}, "
+                     f"загрузка и прокрутка: {time.time() - self._opened_at:.1f} с")
+        if self.capture_dir:
+            wanted = set(urls_abs)
+            captured = {u: p for u, p in self._captured.items() if u in wanted}
+            # Перехваченное сверх списка страниц (превью, баннеры) не понадобится
+            for u, p in self._captured.items():
+                if u not in wanted:
+                    Path(p).unlink(missing_ok=True)
+            if not captured:
+                shutil.rmtree(self.capture_dir, ignore_errors=True)
+            with open(_captured_json_path(self.urls_json_path), "w", encoding="utf-8") as f:
+                json.dump(captured, f, ensure_ascii=False, indent=0)
+            if self.log: self.log(f"[URLS] Уже загружено браузером: {len(captured)} из {len(urls_abs)}")
+        return self.urls_json_path
+
+    def close(self):
         try:
-            page.close()
+            if self.page is not None:
+                self.page.close()
         except Exception:
             pass
+        self.page = None
+
+
+def _collect_dom_urls_in_ctx(ctx, url, urls_json_path, log=None, stop_flag=None, pre_action=None, scroll_ms=45000):
+    h = _PageHarvest(ctx, url, urls_json_path, log=log, pre_action=pre_action, scroll_ms=scroll_ms)
+    try:
+        h.start()
+        while True:
+            if stop_flag and stop_flag(): raise RuntimeError("[CANCEL] Остановлено пользователем.")
+            h.scroll()
+            h.page.wait_for_timeout(180)
+            if h.settle():
+                break
+        h.finish()
+    finally:
+        h.close()
+
+
+def _collect_dom_urls_pool(ctx, jobs, *, pages=2, on_done=None, log=None, stop_flag=None, scroll_ms=45000, capture=False,
+                           blocker: Optional[ResourceBlocker] = None):
+    """Собрать DOM-URL нескольких глав, прокручивая до `pages` страниц одновременно.
+
+    jobs — итератор (key, url, urls_json_path); следующий элемент берётся,
+    только когда освободилась страница (так доступ к главам проверяется по
+    порядку и не раньше времени). on_done(key, path | None) — по готовности
+    каждой главы; ошибка одной страницы не останавливает остальные.
+    ctx может быть функцией: тогда контекст создаётся при первой странице.
+    capture — сохранять картинки из ответов браузера (см. `_load_captured`).
+    blocker — обрывать лишние запросы страниц (шрифты, видео, аналитику…).
+    """
+    pages = max(1, min(MAX_DOM_PAGES, int(pages or 1)))
+    ctx_factory = ctx if callable(ctx) else (lambda: ctx)
+    idle_ms = max(300, 1500 // pages)
+    jobs = iter(jobs)
+    exhausted = False
+    active = []  # [(key, harvest)]
+
+    def _done(key, path):
+        if on_done:
+            on_done(key, path)
+
+    try:
+        while True:
+            while not exhausted and len(active) < pages:
+                job = next(jobs, None)
+                if job is None:
+                    exhausted = True
+                    break
+                key, url, urls_json_path = job
+                h = _PageHarvest(ctx_factory(), url, urls_json_path, log=log, scroll_ms=scroll_ms, capture=capture,
+                                 blocker=blocker)
+                try:
+                    h.start()
+                except Exception as e:
+                    h.close()
+                    if stop_flag and stop_flag(): raise
+                    if log: log(f"[WARN] URLS {key} не получены: {e}")
+                    _done(key, None)
+                    continue
+                active.append((key, h))
+
+            if not active:
+                break
+            if stop_flag and stop_flag(): raise RuntimeError("[CANCEL] Остановлено пользователем.")
+
+            failed = {}
+            for key, h in active:
+                try:
+                    h.scroll()
+                except Exception as e:
+                    failed[key] = e
+            try:
+                active[0][1].page.wait_for_timeout(180)
+            except Exception:
+                time.sleep(0.18)
+
+            for item in list(active):
+                key, h = item
+                path = None
+                if key not in failed:
+                    try:
+                        if not h.settle(idle_ms):
+                            continue
+                        path = h.finish()
+                    except Exception as e:
+                        failed[key] = e
+                if key in failed:
+                    if stop_flag and stop_flag(): raise RuntimeError("[CANCEL] Остановлено пользователем.")
+                    if log: log(f"[WARN] URLS {key} не получены: {failed[key]}")
+                h.close()
+                active.remove(item)
+                _done(key, path)
+    finally:
+        for _, h in active:
+            h.close()
+
+
+def _capture_dir(urls_json_path: str) -> str:
+    return str(Path(urls_json_path).with_suffix("")) + "_capture"
+
+
+def _captured_json_path(urls_json_path: str) -> str:
+    return str(Path(urls_json_path).with_suffix("")) + "_captured.json"
+
+
+def _load_captured(urls_json_path: str) -> dict:
+    """url → файл картинки, перехваченной из ответов браузера (пусто, если перехвата не было)."""
+    try:
+        with open(_captured_json_path(urls_json_path), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return {}
+    return {str(u): str(p) for u, p in data.items() if os.path.isfile(p)} if isinstance(data, dict) else {}
+
+
+def _urls_json_path(out_dir: str, product_id, episode_no: int | None = None) -> str:
+    urls_dir = Path(out_dir or ".") / "cache"  # совместимость с уже существующим путём
+    urls_dir.mkdir(parents=True, exist_ok=True)
+    label = f"{episode_no:04d}" if isinstance(episode_no, int) else f"id_{product_id}"
+    return str(urls_dir / f"{label}_urls.json")
 
 
 def _collect_dom_urls(series_id: int, product_id: str | int, *,
@@ -78,10 +350,7 @@ def _collect_dom_urls(series_id: int, product_id: str | int, *,
                       pre_action: Optional[Callable] = None,
                       scroll_ms: int = 45000,
                       ctx=None) -> Optional[str]:
-    urls_dir = Path(out_dir or ".") / "cache"  # совместимость с уже существующим путём
-    urls_dir.mkdir(parents=True, exist_ok=True)
-    label = f"{episode_no:04d}" if isinstance(episode_no, int) else f"id_{product_id}"
-    urls_json_path = str(urls_dir / f"{label}_urls.json")
+    urls_json_path = _urls_json_path(out_dir, product_id, episode_no)
 
     url = _viewer_url(int(series_id), str(product_id))
 
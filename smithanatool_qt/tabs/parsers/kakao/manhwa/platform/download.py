@@ -1,9 +1,11 @@
 from __future__ import annotations
 from typing import Optional, Callable, List, Tuple
 from pathlib import Path
-import ssl, urllib.request, re, os
+import hashlib, os, shutil
+from io import BytesIO
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from .utils import _compute_workers
+from .http_pool import ImageFetcher
+from .manifest import ChapterManifest, file_sha1
 
 def _ext_from_url(url: str) -> str:
     try:
@@ -20,41 +22,69 @@ def _ext_from_url(url: str) -> str:
         pass
     return ".jpg"
 
-def _try_get_image_size(img_bytes: bytes) -> tuple[int, int] | None:
+def _try_get_image_size(src) -> tuple[int, int] | None:
+    """Размер по заголовку (путь или файловый объект), без декодирования пикселей."""
     try:
         from PIL import Image
-        from io import BytesIO
-        with Image.open(BytesIO(img_bytes)) as im:
+        with Image.open(src) as im:
             return int(im.width), int(im.height)
     except Exception:
         return None
 
-def _download_binary(url: str, dest_path: str, *, referer: Optional[str], cookie_raw: Optional[str], origin: Optional[str] = None) -> tuple[bool, bytes | None]:
+def _image_headers(referer: Optional[str], cookie_raw: Optional[str], origin: Optional[str] = None) -> dict:
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123 Safari/537.36",
+        "Accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
+    }
+    if referer: headers["Referer"] = referer
+    if origin:  headers["Origin"] = origin
+    if cookie_raw: headers["Cookie"] = cookie_raw
+    return headers
+
+def _download_binary(url: str, dest_path: str, *, referer: Optional[str], cookie_raw: Optional[str], origin: Optional[str] = None,
+                     fetcher: ImageFetcher, min_width: int = 0,
+                     stop_flag: Optional[Callable[[], bool]] = None) -> tuple[str, int, str]:
+    headers = _image_headers(referer, cookie_raw, origin)
+    try:
+        return fetcher.download(url, dest_path, headers=headers, min_width=min_width, stop_flag=stop_flag)
+    except Exception:
+        return "failed", 0, ""
+
+def _take_captured(src: Optional[str], dest_path: str, *, min_width: int = 0) -> tuple[str, int, str]:
+    """Перенести картинку, уже полученную браузером, вместо повторного скачивания."""
+    if not src or not os.path.isfile(src):
+        return "failed", 0, ""
     try:
-        ctx = ssl.create_default_context()
-        req = urllib.request.Request(url)
-        if referer: req.add_header("Referer", referer)
-        if origin:  req.add_header("Origin", origin)
-        if cookie_raw: req.add_header("Cookie", cookie_raw)
-        req.add_header("User-Agent", "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123 Safari/537.36")
-        req.add_header("Accept", "image/avif,image/webp,image/apng,image/*,*/*;q=0.8")
-        with urllib.request.urlopen(req, timeout=60, context=ctx) as resp:
-            data = resp.read()
+        if min_width and min_width > 0:
+            size = _try_get_image_size(src)
+            if size and size[0] < int(min_width):
+                Path(src).unlink(missing_ok=True)
+                return "rejected", 0, ""
         Path(dest_path).parent.mkdir(parents=True, exist_ok=True)
-        with open(dest_path, "wb") as f:
-            f.write(data)
-        return True, data
+        os.replace(src, dest_path)
+        sha1 = file_sha1(dest_path)
+        if sha1 is None:
+            return "failed", 0, ""
+        return "ok", os.path.getsize(dest_path), sha1
     except Exception:
-        return False, None
+        return "failed", 0, ""
 
-def _get_existing_max_index(dest_dir: str) -> int:
-    max_idx = 0
-    for p in Path(dest_dir).glob("*.?*"):
-        m = re.search(r"(\d{3})\.", p.name)
-        if m:
-            try: max_idx = max(max_idx, int(m.group(1)))
-            except Exception: pass
-    return max_idx
+def _discard_captured(captured: Optional[dict]) -> None:
+    """Удалить папку перехвата главы вместе с тем, что не пригодилось загрузчику."""
+    for d in {os.path.dirname(p) for p in (captured or {}).values() if p}:
+        if d.endswith("_capture"):
+            shutil.rmtree(d, ignore_errors=True)
+
+def _unique_urls(urls: List[str]) -> List[str]:
+    """Список страниц главы: без пустых, blob:/data: и повторов, порядок сохраняется."""
+    uniq, seen = [], set()
+    for u in urls or []:
+        if not isinstance(u, str): continue
+        u = u.strip()
+        if not u or u.startswith("blob:") or u.startswith("data:"): continue
+        if u in seen: continue
+        seen.add(u); uniq.append(u)
+    return uniq
 
 def _download_images_from_list(
     urls: List[str], dest_dir: str, *,
@@ -62,72 +92,185 @@ def _download_images_from_list(
     min_width: int = 0, log: Optional[Callable[[str], None]] = None,
     stop_flag: Optional[Callable[[], bool]] = None,
     auto_threads: bool = True, threads: int = 4,
+    captured: Optional[dict] = None,
+    fetcher: Optional[ImageFetcher] = None,
 ) -> int:
     Path(dest_dir).mkdir(parents=True, exist_ok=True)
 
-    uniq, seen = [], set()
-    for u in urls or []:
-        if not isinstance(u, str): continue
-        u = u.strip()
-        if not u or u.startswith("blob:") or u.startswith("data:"): continue
-        if u in seen: continue
-        seen.add(u); uniq.append(u)
+    uniq = _unique_urls(urls)
     if not uniq:
         if log: log("[WARN] DOM-список пуст.")
         return 0
 
-    start_idx = _get_existing_max_index(dest_dir)
-    jobs = []
-    for off, u in enumerate(uniq, 1):
-        idx = start_idx + off
-        ext = _ext_from_url(u)
-        fn  = f"{idx:03d}{ext}"
+    # Номер страницы — её место в списке; уже скачанное и целое по манифесту пропускаем
+    manifest = ChapterManifest.load(dest_dir)
+    jobs, kept = [], 0
+    for idx, u in enumerate(uniq, 1):
+        if manifest.check(idx, u):
+            kept += 1
+            continue
+        fn  = f"{idx:03d}{_ext_from_url(u)}"
         jobs.append((idx, u, fn))
+    if kept and log:
+        log(f"[INFO] Уже скачано ранее: {kept} из {len(uniq)}")
+    if not jobs:
+        return 0
 
     if stop_flag and stop_flag():
         if log: log("[STOP] Остановка перед началом скачивания.")
         return 0
 
-    saved, max_workers = 0, _compute_workers(auto_threads, threads)
+    # Без общего загрузчика (одиночный вызов) — свой, на эту главу
+    own_fetcher = fetcher is None
+    if own_fetcher:
+        fetcher = ImageFetcher(auto_threads=auto_threads, threads=threads)
+    saved, max_workers = 0, fetcher.workers
+    captured = captured or {}
+    from_browser = 0
 
     if log:
-        log(f"[INFO] Количество потоков: {max_workers}")
+        if auto_threads:
+            log(f"[INFO] Количество потоков: {fetcher.limit.limit} (подстраивается, до {max_workers})")
+        else:
+            log(f"[INFO] Количество потоков: {max_workers}")
 
-    def _task(idx: int, url: str, fn: str) -> tuple[int, bool, str]:
-        if stop_flag and stop_flag(): return (idx, False, fn)
+    def _task(idx: int, url: str, fn: str) -> tuple[str, bool, int, str]:
+        """(status: ok|rejected|failed, из браузера, размер, sha1)."""
+        if stop_flag and stop_flag(): return ("failed", False, 0, "")
         out_path = str(Path(dest_dir) / fn)
-        ok, data = _download_binary(
+        status, size, sha1 = _take_captured(captured.get(url), out_path, min_width=min_width)
+        if status != "failed":
+            return (status, status == "ok", size, sha1)
+        status, size, sha1 = _download_binary(
             url, out_path,
             referer=referer,
             cookie_raw=cookie_raw,
-            origin="https://page.kakao.com"
+            origin="https://page.kakao.com",
+            fetcher=fetcher,
+            min_width=min_width,
+            stop_flag=stop_flag,
         )
-        if not ok: return (idx, False, fn)
-        if min_width and min_width > 0 and data:
+        return (status, False, size, sha1)
+
+    futures = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as ex:
+            for idx, url, fn in jobs:
+                if stop_flag and stop_flag(): break
+                futures[ex.submit(_task, idx, url, fn)] = (idx, url, fn)
+            for fut in as_completed(futures):
+                if stop_flag and stop_flag(): break
+                idx, url, fn = futures[fut]
+                try:
+                    status, cached, size, sha1 = fut.result()
+                except Exception:
+                    status, cached, size, sha1 = "failed", False, 0, ""
+                if status == "ok":
+                    saved += 1
+                    from_browser += int(cached)
+                    manifest.record(idx, url, fn, size, sha1)
+                    if log: log(f"[SAVE] {fn}")
+                else:
+                    if status == "rejected":
+                        manifest.reject(idx, url, "min_width")
+                    if log: log(f"[WARN] Не скачано: {fn}")
+    finally:
+        try:
+            manifest.save()
+        except Exception as e:
+            if log: log(f"[WARN] Не удалось записать манифест главы: {e}")
+    if own_fetcher:
+        fetcher.close()
+    if log:
+        tail = f", из браузера: {from_browser}" if from_browser else ""
+        log(f"[OK] Сохранено: {saved} (из {len(jobs)}){tail}")
+    return saved
+
+def _fetch_pages_to_memory(
+    urls: List[str], dest_dir: str, *,
+    referer: Optional[str], cookie_raw: Optional[str],
+    fetcher: ImageFetcher,
+    min_width: int = 0, log: Optional[Callable[[str], None]] = None,
+    stop_flag: Optional[Callable[[], bool]] = None,
+    captured: Optional[dict] = None,
+) -> Tuple[List[bytes], ChapterManifest, List[Path]]:
+    """Страницы главы в памяти, по порядку — для автосклейки без промежуточных файлов.
+
+    Возвращает (страницы, манифест, файлы-исходники). Страницы, уже лежащие на
+    диске по манифесту, читаются оттуда. В возвращённом манифесте все страницы
+    записаны без файла, но на диск он не сохраняется и исходники не удаляются:
+    это делает вызывающий после успешной склейки. Прерванная глава остаётся
+    на диске в прежнем виде и докачивается при следующем запуске.
+    """
+    manifest = ChapterManifest.load(dest_dir)
+    uniq = _unique_urls(urls)
+    if not uniq:
+        if log: log("[WARN] DOM-список пуст.")
+        return [], manifest, []
+
+    pages: dict[int, bytes] = {}
+    on_disk: list[Path] = []
+    jobs = []
+    for idx, u in enumerate(uniq, 1):
+        if manifest.check(idx, u):
+            entry = manifest.pages[idx]
+            if entry.get("rejected"):
+                continue
+            path = Path(dest_dir) / entry["file"]
+            try:
+                pages[idx] = path.read_bytes()
+                manifest.record(idx, u, None, entry["size"], entry["sha1"])
+                on_disk.append(path)
+                continue
+            except OSError:
+                pass
+        jobs.append((idx, u))
+    if pages and log:
+        log(f"[INFO] Уже скачано ранее: {len(pages)} из {len(uniq)}")
+
+    headers = _image_headers(referer, cookie_raw, "https://page.kakao.com")
+    captured = captured or {}
+
+    def _task(url: str) -> tuple[str, Optional[bytes], str, bool]:
+        """(status: ok|rejected|failed, байты, sha1, из браузера)."""
+        if stop_flag and stop_flag(): return ("failed", None, "", False)
+        src = captured.get(url)
+        if src and os.path.isfile(src):
             try:
-                size = _try_get_image_size(data)
+                data = Path(src).read_bytes()
+                os.remove(src)
+                size = _try_get_image_size(BytesIO(data)) if min_width and min_width > 0 else None
                 if size and size[0] < int(min_width):
-                    Path(out_path).unlink(missing_ok=True)
-                    return (idx, False, fn)
-            except Exception:
+                    return ("rejected", None, "", True)
+                return ("ok", data, hashlib.sha1(data).hexdigest(), True)
+            except OSError:
                 pass
-        return (idx, True, fn)
+        status, data, sha1 = fetcher.fetch(url, headers=headers, min_width=min_width, stop_flag=stop_flag)
+        return (status, data, sha1, False)
 
-    futures = []
-    with ThreadPoolExecutor(max_workers=max_workers) as ex:
-        for idx, url, fn in jobs:
+    got, from_browser = 0, 0
+    futures = {}
+    with ThreadPoolExecutor(max_workers=fetcher.workers) as ex:
+        for idx, url in jobs:
             if stop_flag and stop_flag(): break
-            futures.append(ex.submit(_task, idx, url, fn))
+            futures[ex.submit(_task, url)] = (idx, url)
         for fut in as_completed(futures):
             if stop_flag and stop_flag(): break
+            idx, url = futures[fut]
             try:
-                idx, ok, fn = fut.result()
+                status, data, sha1, cached = fut.result()
             except Exception:
-                ok, fn = False, "<?>"
-            if ok:
-                saved += 1
-                if log: log(f"[SAVE] {fn}")
-            else:
-                if log: log(f"[WARN] Не скачано: {fn}")
-    if log: log(f"[OK] Сохранено: {saved} (из {len(jobs)})")
-    return saved
+                status, data, sha1, cached = "failed", None, "", False
+            if status == "ok" and data is not None:
+                pages[idx] = data
+                got += 1
+                from_browser += int(cached)
+                manifest.record(idx, url, None, len(data), sha1)
+            elif status == "rejected":
+                manifest.reject(idx, url, "min_width")
+            elif log:
+                log(f"[WARN] Не скачано: стр. {idx}")
+    if log:
+        tail = f", из браузера: {from_browser}" if from_browser else ""
+        log(f"[OK] Получено в память: {got} (из {len(jobs)}){tail}")
+    return [pages[i] for i in sorted(pages)], manifest, on_disk
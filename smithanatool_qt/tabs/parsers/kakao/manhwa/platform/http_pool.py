@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import statistics
+import threading
+import time
+from typing import BinaryIO, Callable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Потолок одновременных запросов и соединений на хост
+MAX_CONNECTIONS = 32
+
+# Размер куска при потоковой записи и сколько байт ждём заголовок картинки
+CHUNK_SIZE = 64 * 1024
+HEADER_PROBE_BYTES = 256 * 1024
+
+
+class AdaptiveLimit:
+    """Лимит одновременных запросов, подстраиваемый по сети (AIMD).
+
+    Каждые `window` успешных ответов сравнивается пропускная способность с
+    предыдущим окном: растёт — лимит +1; не растёт, а задержка заметно
+    выросла — лимит −1. На 429/5xx лимит делится пополам и какое-то время
+    не растёт.
+    """
+
+    def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = MAX_CONNECTIONS, window: int = 8):
+        self._cond = threading.Condition()
+        self._min = max(1, int(minimum))
+        self._max = max(self._min, int(maximum))
+        self._limit = float(min(self._max, max(self._min, int(initial))))
+        self._active = 0
+        self._window = max(2, int(window))
+        self._samples: list[tuple[float, int, float]] = []  # (задержка, байты, время окончания)
+        self._last_rate = 0.0
+        self._last_latency: Optional[float] = None
+        self._hold_until = 0.0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def maximum(self) -> int:
+        return self._max
+
+    def acquire(self, stop_flag: Optional[Callable[[], bool]] = None) -> bool:
+        with self._cond:
+            while self._active >= int(self._limit):
+                if stop_flag and stop_flag():
+                    return False
+                self._cond.wait(0.2)
+            self._active += 1
+            return True
+
+    def release(self) -> None:
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def on_success(self, seconds: float, nbytes: int) -> None:
+        now = time.monotonic()
+        with self._cond:
+            self._samples.append((max(0.0, seconds), max(0, int(nbytes)), now))
+            if len(self._samples) < self._window:
+                return
+            first = self._samples[0]
+            span = max(1e-3, now - (first[2] - first[0]))
+            rate = sum(b for _, b, _ in self._samples) / span
+            latency = statistics.median(s for s, _, _ in self._samples)
+            self._samples.clear()
+
+            if now >= self._hold_until:
+                if self._last_rate <= 0 or rate >= self._last_rate * 1.05:
+                    self._limit = min(self._max, self._limit + 1)
+                elif self._last_latency and latency > self._last_latency * 1.5:
+                    self._limit = max(self._min, self._limit - 1)
+            self._last_rate, self._last_latency = rate, latency
+            self._cond.notify_all()
+
+    def on_throttle(self, hold_s: float = 5.0) -> None:
+        with self._cond:
+            self._limit = max(self._min, self._limit / 2)
+            self._hold_until = time.monotonic() + hold_s
+            self._samples.clear()
+            self._last_rate = 0.0
+
+
+def _retry_after(resp: requests.Response) -> Optional[float]:
+    value = resp.headers.get('Retry-After')
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def _stream_body(resp, out: BinaryIO, *, min_width: int, stop_flag) -> tuple[str, int, str]:
+    """Записать тело ответа в `out` кусками; узкую картинку бросить, как только разобран заголовок."""
+    from PIL import ImageFile
+
+    h = hashlib.sha1()
+    size = 0
+    parser = ImageFile.Parser() if min_width and min_width > 0 else None
+    for chunk in resp.iter_content(CHUNK_SIZE):
+        if stop_flag and stop_flag():
+            return 'failed', 0, ''
+        if not chunk:
+            continue
+        if parser is not None:
+            try:
+                parser.feed(chunk)
+                width = parser.image.width if parser.image is not None else None
+            except Exception:
+                width, parser = None, None  # формат без разбора заголовка — качаем как есть
+            if width is not None:
+                if width < min_width:
+                    return 'rejected', 0, ''
+                parser = None  # дальше Parser начал бы декодировать пиксели в память
+            elif size > HEADER_PROBE_BYTES:
+                parser = None
+        out.write(chunk)
+        h.update(chunk)
+        size += len(chunk)
+    return 'ok', size, h.hexdigest()
+
+
+class ImageFetcher:
+    """HTTP-загрузчик картинок с keep-alive и пулом соединений на хост.
+
+    Один на весь запуск парсера: соединения переиспользуются между главами,
+    а общий `AdaptiveLimit` ограничивает суммарную нагрузку. Сессия общая для
+    потоков: пул urllib3 и cookie jar потокобезопасны, заголовки — на запрос.
+    """
+
+    def __init__(self, *, auto_threads: bool = True, threads: int = 4, max_retries: int = 3):
+        n = max(1, min(MAX_CONNECTIONS, int(threads or 1)))
+        self.limit = AdaptiveLimit(initial=4, minimum=1) if auto_threads else AdaptiveLimit(initial=n, minimum=n, maximum=n)
+        self._max_retries = max(0, int(max_retries))
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=MAX_CONNECTIONS, max_retries=0)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+
+    @property
+    def workers(self) -> int:
+        return self.limit.maximum
+
+    def _sleep(self, seconds: float, stop_flag: Optional[Callable[[], bool]]) -> bool:
+        end = time.monotonic() + min(30.0, max(0.0, seconds))
+        while True:
+            if stop_flag and stop_flag():
+                return False
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                return True
+            time.sleep(min(0.2, remaining))
+
+    def _request(
+        self,
+        url: str,
+        headers: dict,
+        stop_flag: Optional[Callable[[], bool]],
+        consume: Callable[[requests.Response], tuple],
+        cleanup: Callable[[], None],
+    ) -> Optional[tuple]:
+        """Запрос с лимитом и повторами: результат `consume(resp)` или None.
+
+        429/5xx и сетевые ошибки повторяются с паузой; `cleanup` — после каждой попытки.
+        """
+        for attempt in range(self._max_retries + 1):
+            if not self.limit.acquire(stop_flag):
+                return None
+            t0 = time.monotonic()
+            wait, throttled = None, False
+            try:
+                with self._session.get(url, headers=headers, timeout=60, stream=True) as resp:
+                    if resp.status_code == 429 or resp.status_code >= 500:
+                        throttled = True
+                        wait = _retry_after(resp)
+                    elif not resp.ok:
+                        return None
+                    else:
+                        result = consume(resp)
+                        if result[0] == 'ok':
+                            self.limit.on_success(time.monotonic() - t0, result[1])
+                        return result
+            except (requests.RequestException, OSError):
+                pass
+            finally:
+                self.limit.release()
+                cleanup()
+
+            if throttled:
+                self.limit.on_throttle()
+            if attempt < self._max_retries and not self._sleep(wait if wait is not None else 2 ** attempt, stop_flag):
+                return None
+        return None
+
+    def download(
+        self,
+        url: str,
+        dest_path: str,
+        *,
+        headers: dict,
+        min_width: int = 0,
+        stop_flag: Optional[Callable[[], bool]] = None,
+    ) -> tuple[str, int, str]:
+        """Скачать в файл потоково: ('ok' | 'rejected' | 'failed', размер, sha1).
+
+        Память на загрузку постоянна; файл появляется под своим именем только целиком.
+        """
+        tmp_path = dest_path + '.part'
+        os.makedirs(os.path.dirname(dest_path) or '.', exist_ok=True)
+
+        def consume(resp):
+            with open(tmp_path, 'wb') as f:
+                result = _stream_body(resp, f, min_width=min_width, stop_flag=stop_flag)
+            if result[0] == 'ok':
+                os.replace(tmp_path, dest_path)
+            return result
+
+        def cleanup():
+            if os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+        return self._request(url, headers, stop_flag, consume, cleanup) or ('failed', 0, '')
+
+    def fetch(
+        self,
+        url: str,
+        *,
+        headers: dict,
+        min_width: int = 0,
+        stop_flag: Optional[Callable[[], bool]] = None,
+    ) -> tuple[str, Optional[bytes], str]:
+        """Скачать в память: ('ok' | 'rejected' | 'failed', байты или None, sha1)."""
+
+        def consume(resp):
+            buf = io.BytesIO()
+            status, size, sha1 = _stream_body(resp, buf, min_width=min_width, stop_flag=stop_flag)
+            return status, size, sha1, buf.getvalue() if status == 'ok' else None
+
+        result = self._request(url, headers, stop_flag, consume, lambda: None)
+        if not result:
+            return 'failed', None, ''
+        status, _size, sha1, data = result
+        return status, data, sha1
+
+    def close(self) -> None:
+        try:
+            self._session.close()
+        except Exception:
+            pass
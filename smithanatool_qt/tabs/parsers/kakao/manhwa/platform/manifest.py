@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+# Манифест главы: какая страница в какой файл скачана (имя не попадает в список картинок склейки)
+MANIFEST_NAME = '.pages.json'
+# Главы серии, скачанные (и склеенные) до конца — для режима синхронизации
+SYNC_STATE_NAME = '.sync.json'
+
+
+def _page_key(url: str) -> str:
+    """URL без query/fragment: подписанные параметры меняются между запусками."""
+    p = urlsplit(str(url or ''))
+    return urlunsplit((p.scheme, p.netloc, p.path, '', ''))
+
+
+def file_sha1(path: str) -> Optional[str]:
+    h = hashlib.sha1()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(chunk)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+def _write_json_atomic(path: Path, data) -> None:
+    fd, tmp = tempfile.mkstemp(prefix=path.name + '.', suffix='.tmp', dir=str(path.parent))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class ChapterManifest:
+    """URL → файл, размер и SHA-1 для каждой страницы главы (по её номеру в списке).
+
+    По манифесту повторный запуск докачивает только отсутствующие или
+    повреждённые страницы и кладёт их под своими номерами.
+    """
+
+    def __init__(self, chapter_dir: str, data: Optional[dict] = None):
+        self.chapter_dir = Path(chapter_dir)
+        data = data if isinstance(data, dict) else {}
+        self.pages: Dict[int, dict] = {}
+        for entry in data.get('pages') or []:
+            try:
+                self.pages[int(entry['index'])] = dict(entry)
+            except (KeyError, TypeError, ValueError):
+                continue
+        self.stitched = bool(data.get('stitched'))
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, chapter_dir: str) -> 'ChapterManifest':
+        path = Path(chapter_dir) / MANIFEST_NAME
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(chapter_dir, json.load(f))
+        except Exception:
+            return cls(chapter_dir)
+
+    def save(self) -> None:
+        self.chapter_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            data = {
+                'version': 1,
+                'stitched': self.stitched,
+                'pages': [self.pages[i] for i in sorted(self.pages)],
+            }
+        _write_json_atomic(self.chapter_dir / MANIFEST_NAME, data)
+
+    # ---- pages ----
+    def check(self, index: int, url: str) -> bool:
+        """Страница уже есть: файл на месте, размер и хеш совпадают (или отсеяна по ширине)."""
+        entry = self.pages.get(int(index))
+        if not entry or entry.get('key') != _page_key(url):
+            return False
+        if entry.get('rejected'):
+            return True
+        if not entry.get('file'):
+            return False  # страница была только в памяти (склейка без файлов)
+        path = self.chapter_dir / str(entry.get('file') or '')
+        try:
+            if path.stat().st_size != int(entry.get('size', -1)):
+                return False
+        except OSError:
+            return False
+        return file_sha1(str(path)) == entry.get('sha1')
+
+    def record(self, index: int, url: str, file_name: Optional[str], size: int, sha1: str) -> None:
+        with self._lock:
+            self.pages[int(index)] = {
+                'index': int(index),
+                'key': _page_key(url),
+                'url': url,
+                'file': file_name,
+                'size': int(size),
+                'sha1': sha1,
+            }
+            self.stitched = False
+
+    def reject(self, index: int, url: str, reason: str) -> None:
+        with self._lock:
+            self.pages[int(index)] = {'index': int(index), 'key': _page_key(url), 'url': url, 'rejected': reason}
+
+    def covers(self, urls: Iterable[str]) -> bool:
+        """Все страницы списка записаны под своими номерами."""
+        urls = list(urls)
+        if not urls:
+            return False
+        for i, url in enumerate(urls, 1):
+            entry = self.pages.get(i)
+            if not entry or entry.get('key') != _page_key(url):
+                return False
+        return True
+
+
+class SeriesSyncState:
+    """Главы серии, доведённые до конца; в режиме синхронизации они пропускаются."""
+
+    def __init__(self, series_dir: str):
+        self._path = Path(series_dir) / SYNC_STATE_NAME
+        self._lock = threading.Lock()
+        try:
+            with open(self._path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            done = data.get('done') if isinstance(data, dict) else None
+        except Exception:
+            done = None
+        self._done: Dict[str, str] = {str(k): str(v) for k, v in (done or {}).items()}
+
+    def is_done(self, product_id) -> bool:
+        return str(product_id) in self._done
+
+    def mark_done(self, product_id, label: str) -> None:
+        with self._lock:
+            self._done[str(product_id)] = str(label)
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            _write_json_atomic(self._path, {'version': 1, 'done': self._done})
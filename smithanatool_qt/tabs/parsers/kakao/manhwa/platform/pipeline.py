@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .download import _discard_captured, _download_images_from_list, _fetch_pages_to_memory, _unique_urls
+from .http_pool import ImageFetcher
+from .manifest import ChapterManifest
+from .stitch import _auto_stitch_chapter
+
+
+class _OrderedLog:
+    """Логи фоновых стадий по главам: глава выводится целиком и в порядке очереди.
+
+    Строки текущей (самой ранней незавершённой) главы идут сразу, строки
+    следующих копятся и выводятся, когда до них доходит очередь.
+    """
+
+    def __init__(self, log: Callable[[str], None]):
+        self._log = log
+        self._lock = threading.Lock()
+        self._order: List[int] = []
+        self._buf: Dict[int, List[str]] = {}
+        self._done: set[int] = set()
+
+    def open(self, key: int) -> None:
+        with self._lock:
+            self._order.append(key)
+            self._buf[key] = []
+
+    def line(self, key: int, text: str) -> None:
+        with self._lock:
+            if self._order and self._order[0] == key:
+                self._log(text)
+            else:
+                self._buf.setdefault(key, []).append(text)
+
+    def close(self, key: int) -> None:
+        with self._lock:
+            self._done.add(key)
+            while self._order and self._order[0] in self._done:
+                head = self._order.pop(0)
+                self._done.discard(head)
+                self._buf.pop(head, None)
+                if self._order:
+                    nxt = self._order[0]
+                    for text in self._buf.get(nxt, []):
+                        self._log(text)
+                    self._buf[nxt] = []
+
+
+class ChapterPipeline:
+    """Скачивание и автосклейка глав в фоне, пока раннер собирает DOM следующих.
+
+    Сбор DOM остаётся в потоке раннера (sync Playwright привязан к своему
+    потоку); скачивание и склейка — отдельные стадии со своими лимитами.
+    Слот занимается до сбора DOM главы и освобождается после её склейки,
+    так что впереди самой медленной стадии копится не больше `max_inflight` глав.
+    """
+
+    def __init__(
+        self,
+        *,
+        log: Callable[[str], None],
+        stop_flag: Optional[Callable[[], bool]],
+        cookie_raw: Optional[str],
+        min_width: int = 0,
+        auto_concat: Optional[dict] = None,
+        max_inflight: int = 3,
+        download_chapters: int = 1,
+        stitch_chapters: int = 1,
+    ):
+        self._stop_flag = stop_flag
+        self._cookie_raw = cookie_raw
+        self._min_width = int(min_width) if min_width else 0
+        self._auto_concat = auto_concat or {}
+        self._slots = threading.Semaphore(max(1, int(max_inflight)))
+        self._dl = ThreadPoolExecutor(max_workers=max(1, int(download_chapters)), thread_name_prefix='kakao-dl')
+        self._st = ThreadPoolExecutor(max_workers=max(1, int(stitch_chapters)), thread_name_prefix='kakao-stitch')
+        self._ordered = _OrderedLog(log)
+        self._seq = itertools.count()
+        # Соединения и лимит параллельности общие для всех глав запуска
+        self._fetcher = ImageFetcher(
+            auto_threads=bool(self._auto_concat.get('auto_threads', True)),
+            threads=int(self._auto_concat.get('threads', 4)),
+        )
+
+    def _stopped(self) -> bool:
+        return bool(self._stop_flag and self._stop_flag())
+
+    def acquire_slot(self) -> bool:
+        """Дождаться места в конвейере. False — если за это время нажали «Стоп»."""
+        while not self._slots.acquire(timeout=0.2):
+            if self._stopped():
+                return False
+        return True
+
+    def release_slot(self) -> None:
+        self._slots.release()
+
+    def submit(
+        self,
+        label: str,
+        urls: List[str],
+        *,
+        chapter_dir: str,
+        referer: str,
+        captured: Optional[Dict[str, str]] = None,
+        on_done: Optional[Callable[[bool], None]] = None,
+    ) -> None:
+        """Поставить главу в очередь (слот уже занят через `acquire_slot`).
+
+        captured — url → файл, уже полученный браузером; такие страницы не качаются повторно.
+        on_done(ok) — из фонового потока, когда глава прошла все стадии;
+        ok — все страницы на месте по манифесту (и склеены, если включена автосклейка).
+        """
+        key = next(self._seq)
+        self._ordered.open(key)
+        self._dl.submit(self._download, key, label, _unique_urls(urls), chapter_dir, referer, captured, on_done)
+
+    def close(self) -> None:
+        """Дождаться всех поставленных глав."""
+        self._dl.shutdown(wait=True)
+        self._st.shutdown(wait=True)
+        self._fetcher.close()
+
+    def _download(
+        self,
+        key: int,
+        label: str,
+        urls: List[str],
+        chapter_dir: str,
+        referer: str,
+        captured: Optional[Dict[str, str]],
+        on_done: Optional[Callable[[bool], None]],
+    ) -> None:
+        log = lambda s: self._ordered.line(key, s)
+        stitch = bool(self._auto_concat.get('enable'))
+        done_before = ChapterManifest.load(chapter_dir)
+        if stitch and done_before.stitched and done_before.covers(urls):
+            log(f'[SKIP] {label}: уже скачана и склеена')
+            self._finish(key, on_done, True)
+            return
+
+        # Исходники всё равно удаляются после склейки — не пишем их на диск вовсе.
+        # Страницы главы держатся в памяти до конца склейки; глав одновременно
+        # не больше `max_inflight` (слоты конвейера), это и ограничивает расход RAM.
+        fused = stitch and bool(self._auto_concat.get('delete_sources'))
+        pages = None
+        manifest = None
+        sources: List[Path] = []
+        try:
+            if fused:
+                pages, manifest, sources = _fetch_pages_to_memory(
+                    urls,
+                    chapter_dir,
+                    referer=referer,
+                    cookie_raw=self._cookie_raw,
+                    fetcher=self._fetcher,
+                    min_width=self._min_width,
+                    log=log,
+                    stop_flag=self._stop_flag,
+                    captured=captured,
+                )
+            else:
+                _download_images_from_list(
+                    urls,
+                    chapter_dir,
+                    referer=referer,
+                    cookie_raw=self._cookie_raw,
+                    min_width=self._min_width,
+                    log=log,
+                    stop_flag=self._stop_flag,
+                    auto_threads=bool(self._auto_concat.get('auto_threads', True)),
+                    threads=int(self._auto_concat.get('threads', 4)),
+                    captured=captured,
+                    fetcher=self._fetcher,
+                )
+        except Exception as e:
+            log(f'[WARN] Ошибка докачки DOM-URL для {label}: {e}')
+        finally:
+            _discard_captured(captured)
+
+        if manifest is None:
+            manifest = ChapterManifest.load(chapter_dir)
+        complete = manifest.covers(urls)
+        if stitch and not self._stopped():
+            self._st.submit(self._stitch, key, label, chapter_dir, urls, complete, on_done, pages, manifest, sources)
+        else:
+            self._finish(key, on_done, complete and not stitch)
+
+    def _stitch(
+        self,
+        key: int,
+        label: str,
+        chapter_dir: str,
+        urls: List[str],
+        complete: bool,
+        on_done: Optional[Callable[[bool], None]],
+        pages: Optional[List[bytes]] = None,
+        manifest: Optional[ChapterManifest] = None,
+        sources: Sequence[Path] = (),
+    ) -> None:
+        """Склеить главу. pages/manifest/sources — от `_fetch_pages_to_memory`:
+        манифест сохраняется, а прочитанные в память исходники удаляются только
+        после успешной склейки всей главы."""
+        log = lambda s: self._ordered.line(key, s)
+        ok = False
+        try:
+            stitched = _auto_stitch_chapter(
+                chapter_dir, auto_cfg=self._auto_concat, log=log, stop_flag=self._stop_flag, pages=pages,
+            )
+            if stitched and complete and not self._stopped():
+                if pages is None or manifest is None:
+                    manifest = ChapterManifest.load(chapter_dir)
+                if manifest.covers(urls):
+                    manifest.stitched = True
+                    manifest.save()
+                    for path in sources:
+                        path.unlink(missing_ok=True)
+                    ok = True
+        except Exception as e:
+            log(f'[WARN] Ошибка автосклейки {label}: {e}')
+        finally:
+            self._finish(key, on_done, ok)
+
+    def _finish(self, key: int, on_done: Optional[Callable[[bool], None]] = None, ok: bool = False) -> None:
+        self._ordered.close(key)
+        self._slots.release()
+        if on_done:
+            try:
+                on_done(ok)
+            except Exception:
+                pass
@@ -5,11 +5,11 @@ import shutil
 from pathlib import Path
 from typing import Callable, Dict, Iterable, List, Optional
 
-from playwright.sync_api import sync_playwright
-
-from .download import _download_images_from_list
-from .dom import _collect_dom_urls
-from .stitch import _auto_stitch_chapter
+from .api_urls import _resolve_image_urls_via_api, _save_urls_json
+from .browser_service import BrowserService
+from .dom import MAX_DOM_PAGES, ResourceBlocker, _collect_dom_urls_pool, _load_captured, _urls_json_path
+from .manifest import SeriesSyncState
+from .pipeline import ChapterPipeline
 from .utils import _viewer_url, ensure_dir
 from smithanatool_qt.tabs.parsers.kakao.shared.episodes.specs import _safe_list_all, parse_chapter_spec, parse_index_spec
 from smithanatool_qt.tabs.parsers.kakao.shared.runner.bootstrap import (
@@ -99,6 +99,15 @@ def run_parser(
     wait_continue: Optional[Callable[[], bool]] = None,
     runtime: Optional[KakaoSeriesRuntime] = None,
     preloaded_rows: Optional[Iterable[dict]] = None,
+    dom_pages: int = 2,
+    api_first: bool = True,
+    capture_responses: bool = True,
+    sync: bool = False,
+    pipeline_depth: int = 3,
+    download_chapters: int = 1,
+    stitch_chapters: int = 1,
+    browser_service: Optional[BrowserService] = None,
+    block_resources: bool = True,
 ) -> None:
     log = on_log or (lambda s: None)
 
@@ -157,6 +166,18 @@ def run_parser(
     if viewer_ids:
         targets = [str(x) for x in viewer_ids]
 
+    # Доведённые до конца главы серии; в режиме синхронизации — пропускаем
+    sync_state = SeriesSyncState(series_dir)
+    if sync:
+        before = len(targets)
+        targets = [pid for pid in targets if not sync_state.is_done(pid)]
+        log(f'[SYNC] Новых глав: {len(targets)} (уже скачано ранее: {before - len(targets)})')
+        if not targets:
+            log('[SYNC] Новых глав нет.')
+            if delete_cache_after and runtime.cache_dir.exists():
+                shutil.rmtree(runtime.cache_dir, ignore_errors=True)
+            return
+
     if stop_flag and stop_flag():
         raise RuntimeError('[CANCEL] Остановлено пользователем.')
     if not targets:
@@ -166,117 +187,125 @@ def run_parser(
     log(f'[INFO] series_id={sid}')
     log(f'[INFO] product_ids={target_ids}')
 
-    pw = None
-    browser = None
-    shared_ctx = None
+    pipeline = None
 
     state_path = runtime.session_dir / 'kakao_auth.json'
     state_path_str = str(state_path) if state_path.exists() else None
 
+    # Без сервиса вкладки — свой браузер на этот запуск
+    own_service = browser_service is None
+    if own_service:
+        browser_service = BrowserService(idle_timeout_s=0)
+
     try:
-        pw = sync_playwright().start()
-        try:
-            browser = pw.chromium.launch(headless=True, channel='msedge')
-        except Exception:
-            browser = pw.chromium.launch(headless=True)
-
-        ctx_kwargs = dict(
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123 Safari/537.36',
-            viewport={'width': 1280, 'height': 860},
-            locale='ko-KR',
-            timezone_id='Asia/Seoul',
+        # Сбор DOM главы N+1 идёт, пока глава N качается, а N-1 склеивается
+        pages = max(1, min(MAX_DOM_PAGES, int(dom_pages or 1)))
+        pipeline = ChapterPipeline(
+            log=log,
+            stop_flag=stop_flag,
+            cookie_raw=runtime.cookie_raw,
+            min_width=min_width,
+            auto_concat=auto_concat,
+            max_inflight=max(int(pipeline_depth), pages + 2),
+            download_chapters=download_chapters,
+            stitch_chapters=stitch_chapters,
         )
-        if state_path_str:
-            ctx_kwargs['storage_state'] = state_path_str
 
-        log(f"[DEBUG] Storage state path: {state_path_str or '(нет файла)'}")
-        shared_ctx = browser.new_context(**ctx_kwargs)
+        chapters_meta: Dict[str, tuple[str, str]] = {}  # label → (productId, viewer url)
 
-        for i, pid in enumerate(targets, 1):
-            if stop_flag and stop_flag():
-                raise RuntimeError('[CANCEL] Остановлено пользователем.')
+        def _jobs():
+            # Доступ к главам проверяется по порядку, по мере освобождения страниц
+            for pid in targets:
+                if stop_flag and stop_flag():
+                    raise RuntimeError('[CANCEL] Остановлено пользователем.')
 
-            url = _viewer_url(sid, pid)
-            log(f'[OPEN] {url}')
+                url = _viewer_url(sid, pid)
+                log(f'[OPEN] {url}')
 
-            ep_no = id_to_num.get(str(pid))
-            label = f'{ep_no:03d}' if isinstance(ep_no, int) else f'id_{pid}'
-            product_id = int(pid)
+                ep_no = id_to_num.get(str(pid))
+                label = f'{ep_no:03d}' if isinstance(ep_no, int) else f'id_{pid}'
+                product_id = int(pid)
 
-            access_ok, _ = ensure_product_access(
-                api=runtime.api,
-                series_id=sid,
-                product_id=product_id,
-                parser_kind='manhwa',
-                log=log,
-                stop_flag=stop_flag,
-                chapter_label=label,
-                on_choose_action=on_choose_ticket_action,
-            )
-            if not access_ok:
-                continue
-
-            try:
-                urls_json_path = _collect_dom_urls(
-                    sid,
-                    product_id,
-                    out_dir=series_dir,
-                    auth_dir=str(runtime.session_dir),
+                access_ok, _ = ensure_product_access(
+                    api=runtime.api,
+                    series_id=sid,
+                    product_id=product_id,
+                    parser_kind='manhwa',
                     log=log,
                     stop_flag=stop_flag,
-                    episode_no=ep_no,
-                    pre_action=None,
-                    scroll_ms=int(scroll_ms),
-                    ctx=shared_ctx,
+                    chapter_label=label,
+                    on_choose_action=on_choose_ticket_action,
                 )
-                if urls_json_path:
-                    log(f'[OK] URLS {label}: {urls_json_path}')
-            except Exception as e:
-                log(f'[WARN] URLS {label} не получены: {e}')
-                urls_json_path = None
+                if not access_ok:
+                    continue
 
-            chapter_dir = str(Path(series_dir) / label)
-            try:
-                if stop_flag and stop_flag():
+                if not pipeline.acquire_slot():
                     raise RuntimeError('[CANCEL] Остановлено пользователем.')
+                chapters_meta[label] = (str(pid), url)
+                urls_json_path = _urls_json_path(series_dir, product_id, ep_no)
+
+                api_urls = _resolve_image_urls_via_api(runtime.api, sid, product_id, log=log) if api_first else None
+                if api_urls:
+                    log(f'[API] {label}: страниц {len(api_urls)}, без прокрутки viewer')
+                    _on_urls(label, _save_urls_json(api_urls, urls_json_path))
+                    continue
+                yield label, url, urls_json_path
+
+        def _on_urls(label: str, urls_json_path: Optional[str]):
+            pid, url = chapters_meta.pop(label)
+            urls = None
+            try:
                 if urls_json_path and Path(urls_json_path).exists():
+                    log(f'[OK] URLS {label}: {urls_json_path}')
                     with open(urls_json_path, 'r', encoding='utf-8') as f:
                         urls = json.load(f)
-
-                    _download_images_from_list(
-                        urls,
-                        chapter_dir,
-                        referer=url,
-                        cookie_raw=runtime.cookie_raw,
-                        min_width=int(min_width) if min_width else 0,
-                        log=log,
-                        stop_flag=stop_flag,
-                        auto_threads=bool((auto_concat or {}).get('auto_threads', True)),
-                        threads=int((auto_concat or {}).get('threads', 4)),
-                    )
-
-                    if auto_concat and auto_concat.get('enable'):
-                        _auto_stitch_chapter(chapter_dir, auto_cfg=auto_concat, log=log, stop_flag=stop_flag)
                 else:
                     log(f'[WARN] Нет DOM-URL для {label} (или файл отсутствует)')
             except Exception as e:
-                log(f'[WARN] Ошибка докачки DOM-URL для {label}: {e}')
+                log(f'[WARN] URLS {label} не прочитаны: {e}')
+            if urls is None:
+                pipeline.release_slot()
+                return
+
+            def _chapter_done(ok: bool, pid=pid, label=label) -> None:
+                if ok:
+                    sync_state.mark_done(pid, label)
+
+            pipeline.submit(
+                label,
+                urls,
+                chapter_dir=str(Path(series_dir) / label),
+                referer=url,
+                captured=_load_captured(urls_json_path),
+                on_done=_chapter_done,
+            )
+
+        if pages > 1:
+            log(f'[INFO] Страниц viewer одновременно: {pages}')
+        # Браузер нужен только главам, которые не разрешились через API — контекст открывается лениво
+        jobs = _jobs()
+        browser_service.run(
+            lambda open_ctx: _collect_dom_urls_pool(
+                open_ctx,
+                jobs,
+                pages=pages,
+                on_done=_on_urls,
+                log=log,
+                stop_flag=stop_flag,
+                scroll_ms=int(scroll_ms),
+                capture=bool(capture_responses),
+                blocker=ResourceBlocker() if block_resources else None,
+            ),
+            storage_state=state_path_str,
+            log=log,
+        )
+
+        log('[INFO] DOM собран для всех глав, ждём скачивание и склейку…')
     finally:
-        try:
-            if shared_ctx:
-                shared_ctx.close()
-        except Exception as e:
-            log(f'[WARN] Не удалось закрыть shared context: {e}')
-        try:
-            if browser:
-                browser.close()
-        except Exception as e:
-            log(f'[WARN] Не удалось закрыть browser: {e}')
-        try:
-            if pw:
-                pw.stop()
-        except Exception as e:
-            log(f'[WARN] Не удалось остановить Playwright: {e}')
+        if pipeline is not None:
+            pipeline.close()
+        if own_service:
+            browser_service.shutdown()
         if delete_cache_after:
             try:
                 if runtime.cache_dir.exists():
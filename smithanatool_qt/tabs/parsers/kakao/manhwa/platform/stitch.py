@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Callable, Optional
+from typing import Callable, Optional, Sequence
 
 from smithanatool_qt.tabs.transform.sections.stitch.service import (
     auto_stitch_chapter
@@ -13,15 +13,19 @@ def _auto_stitch_chapter(
     auto_cfg: dict,
     log=None,
     stop_flag: Optional[Callable[[], bool]] = None,
-):
+    pages: Optional[Sequence[bytes]] = None,
+) -> bool:
     """Тонкая обёртка над общим backend автосклейки.
 
     Используется манхва-парсером после скачивания изображений главы.
     Вся логика режимов count / height / smart живёт в transform.sections.stitch.service.
+    pages — страницы, скачанные сразу в память (файлов главы на диске нет).
+    Возвращает True, только если склеены все группы и остановки не было.
     """
     return auto_stitch_chapter(
         chapter_dir,
         auto_cfg=auto_cfg,
         log=log,
         stop_flag=stop_flag,
+        pages=pages,
     )
@@ -46,6 +46,9 @@ class ManhwaTabRunMixin(TicketDecisionRunMixin, CommonParserRunMixin):
             cache_episode_map=True,
             delete_cache_after=True,
             scroll_ms=int(self.spin_scroll_ms.value()),
+            dom_pages=int(self.spin_dom_pages.value()),
+            sync_new_only=self.chk_sync.isChecked(),
+            block_resources=self.chk_block_resources.isChecked(),
         )
 
     @Slot()
@@ -53,7 +56,7 @@ class ManhwaTabRunMixin(TicketDecisionRunMixin, CommonParserRunMixin):
         if not self._out_dir:
             QMessageBox.warning(self, 'Парсер', 'Сначала выберите папку сохранения.')
             return
-        self._start_worker_common(ManhwaParserWorker(self._collect_cfg()))
+        self._start_worker_common(ManhwaParserWorker(self._collect_cfg(), browser_service=self._browser_service))
 
     def _connect_extra_worker_signals(self, worker) -> None:
         worker.error.connect(lambda e: self._log(f'[ERROR] {e}'))
@@ -16,6 +16,7 @@ from PySide6.QtWidgets import (
 from smithanatool_qt.widgets.collapsible import CollapsibleSection
 from smithanatool_qt.tabs.parsers.common.parser_defaults import default_thread_count
 from smithanatool_qt.tabs.parsers.common.ui_helpers import build_reset_footer
+from smithanatool_qt.tabs.parsers.kakao.manhwa.platform.dom import MAX_DOM_PAGES
 from ...common.widgets import ElidedLabel
 
 
@@ -227,6 +228,14 @@ def build_extra_settings_group(self):
     threads_row.addStretch(1)
     layout.addLayout(threads_row)
 
+    self.chk_sync = QCheckBox('Только новые главы (синхронизация)')
+    self.chk_sync.setToolTip('Пропускать главы, которые уже были скачаны до конца в этой папке серии.')
+    layout.addWidget(self.chk_sync)
+
+    self.chk_block_resources = QCheckBox('Не загружать лишнее в браузере')
+    self.chk_block_resources.setToolTip('При сборе страниц не грузить шрифты, видео, рекламу и аналитику — прокрутка идёт быстрее.')
+    layout.addWidget(self.chk_block_resources)
+
     row_scroll = QHBoxLayout()
     row_scroll.setContentsMargins(0, 0, 0, 0)
     row_scroll.setSpacing(6)
@@ -237,12 +246,20 @@ def build_extra_settings_group(self):
     self.spin_scroll_ms.setValue(8000)
     self.spin_scroll_ms.setFixedWidth(60)
     row_scroll.addWidget(self.spin_scroll_ms)
+    row_scroll.addSpacing(8)
+    row_scroll.addWidget(QLabel('Страниц одновременно:'))
+    self.spin_dom_pages = QSpinBox()
+    self.spin_dom_pages.setRange(1, MAX_DOM_PAGES)
+    self.spin_dom_pages.setValue(2)
+    row_scroll.addWidget(self.spin_dom_pages)
     row_scroll.addStretch(1)
     layout.addLayout(row_scroll)
 
     note = QLabel(
-        'Сколько времени viewer прокручивается, чтобы подгрузились все страницы.\n'
-        'Если часть картинок не попадает в загрузку — увеличьте значение.'
+        'Максимальное время прокрутки viewer. Прокрутка заканчивается раньше,\n'
+        'когда низ главы достигнут и новые картинки перестали появляться.\n'
+        'Если часть картинок не попадает в загрузку — увеличьте значение.\n'
+        'Несколько страниц прокручиваются параллельно, каждая — свою главу.'
     )
     note.setWordWrap(True)
     note.setProperty('role', 'hint')
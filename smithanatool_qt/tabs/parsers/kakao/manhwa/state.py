@@ -72,6 +72,9 @@ class ManhwaTabStateMixin(CommonParserStateMixin):
         self.chk_auto_buy.setChecked(False)
         self.chk_auto_use_ticket.setChecked(False)
         self.spin_scroll_ms.setValue(5000)
+        self.spin_dom_pages.setValue(2)
+        self.chk_sync.setChecked(False)
+        self.chk_block_resources.setChecked(True)
 
         mode_map = {0: 'count', 1: 'height', 2: 'smart'}
         self._group_by_shadow = mode_map.get(mode_idx, 'count')
@@ -238,6 +241,9 @@ class ManhwaTabStateMixin(CommonParserStateMixin):
         bind_spinbox(self.spin_comp, self._ini_key('compress_level'), 6)
         bind_spinbox(self.spin_per, self._ini_key('per'), 12)
         bind_spinbox(self.spin_scroll_ms, self._ini_key('scroll_ms'), 5000)
+        bind_spinbox(self.spin_dom_pages, self._ini_key('dom_pages'), 2)
+        bind_checkbox(self.chk_sync, self._ini_key('sync_new_only'), False)
+        bind_checkbox(self.chk_block_resources, self._ini_key('block_resources'), True)
         bind_radiobuttons([self.rb_number, self.rb_id, self.rb_index, self.rb_ui], self._ini_key('mode'), 0)
         bind_checkbox(self.chk_auto, self._ini_key('auto_stitch'), True)
         bind_checkbox(self.chk_no_resize, self._ini_key('no_resize_width'), True)
@@ -27,6 +27,7 @@ from PySide6.QtWidgets import (
 from ...common.base_page import BaseParserPage
 from ...common.saved_ids_panel import SavedIdsPanel
 from ...common.widgets import ElidedLabel
+from .platform.browser_service import BrowserService
 from .run import ManhwaTabRunMixin
 from .sections import build_auto_stitch_section, build_extra_settings_group, build_footer
 from .state import ManhwaTabStateMixin
@@ -37,6 +38,8 @@ class ParserManhwaTab(ManhwaTabStateMixin, ManhwaTabRunMixin, BaseParserPage):
     def __init__(self, parent=None):
         super().__init__(parent)
         self._worker: Optional[ManhwaParserWorker] = None
+        # Тёплый headless-браузер для сбора DOM, общий для запусков вкладки
+        self._browser_service = BrowserService()
 
         layout = QHBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
@@ -243,6 +246,7 @@ class ParserManhwaTab(ManhwaTabStateMixin, ManhwaTabRunMixin, BaseParserPage):
                 self._worker.stop_and_wait(8000)
         except Exception:
             pass
+        self._browser_service.shutdown()
 
     def showEvent(self, e):
         super().showEvent(e)
@@ -4,6 +4,7 @@ from dataclasses import dataclass
 from typing import Iterable, Optional
 
 from smithanatool_qt.tabs.parsers.common.parser_defaults import default_thread_count
+from smithanatool_qt.tabs.parsers.kakao.manhwa.platform.browser_service import BrowserService
 from smithanatool_qt.tabs.parsers.kakao.manhwa.platform.runner import run_parser
 from smithanatool_qt.tabs.parsers.kakao.shared.episodes.map_content import (
     picker_rows_from_episode_map,
@@ -45,10 +46,17 @@ class ManhwaParserConfig:
     cache_episode_map: bool = False
     delete_cache_after: bool = True
     scroll_ms: int = 5000
+    dom_pages: int = 2
+    sync_new_only: bool = False
+    block_resources: bool = True
     by_index_spec: Optional[str] = None
 
 
 class ManhwaParserWorker(BaseInteractiveParserWorker):
+    def __init__(self, cfg: ManhwaParserConfig, browser_service: Optional[BrowserService] = None):
+        super().__init__(cfg)
+        self._browser_service = browser_service
+
     def _build_auto_concat(self) -> Optional[dict]:
         if not self.cfg.auto_enabled:
             return None
@@ -163,6 +171,9 @@ class ManhwaParserWorker(BaseInteractiveParserWorker):
                 use_cache_map=bool(self.cfg.cache_episode_map),
                 delete_cache_after=bool(self.cfg.delete_cache_after),
                 scroll_ms=int(self.cfg.scroll_ms),
+                dom_pages=int(self.cfg.dom_pages),
+                sync=bool(self.cfg.sync_new_only),
+                block_resources=bool(self.cfg.block_resources),
                 auto_concat=self._build_auto_concat(),
                 on_choose_ticket_action=self._confirm_ticket_action,
                 by_index=by_index,
@@ -170,6 +181,7 @@ class ManhwaParserWorker(BaseInteractiveParserWorker):
                 wait_continue=self._wait_continue,
                 runtime=runtime,
                 preloaded_rows=episode_map_rows,
+                browser_service=self._browser_service,
             )
         except Exception as err:
             self._emit_exception(err)
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Optional
+
+# Папка постоянного кэша частей в папке сохранения (не удаляется вместе с cache/ серии)
+PART_CACHE_DIR = '.kakao_novel_parts'
+PART_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+class PartCache:
+    """Скачанные части текста глав: сжатый JSON по (chapterId, contentId).
+
+    Повторный экспорт и смена формата вывода берут части отсюда, без запросов.
+    Кэш ограничен по размеру: `trim` удаляет давно не использованные части.
+    """
+
+    def __init__(self, root: str | Path, max_bytes: int = PART_CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max(0, int(max_bytes))
+
+    def _path(self, chapter_id: int, content_id: int) -> Path:
+        return self.root / f'ch{int(chapter_id)}_ct{int(content_id)}.json.gz'
+
+    def get(self, chapter_id: int, content_id: int) -> Optional[dict]:
+        path = self._path(chapter_id, content_id)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                payload = json.load(f)
+        except (OSError, ValueError, EOFError):
+            return None
+        try:
+            os.utime(path)  # отметка использования для trim
+        except OSError:
+            pass
+        return payload if isinstance(payload, dict) else None
+
+    def put(self, chapter_id: int, content_id: int, payload: dict) -> None:
+        if not chapter_id and not content_id:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(chapter_id, content_id)
+        data = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        fd, tmp = tempfile.mkstemp(prefix=path.name + '.', suffix='.tmp', dir=str(self.root))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(gzip.compress(data, compresslevel=6))
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+    def trim(self, log: Optional[Callable[[str], None]] = None) -> None:
+        """Удалить самые давно использованные части, пока кэш больше `max_bytes`."""
+        try:
+            entries = [(p.stat(), p) for p in self.root.glob('*.json.gz')]
+        except OSError:
+            return
+        total = sum(st.st_size for st, _ in entries)
+        if total <= self.max_bytes:
+            return
+        removed = 0
+        for st, path in sorted(entries, key=lambda e: e[0].st_mtime):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= st.st_size
+            removed += 1
+        if removed and log:
+            log(f'[CACHE] Кэш частей: удалено старых {removed}, осталось {total // (1024 * 1024)} МБ')
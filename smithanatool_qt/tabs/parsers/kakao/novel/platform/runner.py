@@ -4,10 +4,14 @@ import html
 import json
 import re
 import shutil
+import threading
+import time
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Callable, Iterable, Optional
 
+from smithanatool_qt.tabs.parsers.kakao.novel.platform.part_cache import PART_CACHE_DIR, PartCache
 from smithanatool_qt.tabs.parsers.kakao.shared.api.kakao_api import KakaoPageApi
 from smithanatool_qt.tabs.parsers.kakao.shared.episodes.map_content import picker_rows_from_episode_map
 from smithanatool_qt.tabs.parsers.kakao.shared.runner.bootstrap import (
@@ -17,6 +21,7 @@ from smithanatool_qt.tabs.parsers.kakao.shared.runner.bootstrap import (
 )
 from smithanatool_qt.tabs.parsers.kakao.shared.tickets.runtime import ensure_product_access
 from smithanatool_qt.tabs.parsers.kakao.shared.utils.kakao_common import (
+    build_resource_url,
     compute_workers,
     ensure_dir,
     repair_mojibake_text,
@@ -25,26 +30,59 @@ from smithanatool_qt.tabs.parsers.kakao.shared.utils.kakao_common import (
 
 
 def _save_json(path: Path, data: dict) -> None:
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8-sig')
+    path.write_text(json.dumps(data, ensure_ascii=False, separators=(',', ':')), encoding='utf-8')
 
 
 KakaoNovelApi = KakaoPageApi
 
+# Сколько глав качается одновременно и общий предел частоты запросов на запуск
+PARALLEL_CHAPTERS = 3
+MAX_REQUESTS_PER_S = 10.0
+
+
+class _RequestGate:
+    """Общий на запуск предел одновременных запросов и их частоты."""
+
+    def __init__(self, max_concurrent: int, rate_per_s: float):
+        self._slots = threading.BoundedSemaphore(max(1, int(max_concurrent)))
+        self._interval = 1.0 / rate_per_s if rate_per_s and rate_per_s > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def __enter__(self):
+        self._slots.acquire()
+        if self._interval:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._next_at - now
+                self._next_at = max(now, self._next_at) + self._interval
+            if wait > 0:
+                time.sleep(wait)
+        return self
+
+    def __exit__(self, *exc):
+        self._slots.release()
+        return False
 
-def _build_resource_url(base_url: str, secure_url: str) -> str:
-    if not secure_url:
-        raise RuntimeError('Пустой secureUrl')
 
-    secure_url = str(secure_url).strip()
-    base_url = str(base_url).strip()
+class _GatedApi:
+    """Методы API, которыми качается текст, — через общий `_RequestGate`."""
 
-    if secure_url.startswith('http://') or secure_url.startswith('https://'):
-        return secure_url
-    if base_url.endswith('=') or '?kid=' in base_url:
-        return f'{base_url}{secure_url}'
-    if base_url.endswith('/'):
-        return f"{base_url}{secure_url.lstrip('/')}"
-    return f"{base_url}/{secure_url.lstrip('/')}"
+    def __init__(self, api: KakaoNovelApi, gate: _RequestGate):
+        self._api = api
+        self._gate = gate
+
+    def ready_to_use_ticket(self, series_id: int, product_id: int) -> dict:
+        with self._gate:
+            return self._api.ready_to_use_ticket(series_id, product_id)
+
+    def viewer_data(self, series_id: int, product_id: int) -> dict:
+        with self._gate:
+            return self._api.viewer_data(series_id, product_id)
+
+    def fetch_json(self, url: str) -> dict:
+        with self._gate:
+            return self._api.fetch_json(url)
 
 
 def _get_payload_paragraphs(payload: dict) -> list[dict]:
@@ -114,10 +152,27 @@ def _normalize_product_ids(chapters: Optional[Iterable[str]]) -> list[int]:
     return out
 
 
-def _download_part(api: KakaoNovelApi, ats_server_url: str, idx: int, part: dict) -> dict:
+def _download_part(
+    api: KakaoNovelApi | _GatedApi,
+    ats_server_url: str,
+    idx: int,
+    part: dict,
+    part_cache: Optional[PartCache] = None,
+) -> dict:
     secure_url = str(part.get('secureUrl') or '').strip()
     chapter_id = int(part.get('chapterId', 0))
     content_id = int(part.get('contentId', 0))
+    payload = part_cache.get(chapter_id, content_id) if part_cache and (chapter_id or content_id) else None
+    if payload is not None:
+        return {
+            'idx': idx,
+            'chapter_id': chapter_id,
+            'content_id': content_id,
+            'payload': payload,
+            'text': flatten_text_payload(payload),
+            'skipped': False,
+            'cached': True,
+        }
     if not secure_url:
         return {
             'idx': idx,
@@ -126,11 +181,17 @@ def _download_part(api: KakaoNovelApi, ats_server_url: str, idx: int, part: dict
             'payload': {},
             'text': '',
             'skipped': True,
+            'cached': False,
         }
 
-    full_url = _build_resource_url(ats_server_url, secure_url)
+    full_url = build_resource_url(ats_server_url, secure_url)
     payload = api.fetch_json(full_url)
     text = flatten_text_payload(payload)
+    if part_cache and text:
+        try:
+            part_cache.put(chapter_id, content_id, payload)
+        except OSError:
+            pass
     return {
         'idx': idx,
         'chapter_id': chapter_id,
@@ -138,17 +199,19 @@ def _download_part(api: KakaoNovelApi, ats_server_url: str, idx: int, part: dict
         'payload': payload,
         'text': text,
         'skipped': False,
+        'cached': False,
     }
 
 
 def _fetch_parts_parallel(
-    api: KakaoNovelApi,
+    api: KakaoNovelApi | _GatedApi,
     parts: list[dict],
     ats_server_url: str,
     log: Callable[[str], None],
     stop_flag: Optional[Callable[[], bool]],
     auto_threads: bool,
     threads: int,
+    part_cache: Optional[PartCache] = None,
 ) -> list[dict]:
     if not parts:
         return []
@@ -161,19 +224,19 @@ def _fetch_parts_parallel(
         for idx, part in enumerate(parts, 1):
             if stop_flag and stop_flag():
                 raise RuntimeError('[CANCEL] Остановлено пользователем.')
-            result = _download_part(api, ats_server_url, idx, part)
+            result = _download_part(api, ats_server_url, idx, part, part_cache)
             results.append(result)
             log(
                 f"[OK] part {idx}/{len(parts)} "
                 f"(chapterId={result['chapter_id']}, contentId={result['content_id']}) "
-                f"chars={len(result['text'])}"
+                f"chars={len(result['text'])}" + (' (из кэша)' if result['cached'] else '')
             )
         return results
 
     results: list[dict] = []
     with ThreadPoolExecutor(max_workers=workers) as executor:
         future_map = {
-            executor.submit(_download_part, api, ats_server_url, idx, part): idx
+            executor.submit(_download_part, api, ats_server_url, idx, part, part_cache): idx
             for idx, part in enumerate(parts, 1)
         }
         for future in as_completed(future_map):
@@ -185,7 +248,7 @@ def _fetch_parts_parallel(
             log(
                 f"[OK] part {result['idx']}/{len(parts)} "
                 f"(chapterId={result['chapter_id']}, contentId={result['content_id']}) "
-                f"chars={len(result['text'])}"
+                f"chars={len(result['text'])}" + (' (из кэша)' if result['cached'] else '')
             )
 
     results.sort(key=lambda x: x['idx'])
@@ -193,7 +256,7 @@ def _fetch_parts_parallel(
 
 
 def _fetch_one_product_text(
-    api: KakaoNovelApi,
+    api: KakaoNovelApi | _GatedApi,
     series_id: int,
     product_id: int,
     series_dir: Path,
@@ -202,7 +265,9 @@ def _fetch_one_product_text(
     stop_flag: Optional[Callable[[], bool]] = None,
     auto_threads: bool = True,
     threads: int = 4,
-) -> Path:
+    part_cache: Optional[PartCache] = None,
+) -> tuple[Path, str]:
+    """Скачать текст главы: (путь итогового .txt, текст). Файл пишет вызывающий — по порядку глав."""
     if stop_flag and stop_flag():
         raise RuntimeError('[CANCEL] Остановлено пользователем.')
 
@@ -233,7 +298,7 @@ def _fetch_one_product_text(
 
     if meta_secure_url:
         try:
-            meta_url = _build_resource_url(ats_server_url, meta_secure_url)
+            meta_url = build_resource_url(ats_server_url, meta_secure_url)
             meta_payload = api.fetch_json(meta_url)
             _save_json(product_cache_dir / 'meta.json', meta_payload)
             log(f'[OK] productId={product_id}')
@@ -253,12 +318,11 @@ def _fetch_one_product_text(
         stop_flag=stop_flag,
         auto_threads=auto_threads,
         threads=threads,
+        part_cache=part_cache,
     )
 
     full_parts: list[str] = []
     for result in results:
-        json_name = f"part_{result['idx']:03d}_ch{result['chapter_id']}_ct{result['content_id']}.json"
-        _save_json(product_cache_dir / json_name, result['payload'])
         text = result['text']
         if text:
             full_parts.append(text)
@@ -269,10 +333,7 @@ def _fetch_one_product_text(
     if not final_text:
         raise RuntimeError(f'product_id={product_id}: итоговый текст пуст')
 
-    out_path = series_dir / f'{safe_title}.txt'
-    out_path.write_text(final_text, encoding='utf-8-sig')
-    log(f'[SAVE] Сохранено: {out_path}')
-    return out_path
+    return series_dir / f'{safe_title}.txt', final_text
 
 
 def list_novel_products_for_picker(
@@ -322,6 +383,8 @@ def run_novel_parser(
     on_choose_ticket_action: Optional[Callable[[dict], str]] = None,
     delete_cache_after: bool = True,
     runtime: Optional[KakaoSeriesRuntime] = None,
+    parallel_chapters: int = PARALLEL_CHAPTERS,
+    max_requests_per_s: float = MAX_REQUESTS_PER_S,
 ) -> None:
     log = on_log or (lambda s: None)
 
@@ -345,6 +408,29 @@ def run_novel_parser(
     cache_dir = ensure_dir(runtime.series_dir / 'cache' / 'novel_text')
     saved_paths: list[Path] = []
 
+    # Доступ к главам проверяется по порядку (возможны вопросы пользователю),
+    # а сами главы качаются параллельно под общим пределом запросов.
+    # Файлы пишутся строго в порядке глав, по мере готовности головы очереди;
+    # логи глав копятся отдельно и выводятся вместе с их файлом, не вперемешку.
+    gate = _RequestGate(compute_workers(auto_threads, threads), max_requests_per_s)
+    # Части глав переживают удаление cache/ серии: повторный экспорт берёт их отсюда
+    part_cache = PartCache(runtime.session_dir / PART_CACHE_DIR)
+    api = _GatedApi(runtime.api, gate)
+    chapters_at_once = max(1, int(parallel_chapters))
+    pending: deque = deque()
+
+    def _write_head() -> None:
+        future, chapter_log = pending.popleft()
+        try:
+            out_path, text = future.result()
+        finally:
+            for line in chapter_log:
+                log(line)
+        out_path.write_text(text, encoding='utf-8-sig')
+        log(f'[SAVE] Сохранено: {out_path}')
+        saved_paths.append(out_path)
+
+    executor = ThreadPoolExecutor(max_workers=chapters_at_once, thread_name_prefix='kakao-novel')
     try:
         for idx, product_id in enumerate(product_ids, 1):
             if stop_flag and stop_flag():
@@ -365,19 +451,32 @@ def run_novel_parser(
             if not access_ok:
                 continue
 
-            saved = _fetch_one_product_text(
-                api=runtime.api,
+            chapter_log: list[str] = []
+            future = executor.submit(
+                _fetch_one_product_text,
+                api=api,
                 series_id=runtime.series_id,
                 product_id=product_id,
                 series_dir=runtime.series_dir,
                 cache_dir=cache_dir,
-                log=log,
+                log=chapter_log.append,
                 stop_flag=stop_flag,
                 auto_threads=auto_threads,
                 threads=threads,
+                part_cache=part_cache,
             )
-            saved_paths.append(saved)
+            pending.append((future, chapter_log))
+            # Не убегаем вперёд больше чем на пару окон параллельности
+            while pending and (pending[0][0].done() or len(pending) >= chapters_at_once * 2):
+                _write_head()
+
+        while pending:
+            if stop_flag and stop_flag():
+                raise RuntimeError('[CANCEL] Остановлено пользователем.')
+            _write_head()
     finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        part_cache.trim(log)
         if delete_cache_after:
             try:
                 if runtime.cache_dir.exists():
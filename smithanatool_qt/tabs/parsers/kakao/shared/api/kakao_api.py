@@ -3,6 +3,7 @@ from __future__ import annotations
 import json
 import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Any, Callable, Optional
 from urllib.parse import urlencode
 
@@ -131,121 +132,166 @@ class KakaoPageApi:
 
         return data if isinstance(data, dict) else {}
 
-    def list_episodes(self, series_id: int, sort: str = 'asc', page_size: int = 100):
-        want_desc = str(sort or 'asc').lower() == 'desc'
-
-        total_count: int | None = None
-        seen_product_ids: set[int] = set()
-        ordered_edges: list[dict] = []
-
-        def fetch(cursor_index: int, cursor_direction: str):
-            data = self.request_json(
-                'GET',
-                CONTENT_PRODUCT_LIST_URL,
-                params={
-                    'series_id': int(series_id),
-                    'cursor_index': int(cursor_index),
-                    'cursor_direction': cursor_direction,
-                    'window_size': int(page_size),
-                },
-                timeout=15,
-            )
-            result = self._unwrap_rest_result(data, op='content/product/list')
-            rows = result.get('list') or []
-            if not isinstance(rows, list):
-                rows = []
+    def _fetch_product_page(self, series_id: int, cursor_index: int, page_size: int):
+        data = self.request_json(
+            'GET',
+            CONTENT_PRODUCT_LIST_URL,
+            params={
+                'series_id': int(series_id),
+                'cursor_index': int(cursor_index),
+                'cursor_direction': 'NEXT',
+                'window_size': int(page_size),
+            },
+            timeout=15,
+        )
+        result = self._unwrap_rest_result(data, op='content/product/list')
+        rows = result.get('list') or []
+        if not isinstance(rows, list):
+            rows = []
 
-            total_raw = result.get('total_count')
-            try:
-                total = int(total_raw)
-            except Exception:
-                total = None
+        total_raw = result.get('total_count')
+        try:
+            total = int(total_raw)
+        except Exception:
+            total = None
 
-            return result, rows, total
+        return result, rows, total
 
-        def make_edge(row: dict) -> tuple[int | None, dict | None]:
-            if not isinstance(row, dict):
-                return None, None
+    @staticmethod
+    def _product_edge(row: dict) -> tuple[int | None, dict | None]:
+        if not isinstance(row, dict):
+            return None, None
 
-            item = row.get('item') or {}
-            if not isinstance(item, dict):
-                return None, None
+        item = row.get('item') or {}
+        if not isinstance(item, dict):
+            return None, None
 
-            product_id = item.get('product_id')
-            try:
-                product_id_int = int(product_id)
-            except Exception:
-                return None, None
-
-            operator_property = item.get('operator_property') or {}
-            service_property = item.get('service_property') or {}
-            last_view = service_property.get('last_view') or {}
-
-            edge = {
-                # здесь лучше хранить просто стабильный порядковый номер,
-                # а не cursor_index из ответа
-                'cursor': None,
-                'node': {
-                    'row1': item.get('title') or '',
-                    'scheme': None,
-                    'single': {
-                        'productId': product_id_int,
-                        'isFree': bool(item.get('is_free')),
-                        'title': item.get('title') or '',
-                        'slideType': item.get('slide_type'),
-                        'operatorProperty': {
-                            'isTextViewer': bool(operator_property.get('is_text_viewer', False))
-                        },
+        product_id = item.get('product_id')
+        try:
+            product_id_int = int(product_id)
+        except Exception:
+            return None, None
+
+        operator_property = item.get('operator_property') or {}
+        service_property = item.get('service_property') or {}
+        last_view = service_property.get('last_view') or {}
+
+        edge = {
+            # здесь лучше хранить просто стабильный порядковый номер,
+            # а не cursor_index из ответа
+            'cursor': None,
+            'node': {
+                'row1': item.get('title') or '',
+                'scheme': None,
+                'single': {
+                    'productId': product_id_int,
+                    'isFree': bool(item.get('is_free')),
+                    'title': item.get('title') or '',
+                    'slideType': item.get('slide_type'),
+                    'operatorProperty': {
+                        'isTextViewer': bool(operator_property.get('is_text_viewer', False))
                     },
-                    'isViewed': bool(last_view),
                 },
-            }
-            return product_id_int, edge
+                'isViewed': bool(last_view),
+            },
+        }
+        return product_id_int, edge
 
-        # Для полного списка не используем ANCHOR.
-        # Идём последовательно от 0 через NEXT.
-        cursor_index = 0
-        safety = 0
+    def list_episodes(
+        self,
+        series_id: int,
+        sort: str = 'asc',
+        page_size: int = 100,
+        *,
+        start_index: int = 0,
+        parallel: int = 4,
+    ):
+        """Эпизоды серии от `start_index` (в порядке возрастания) до конца.
 
-        while True:
-            result, rows, total = fetch(cursor_index, 'NEXT')
-            if total_count is None:
-                total_count = total
+        Первая страница даёт total_count; остальные, если он известен,
+        запрашиваются параллельно. При «дыре» в ответах догружаем по NEXT.
+        """
+        want_desc = str(sort or 'asc').lower() == 'desc'
+        start_index = max(0, int(start_index))
 
+        seen_product_ids: set[int] = set()
+        ordered_edges: list[dict] = []
+
+        def add_rows(rows: list) -> int:
             added = 0
             for row in rows:
-                pid, edge = make_edge(row)
+                pid, edge = self._product_edge(row)
                 if pid is None or edge is None:
                     continue
                 if pid in seen_product_ids:
                     continue
 
                 seen_product_ids.add(pid)
-                edge['cursor'] = str(len(ordered_edges) + 1)
+                edge['cursor'] = str(start_index + len(ordered_edges) + 1)
                 ordered_edges.append(edge)
                 added += 1
+            return added
 
+        def log_page(cursor_index: int, rows: list, added: int, result: dict, mode: str):
             self.log(
-                f"[EP-LIST] dir=NEXT cursor={cursor_index} "
+                f"[EP-LIST] dir=NEXT{mode} cursor={cursor_index} "
                 f"got={len(rows)} added={added} "
                 f"has_next={bool(result.get('has_next'))} "
                 f"total_count={total_count} collected={len(ordered_edges)}"
             )
 
-            if not rows:
-                break
+        # Для полного списка не используем ANCHOR: идём от start_index через NEXT
+        cursor_index = start_index
+        result, rows, total_count = self._fetch_product_page(series_id, cursor_index, page_size)
+        log_page(cursor_index, rows, add_rows(rows), result, '')
+        has_next = bool(rows) and bool(result.get('has_next'))
+        next_cursor = cursor_index + len(rows)
+
+        # Общее число известно — остальные страницы параллельно, затем склеиваем по порядку
+        stride = len(rows)
+        if has_next and total_count is not None and stride > 0 and int(parallel) > 1:
+            cursors = list(range(next_cursor, int(total_count), stride))
+            pages: dict[int, tuple[dict, list]] = {}
+            with ThreadPoolExecutor(max_workers=min(int(parallel), max(1, len(cursors)))) as executor:
+                futures = {
+                    executor.submit(self._fetch_product_page, series_id, cursor, page_size): cursor
+                    for cursor in cursors
+                }
+                for future in as_completed(futures):
+                    try:
+                        page_result, page_rows, _ = future.result()
+                    except Exception:
+                        continue
+                    pages[futures[future]] = (page_result, page_rows)
+
+            for cursor in cursors:
+                if cursor != next_cursor or cursor not in pages:
+                    break
+                page_result, page_rows = pages[cursor]
+                log_page(cursor, page_rows, add_rows(page_rows), page_result, ' parallel')
+                has_next = bool(page_rows) and bool(page_result.get('has_next'))
+                next_cursor = cursor + len(page_rows)
+                if not has_next:
+                    break
 
-            if total_count is not None and len(ordered_edges) >= total_count:
+        safety = 0
+        while has_next:
+            if total_count is not None and start_index + len(ordered_edges) >= total_count:
                 break
 
-            if not bool(result.get('has_next')):
+            cursor_index = next_cursor
+            result, rows, total = self._fetch_product_page(series_id, cursor_index, page_size)
+            if total_count is None:
+                total_count = total
+            log_page(cursor_index, rows, add_rows(rows), result, '')
+
+            if not rows or not bool(result.get('has_next')):
                 break
 
             next_cursor = cursor_index + len(rows)
             if next_cursor <= cursor_index:
                 break
 
-            cursor_index = next_cursor
             safety += 1
             if safety > 1000:
                 break
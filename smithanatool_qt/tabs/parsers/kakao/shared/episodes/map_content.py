@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import json
 import re
+import time
 from pathlib import Path
 from typing import Callable, Iterable, Optional
 
@@ -85,8 +86,13 @@ def _canonicalize_episode_rows(rows: Iterable[dict]) -> list[dict]:
     return out
 
 
+# Сколько секунд карта эпизодов считается свежей и берётся из кэша без запросов
+EPISODE_MAP_TTL_S = 10 * 60
+
+
 def safe_list_all(series_id: int, sort: str, cookie_raw: Optional[str], log: Optional[Callable[[str], None]],
-                  stop_flag: Optional[Callable[[], bool]] = None, retries: int = 2) -> list[dict]:
+                  stop_flag: Optional[Callable[[], bool]] = None, retries: int = 2,
+                  start_index: int = 0) -> list[dict]:
     last_err = None
     for i in range(retries + 1):
         if stop_flag and stop_flag():
@@ -95,7 +101,7 @@ def safe_list_all(series_id: int, sort: str, cookie_raw: Optional[str], log: Opt
             client = KakaoPageApi(cookie_raw=cookie_raw, log=log)
             rows = [
                 normalized
-                for edge in client.list_episodes(series_id=int(series_id), sort=sort)
+                for edge in client.list_episodes(series_id=int(series_id), sort=sort, start_index=start_index)
                 for normalized in [normalize_episode_row(edge)]
                 if normalized is not None
             ]
@@ -115,16 +121,25 @@ def episode_map_path(out_dir: str | Path, series_id: int) -> Path:
     return cache_dir / "episode_map.json"
 
 
+def _read_episode_cache(path: Path) -> tuple[Optional[list], dict]:
+    """(строки, метаданные) из episode_map.json; старый формат — просто список строк."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        data = json.loads(path.read_text(encoding="utf-8-sig"))
+    if isinstance(data, list):
+        return data, {}
+    if isinstance(data, dict) and isinstance(data.get("rows"), list):
+        return data["rows"], data
+    return None, {}
+
+
 def load_episode_map(out_dir: str | Path, series_id: int, log: Optional[Callable[[str], None]] = None) -> list[dict]:
     path = episode_map_path(out_dir, series_id)
     if not path.exists():
         return []
 
-    try:
-        rows = json.loads(path.read_text(encoding="utf-8"))
-    except Exception:
-        rows = json.loads(path.read_text(encoding="utf-8-sig"))
-
+    rows, _meta = _read_episode_cache(path)
     if isinstance(rows, list):
         rows = _canonicalize_episode_rows(rows)
         if log:
@@ -137,31 +152,103 @@ def load_episode_map(out_dir: str | Path, series_id: int, log: Optional[Callable
 
 
 def save_episode_map(out_dir: str | Path, series_id: int, rows: Iterable[dict],
-                     log: Optional[Callable[[str], None]] = None) -> Path:
+                     log: Optional[Callable[[str], None]] = None, sort: str = "asc") -> Path:
     path = episode_map_path(out_dir, series_id)
-    data = _canonicalize_episode_rows(rows)
+    data = {
+        "version": 2,
+        "saved_at": time.time(),
+        "sort": "desc" if str(sort or "asc").lower() == "desc" else "asc",
+        "rows": _canonicalize_episode_rows(rows),
+    }
     path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
     if log:
         log(f"[CACHE] Сохранена карта эпизодов: {path}")
     return path
 
 
+def _in_order(rows: list[dict], have: str, want: str) -> list[dict]:
+    return list(reversed(rows)) if (have == "desc") != (want == "desc") else list(rows)
+
+
+def _fresh_cached_rows(path: Path, sort: str, ttl_s: float) -> Optional[list[dict]]:
+    if ttl_s <= 0 or not path.exists():
+        return None
+    try:
+        rows, meta = _read_episode_cache(path)
+    except Exception:
+        return None
+    saved_at = meta.get("saved_at")
+    if not rows or not isinstance(saved_at, (int, float)) or time.time() - saved_at > ttl_s:
+        return None
+    return _in_order(_canonicalize_episode_rows(rows), str(meta.get("sort") or "asc"), sort)
+
+
+def _list_incremental(series_id: int, path: Path, cookie_raw: Optional[str],
+                      log: Optional[Callable[[str], None]],
+                      stop_flag: Optional[Callable[[], bool]]) -> Optional[list[dict]]:
+    """Дописать к кэшу только новые эпизоды (по возрастанию), без полного обхода.
+
+    Новые эпизоды добавляются в конец списка: запрашиваем страницы начиная с
+    последнего известного эпизода; если он не на своём месте (удаления,
+    перестановки) — None, нужен полный список.
+    """
+    try:
+        rows, meta = _read_episode_cache(path)
+    except Exception:
+        return None
+    if not rows or not meta:
+        return None
+    known = _in_order(_canonicalize_episode_rows(rows), str(meta.get("sort") or "asc"), "asc")
+    if not known:
+        return None
+
+    anchor = len(known) - 1
+    tail = safe_list_all(series_id, sort="asc", cookie_raw=cookie_raw, log=log,
+                         stop_flag=stop_flag, retries=0, start_index=anchor)
+    if not tail or tail[0]["productId"] != known[-1]["productId"]:
+        return None
+
+    known_ids = {row["productId"] for row in known}
+    fresh = [row for row in tail[1:] if row["productId"] not in known_ids]
+    if log:
+        log(f"[CACHE] Карта эпизодов дополнена: новых {len(fresh)}, всего {len(known) + len(fresh)}")
+    # Свежие флаги (isFree/isViewed) для якоря берём из ответа
+    return known[:-1] + tail[:1] + fresh
+
+
 def refresh_episode_map(series_id: int, out_dir: str | Path, cookie_raw: Optional[str],
                         log: Optional[Callable[[str], None]] = None,
                         stop_flag: Optional[Callable[[], bool]] = None,
                         sort: str = "asc",
                         retries: int = 2,
-                        fallback_to_cache: bool = True) -> list[dict]:
-    rows = safe_list_all(
-        series_id=int(series_id),
-        sort=sort,
-        cookie_raw=cookie_raw,
-        log=log,
-        stop_flag=stop_flag,
-        retries=retries,
-    )
+                        fallback_to_cache: bool = True,
+                        ttl_s: float = EPISODE_MAP_TTL_S) -> list[dict]:
+    """Карта эпизодов: свежий кэш как есть, устаревший — дополняется, иначе полный список."""
+    path = episode_map_path(out_dir, series_id)
+    cached = _fresh_cached_rows(path, sort, ttl_s)
+    if cached:
+        if log:
+            log(f"[CACHE] Карта эпизодов свежая ({len(cached)} шт.), запрос списка пропущен.")
+        return cached
+
+    rows = None
+    if path.exists():
+        asc = _list_incremental(int(series_id), path, cookie_raw, log, stop_flag)
+        if asc:
+            rows = _in_order(asc, "asc", sort)
+            for idx, row in enumerate(rows, 1):
+                row["cursor"] = str(idx)
+    if not rows:
+        rows = safe_list_all(
+            series_id=int(series_id),
+            sort=sort,
+            cookie_raw=cookie_raw,
+            log=log,
+            stop_flag=stop_flag,
+            retries=retries,
+        )
     if rows:
-        save_episode_map(out_dir, series_id, rows, log=log)
+        save_episode_map(out_dir, series_id, rows, log=log, sort=sort)
         return rows
 
     if fallback_to_cache:
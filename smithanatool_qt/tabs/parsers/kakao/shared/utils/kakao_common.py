@@ -96,3 +96,21 @@ def parse_json_response(resp: requests.Response) -> dict:
         return repair_mojibake_obj(data)
     except Exception as e:
         raise RuntimeError(f'Не удалось разобрать JSON-ответ: {e}; last_decode_error={last_error}')
+
+
+def build_resource_url(base_url: str, secure_url: str) -> str:
+    """Полный URL ресурса вьюера: secureUrl относительно atsServerUrl."""
+    secure_url = str(secure_url or '').strip()
+    base_url = str(base_url or '').strip()
+    if not secure_url:
+        raise RuntimeError('Пустой secureUrl')
+
+    if secure_url.startswith('http://') or secure_url.startswith('https://'):
+        return secure_url
+    if not base_url:
+        raise RuntimeError('Пустой atsServerUrl')
+    if base_url.endswith('=') or '?kid=' in base_url:
+        return f'{base_url}{secure_url}'
+    if base_url.endswith('/'):
+        return f"{base_url}{secure_url.lstrip('/')}"
+    return f"{base_url}/{secure_url.lstrip('/')}"
@@ -7,6 +7,8 @@ from typing import Optional, Tuple
 from PySide6.QtCore import Qt, QPoint, QRect
 from PySide6.QtGui import QImage
 
+from ..history import crop_rect
+
 
 @dataclass
 class _FrameDrag:
@@ -330,7 +332,7 @@ class FrameMixin:
     def _frame_apply_crop(self) -> None:
         if not (getattr(self, "_current_path", None) and self._current_path in getattr(self, "_images", {})):
             return
-        if not self._frame_has_rect():
+        if not self._frame_has_rect() or self._is_current_readonly():
             return
 
         img: QImage = self._images[self._current_path]
@@ -346,17 +348,11 @@ class FrameMixin:
             return
 
         try:
-            self._push_undo()
+            self._push_undo(self._history.cropped(img, QRect(x, y, w, h)))
         except Exception:
             pass
 
-        out = img.copy(x, y, w, h)
-        try:
-            from ..utils import force_dpi72
-
-            force_dpi72(out)
-        except Exception:
-            pass
+        out = crop_rect(img, QRect(x, y, w, h))
 
         self._images[self._current_path] = out
         try:
@@ -4,10 +4,11 @@ import math
 from typing import Optional, Tuple, List
 
 from PySide6.QtCore import Qt, QPoint
-from PySide6.QtGui import QImage, QPainter
+from PySide6.QtGui import QImage
 from PySide6.QtWidgets import QApplication
 
 from ..utils import force_dpi72
+from ..history import remove_rows, insert_rows
 
 
 class SelectionMixin:
@@ -220,7 +221,7 @@ class SelectionMixin:
         self._update_actions_enabled()
 
     def _cut_selection(self) -> None:
-        if not self._has_selection():
+        if not self._has_selection() or self._is_current_readonly():
             return
         img = self._images[self._current_path]
         h, w = img.height(), img.width()
@@ -235,21 +236,9 @@ class SelectionMixin:
         frag = img.copy(0, y1, w, cut_h)
         self._clip.append(frag)
 
-        self._push_undo()
-        new_img = QImage(
-            w,
-            h - cut_h,
-            img.format() if img.format() != QImage.Format_Indexed8 else QImage.Format_RGB32,
-        )
-        force_dpi72(new_img)
-        new_img.fill(Qt.transparent if new_img.hasAlphaChannel() else Qt.white)
-
-        p = QPainter(new_img)
-        if y1 > 0:
-            p.drawImage(0, 0, img, 0, 0, w, y1)
-        if y2 < h:
-            p.drawImage(0, y1, img, 0, y2, w, h - y2)
-        p.end()
+        # В историю уходит только вырезанная полоса (общий буфер с буфером обмена)
+        self._push_undo(self._history.rows_removed(y1, frag, whole=cut_h >= h))
+        new_img = remove_rows(img, y1, cut_h)
 
         self._images[self._current_path] = new_img
         self._recalc_dirty_vs_disk()
@@ -260,7 +249,7 @@ class SelectionMixin:
     def _paste_fragment(self, at_top: bool) -> None:
         if not (self._current_path and self._current_path in self._images):
             return
-        if not self._clip:
+        if not self._clip or self._is_current_readonly():
             return
 
         base = self._images[self._current_path]
@@ -274,27 +263,11 @@ class SelectionMixin:
             )
             force_dpi72(frag)
 
-        self._push_undo()
-        w = base.width()
-        new_h = base.height() + frag.height()
-        new_img = QImage(
-            w,
-            new_h,
-            base.format() if base.format() != QImage.Format_Indexed8 else QImage.Format_RGB32,
-        )
-        force_dpi72(new_img)
-        new_img.fill(Qt.transparent if new_img.hasAlphaChannel() else Qt.white)
-
-        p = QPainter(new_img)
-        if at_top:
-            p.drawImage(0, 0, frag)
-            p.drawImage(0, frag.height(), base)
-        else:
-            p.drawImage(0, 0, base)
-            p.drawImage(0, base.height(), frag)
-        p.end()
+        y = 0 if at_top else base.height()
+        self._push_undo(self._history.rows_inserted(y, frag))
+        new_img = insert_rows(base, y, frag)
 
         self._images[self._current_path] = new_img
-        self._set_dirty(self._current_path, True)
+        self._recalc_dirty_vs_disk()
         self._update_preview_pixmap()
         self._update_actions_enabled()
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Optional, List
 
 from PySide6.QtCore import QPoint
 from PySide6.QtGui import QImage
 
+from ..slicing import SliceJob, bounds_by_count, bounds_by_height, resolve_bounds, slice_files
+from ..virtual_strip import VIRTUAL_STRIP_PATH
+
 
 class SliceMixin:
     """Slice mode (multi-fragment) behavior.
@@ -86,42 +88,39 @@ class SliceMixin:
         if not self._slice_enabled or not self._slice_bounds or len(self._slice_bounds) < 2:
             return 0
 
-        img: QImage = self._images[self._current_path]
-        h, w = img.height(), img.width()
-        bounds = list(self._slice_bounds)
-        if bounds[0] != 0:
-            bounds[0] = 0
-        if bounds[-1] != h:
-            bounds[-1] = h
+        strip = getattr(self, "_strip", None)
+        if strip is not None and self._current_path == VIRTUAL_STRIP_PATH:
+            return self._save_strip_slices(strip, out_dir)
 
         if auto_threads:
             cpu = os.cpu_count() or 4
             threads = max(2, min(8, cpu))
 
-        def _save_one(i: int, y1: int, y2: int) -> bool:
-            cut_h = max(1, y2 - y1)
-            frag = img.copy(0, y1, w, cut_h)
-            base = os.path.splitext(os.path.basename(self._current_path))[0]
-            dst = os.path.join(out_dir, f"{base}_{str(i + 1).zfill(2)}.png")
-            return bool(frag.save(dst))
-
-        tasks = []
-        with ThreadPoolExecutor(max_workers=int(threads)) as ex:
-            for i in range(len(bounds) - 1):
-                y1, y2 = bounds[i], bounds[i + 1]
-                if y2 <= y1:
-                    continue
-                tasks.append(ex.submit(_save_one, i, int(y1), int(y2)))
-
-            done_ok = 0
-            for fut in as_completed(tasks):
-                try:
-                    if fut.result():
-                        done_ok += 1
-                except Exception:
-                    pass
-
-        return done_ok
+        self._store_slice_state(self._current_path)
+        job = SliceJob(self._current_path, self.get_slice_state(), self._images[self._current_path])
+        return slice_files([job], out_dir, workers=int(threads)).saved
+
+    def _save_strip_slices(self, strip, out_dir: str) -> int:
+        """Лента: план нарезки (куски исходных файлов) уходит в движок склейки, холст не собирается."""
+        from smithanatool_qt.tabs.transform.sections.stitch.service import suggest_base_name
+        from smithanatool_qt.tabs.transform.sections.stitch.smartstitch_engine import save_slices_from_plan
+
+        plan = strip.slice_plan(resolve_bounds(self.get_slice_state(), strip.height()))
+        return save_slices_from_plan(plan, strip.width(), out_dir, base_name=suggest_base_name(strip.paths()))
+
+    def slice_jobs(self, paths: List[str]) -> List[SliceJob]:
+        """Jobs for the headless batch engine: stored slice state + already open image, if any.
+
+        Files without slicing enabled are left out (they would be skipped anyway).
+        """
+        self._store_slice_state(getattr(self, "_current_path", None))
+        jobs: List[SliceJob] = []
+        for p in paths:
+            st = self._slice_state.get(p)
+            if not st or not bool(st.get("enabled")):
+                continue
+            jobs.append(SliceJob(p, dict(st), self._images.peek(p)))
+        return jobs
 
     # ---- per-path state ----
     def _sync_slice_count_and_emit(self) -> None:
@@ -211,15 +210,8 @@ class SliceMixin:
         H = img.height()
 
         if getattr(self, "_slice_by", "count") == "height":
-            step = max(1, int(getattr(self, "_slice_height_px", 2000)))
-            bounds = [0]
-            y = 0
-            while y + step < H:
-                y += step
-                bounds.append(y)
-            bounds.append(H)
-            self._slice_bounds = bounds
-            self._slice_count = max(2, len(bounds) - 1)
+            self._slice_bounds = bounds_by_height(H, int(getattr(self, "_slice_height_px", 2000)))
+            self._slice_count = max(2, len(self._slice_bounds) - 1)
             self._sync_slice_count_and_emit()
             return
 
@@ -231,25 +223,7 @@ class SliceMixin:
             return
 
         img: QImage = self._images[self._current_path]
-        H = img.height()
-        n = max(2, int(self._slice_count))
-        step = H / n
-
-        ys = [0]
-        acc = 0.0
-        for _ in range(1, n):
-            acc += step
-            ys.append(int(round(acc)))
-        ys.append(H)
-
-        ys2 = [ys[0]]
-        for y in ys[1:]:
-            if y <= ys2[-1]:
-                y = ys2[-1] + 1
-            ys2.append(min(y, H))
-        ys2[-1] = H
-
-        self._slice_bounds = ys2
+        self._slice_bounds = bounds_by_count(img.height(), int(self._slice_count))
         self._sync_slice_count_and_emit()
 
     def _slice_bounds_on_label(self) -> List[int]:
@@ -3,20 +3,26 @@ from __future__ import annotations
 import math
 from pathlib import Path
 
-import numpy as np
-
 from PySide6.QtCore import Qt, QSize, QPoint, QTimer
-from PySide6.QtGui import QImage, QPixmap
 from PySide6.QtWidgets import QSizePolicy, QStyle, QToolButton
 
+from ..tiles import levels_lut
+
 
 class UndoMixin:
-    def _push_undo(self) -> None:
+    def _push_undo(self, entry=None) -> None:
+        """Записать правку текущего файла в историю.
+
+        entry — дельта из self._history (rows_removed / rows_inserted / cropped);
+        без неё сохраняется полный снимок (запасной путь для прочих правок).
+        """
         if not (self._current_path and self._current_path in self._images):
             return
-        st = self._undo.setdefault(self._current_path, [])
-        self._redo[self._current_path] = []
-        st.append(self._images[self._current_path].copy())
+        if entry is None:
+            entry = self._history.snapshot(self._images[self._current_path])
+        rev_before = self._revision(self._current_path)
+        rev_after = self._bump_revision(self._current_path)
+        self._history.push(self._current_path, entry, rev_before, rev_after)
 
     def _snap_selection_to_edges(self, h: int, y1: int, y2: int) -> tuple[int, int]:
         y1 = max(0, min(h, y1))
@@ -32,14 +38,12 @@ class UndoMixin:
     def _undo_last(self) -> None:
         if not (self._current_path and self._current_path in self._images):
             return
-        st = self._undo.get(self._current_path, [])
-        if not st:
+        res = self._history.undo(self._current_path, self._images[self._current_path])
+        if res is None:
             return
-        cur = self._images[self._current_path].copy()
-        rd = self._redo.setdefault(self._current_path, [])
-        rd.append(cur)
-        prev = st.pop()
+        prev, rev = res
         self._images[self._current_path] = prev
+        self._set_revision(self._current_path, rev)
         self._recalc_dirty_vs_disk()
         self._update_preview_pixmap()
         self._update_actions_enabled()
@@ -47,13 +51,12 @@ class UndoMixin:
     def _redo_last(self) -> None:
         if not (self._current_path and self._current_path in self._images):
             return
-        rd = self._redo.get(self._current_path, [])
-        if not rd:
+        res = self._history.redo(self._current_path, self._images[self._current_path])
+        if res is None:
             return
-        st = self._undo.setdefault(self._current_path, [])
-        st.append(self._images[self._current_path].copy())
-        nxt = rd.pop()
+        nxt, rev = res
         self._images[self._current_path] = nxt
+        self._set_revision(self._current_path, rev)
         self._recalc_dirty_vs_disk()
         self._update_preview_pixmap()
         self._update_actions_enabled()
@@ -72,13 +75,14 @@ class UndoMixin:
     def _update_actions_enabled(self) -> None:
         has_img = self._current_path in self._images if self._current_path else False
         is_psd = self._is_current_psd()
+        editable = has_img and not self._is_current_readonly()
 
-        cut_ok = has_img and self._has_selection()
-        paste_ok = has_img and bool(self._clip)
-        undo_ok = has_img and bool(self._undo.get(self._current_path, []))
-        redo_ok = has_img and bool(self._redo.get(self._current_path, []))
-        save_ok = has_img and not is_psd
-        frame_ok = has_img
+        cut_ok = editable and self._has_selection()
+        paste_ok = editable and bool(self._clip)
+        undo_ok = editable and self._history.can_undo(self._current_path)
+        redo_ok = editable and self._history.can_redo(self._current_path)
+        save_ok = editable and not is_psd
+        frame_ok = editable
 
         for n in ("action_btn_cut", "btn_cut"):
             self._set_enabled(n, cut_ok)
@@ -416,41 +420,33 @@ class ZoomMixin:
             overlay.raise_()
             self._schedule_overlay_controls_position()
 
-    def _apply_levels_to_qimage(self, qimg: QImage) -> QImage:
+    def _levels_lut(self):
         if not self._levels_enabled:
-            return qimg
-
+            return None
         b = int(self._levels_black)
         w = int(self._levels_white)
-        g = float(self._levels_gamma)
         if w <= b:
-            return qimg
-
-        img = qimg if qimg.format() == QImage.Format_RGBA8888 else qimg.convertToFormat(QImage.Format_RGBA8888)
-
-        w_img = img.width()
-        h_img = img.height()
-        bpl = img.bytesPerLine()
-
-        ptr = img.bits()
-        # Важно: для части источников (например PSD -> PIL -> QImage)
-        # буфер QImage может быть read-only. Берём writable copy.
-        buf = np.frombuffer(ptr, dtype=np.uint8).copy()
-
-        buf = buf[: h_img * bpl].reshape(h_img, bpl)
-        arr = buf[:, : w_img * 4].reshape(h_img, w_img, 4)
-
-        rng = max(1, w - b)
-        x = np.arange(256, dtype=np.float32)
-        u = (x - b) / float(rng)
-        u = np.clip(u, 0.0, 1.0)
-        y = np.power(u, g) * 255.0
-        lut = np.clip(y + 0.5, 0, 255).astype(np.uint8)
-
-        arr[..., :3] = lut[arr[..., :3]]
-
-        out = QImage(arr.tobytes(), w_img, h_img, w_img * 4, QImage.Format_RGBA8888)
-        return out.copy()
+            return None
+        return levels_lut(b, float(self._levels_gamma), w)
+
+    # ---- levels interaction: coarse tiles while the slider moves, exact ones after a pause
+    def _mark_levels_interacting(self) -> None:
+        self._levels_interacting = True
+        t = getattr(self, "_levels_interact_timer", None)
+        if t is None:
+            t = QTimer(self)
+            t.setSingleShot(True)
+            t.timeout.connect(self._end_levels_interacting)
+            self._levels_interact_timer = t
+        t.start(180)
+
+    def _end_levels_interacting(self) -> None:
+        self._levels_interacting = False
+        try:
+            self._tiles.set_level_bias(0)
+            self.label.update()
+        except Exception:
+            pass
 
     def _update_preview_pixmap(self, anchor: QPoint | None = None, old_zoom: float | None = None) -> None:
         if not (self._current_path and self._current_path in self._images):
@@ -459,34 +455,25 @@ class ZoomMixin:
 
         img = self._images[self._current_path]
 
-        # Build / reuse a view-image (with optional levels) ONCE per source-image + levels params.
-        # Do NOT rescale the whole bitmap into a giant QPixmap on every zoom step.
+        # The canvas paints the image through the tile cache: no full-size QPixmap is ever created.
+        # Levels are a display-only LUT applied to the visible tiles, never to the whole image.
         try:
             img_key = int(img.cacheKey()) if hasattr(img, "cacheKey") else id(img)
         except Exception:
             img_key = id(img)
 
+        view_key = (self._current_path, img_key)
+        if getattr(self, "_view_img_key", None) != view_key:
+            self._view_img_key = view_key
+            self._view_img = img
+            self._tiles.set_source(img, view_key)
+
         lv_on = bool(getattr(self, "_levels_enabled", False))
         lv_b = int(getattr(self, "_levels_black", 0))
         lv_w = int(getattr(self, "_levels_white", 255))
         lv_g = float(getattr(self, "_levels_gamma", 1.0))
-        view_key = (self._current_path, img_key, lv_on, lv_b, round(lv_g, 6), lv_w)
-        if getattr(self, "_view_img_key", None) != view_key:
-            self._view_img_key = view_key
-            self._view_img = self._apply_levels_to_qimage(img)
-            # Prefer a QPixmap for painting on widgets (often faster and more reliable than drawing QImage directly).
-            try:
-                self._view_pm = QPixmap.fromImage(self._view_img)
-            except Exception:
-                self._view_pm = None
-
-        # Used by PanZoomLabel to paint only the visible area.
-        self._view_img = getattr(self, "_view_img", img)
-        if getattr(self, "_view_pm", None) is None:
-            try:
-                self._view_pm = QPixmap.fromImage(self._view_img)
-            except Exception:
-                self._view_pm = None
+        self._tiles.set_lut(self._levels_lut(), (lv_on, lv_b, round(lv_g, 6), lv_w) if lv_on else None)
+        self._tiles.set_level_bias(1 if getattr(self, "_levels_interacting", False) else 0)
 
         if self._fit_to_window:
             avail = self.scroll.viewport().size() - QSize(2, 2)
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import itertools
+from typing import List, Optional, Tuple, Union
+
+from PySide6.QtCore import Qt, QRect, QSize
+from PySide6.QtGui import QImage, QPainter
+
+from .utils import force_dpi72
+
+# (source, sx, sy, h): строки [sy, sy+h) источника, столбцы [sx, sx+width)
+Piece = Tuple[QImage, int, int, int]
+
+_keys = itertools.count(1)
+
+
+class RowDocument:
+    """Изображение как таблица кусков: упорядоченный список ссылок на диапазоны строк.
+
+    Источники — неизменяемые QImage, поэтому вырезка, вставка и кадрирование
+    правят только список кусков (O(кусков)), а пиксели собираются лишь для
+    запрошенной области (`copy`) или целиком при сохранении (`to_qimage`).
+
+    Повторяет ту часть API QImage, которой пользуется превью:
+    width/height/size/isNull/format/copy/save/cacheKey.
+    """
+
+    __slots__ = ("_pieces", "_w", "_h", "_key")
+
+    def __init__(self, pieces: List[Piece], width: int):
+        self._pieces: Tuple[Piece, ...] = tuple(self._merge(pieces))
+        self._w = max(0, int(width))
+        self._h = sum(p[3] for p in self._pieces)
+        self._key = next(_keys)
+
+    @classmethod
+    def from_image(cls, img: QImage) -> "RowDocument":
+        return cls([(img, 0, 0, int(img.height()))], int(img.width()))
+
+    @staticmethod
+    def _merge(pieces: List[Piece]) -> List[Piece]:
+        out: List[Piece] = []
+        for src, sx, sy, h in pieces:
+            if h <= 0:
+                continue
+            if out:
+                psrc, psx, psy, ph = out[-1]
+                if psrc is src and psx == sx and psy + ph == sy:
+                    out[-1] = (psrc, psx, psy, ph + h)
+                    continue
+            out.append((src, int(sx), int(sy), int(h)))
+        return out
+
+    # ---- QImage-like API ----
+    def width(self) -> int:
+        return self._w
+
+    def height(self) -> int:
+        return self._h
+
+    def size(self) -> QSize:
+        return QSize(self._w, self._h)
+
+    def isNull(self) -> bool:
+        return self._w <= 0 or self._h <= 0
+
+    def format(self):
+        fmt = self._pieces[0][0].format() if self._pieces else QImage.Format_ARGB32
+        return QImage.Format_RGB32 if fmt == QImage.Format_Indexed8 else fmt
+
+    def hasAlphaChannel(self) -> bool:
+        return any(p[0].hasAlphaChannel() for p in self._pieces)
+
+    def cacheKey(self) -> int:
+        return self._key
+
+    def sizeInBytes(self) -> int:
+        """Память источников, на которые ссылается документ (каждый считается один раз)."""
+        seen = {}
+        for src, *_ in self._pieces:
+            seen[id(src)] = int(src.sizeInBytes())
+        return sum(seen.values())
+
+    def piece_count(self) -> int:
+        return len(self._pieces)
+
+    def copy(self, *args) -> QImage:
+        """Собрать пиксели прямоугольника (как QImage.copy); без аргументов — всё изображение."""
+        if not args:
+            x, y, w, h = 0, 0, self._w, self._h
+        elif len(args) == 1:
+            r: QRect = args[0]
+            x, y, w, h = r.x(), r.y(), r.width(), r.height()
+        else:
+            x, y, w, h = (int(a) for a in args)
+
+        r = QRect(x, y, w, h).intersected(QRect(0, 0, self._w, self._h))
+
+        # Один кусок покрывает весь запрос — обычный случай для тайлов
+        if r == QRect(x, y, w, h):
+            top = 0
+            for src, sx, sy, ph in self._pieces:
+                if top <= y and y + h <= top + ph:
+                    out = src.copy(sx + x, sy + (y - top), w, h)
+                    force_dpi72(out)
+                    return out
+                if top >= y + h:
+                    break
+                top += ph
+
+        out = QImage(max(1, w), max(1, h), self.format())
+        force_dpi72(out)
+        out.fill(Qt.transparent if out.hasAlphaChannel() else Qt.white)
+        if r.isEmpty():
+            return out
+
+        p = QPainter(out)
+        p.setCompositionMode(QPainter.CompositionMode_Source)
+        top = 0
+        for src, sx, sy, ph in self._pieces:
+            a = max(top, r.y())
+            b = min(top + ph, r.y() + r.height())
+            if a < b:
+                p.drawImage(r.x() - x, a - y, src, sx + r.x(), sy + (a - top), r.width(), b - a)
+            top += ph
+            if top >= r.y() + r.height():
+                break
+        p.end()
+        return out
+
+    def to_qimage(self) -> QImage:
+        """Плоское изображение (сохранение/экспорт). Нетронутый источник отдаётся без копии."""
+        if len(self._pieces) == 1:
+            src, sx, sy, h = self._pieces[0]
+            if sx == 0 and sy == 0 and src.width() == self._w and src.height() == h:
+                return src
+        return self.copy()
+
+    def save(self, *args, **kwargs) -> bool:
+        return self.to_qimage().save(*args, **kwargs)
+
+    def row_buffers(self) -> Optional[List[memoryview]]:
+        """Сырые байты строк по кускам — если склейка их совпадает с буфером плоского изображения.
+
+        Годится для хеша без сборки картинки: все куски во всю ширину источника
+        и в одном формате. Иначе None.
+        """
+        fmt = self.format()
+        out: List[memoryview] = []
+        for src, sx, sy, h in self._pieces:
+            if sx != 0 or src.width() != self._w or src.format() != fmt:
+                return None
+            bpl = int(src.bytesPerLine())
+            out.append(memoryview(src.constBits())[sy * bpl : (sy + h) * bpl])
+        return out
+
+    # ---- edits (каждая возвращает новый документ) ----
+    def rows(self, y: int, h: int) -> "RowDocument":
+        _, tail = _split(self._pieces, y)
+        mid, _ = _split(tail, h)
+        return RowDocument(mid, self._w)
+
+    def remove_rows(self, y: int, h: int) -> "RowDocument":
+        head, rest = _split(self._pieces, y)
+        _, tail = _split(rest, h)
+        return RowDocument(head + tail, self._w)
+
+    def insert_rows(self, y: int, strip: Union[QImage, "RowDocument"]) -> "RowDocument":
+        ins = strip if isinstance(strip, RowDocument) else RowDocument.from_image(strip)
+        head, tail = _split(self._pieces, y)
+        return RowDocument(head + list(ins._pieces) + tail, self._w)
+
+    def crop(self, rect: QRect) -> "RowDocument":
+        r = rect.intersected(QRect(0, 0, self._w, self._h))
+        part = self.rows(r.y(), r.height())
+        pieces = [(src, sx + r.x(), sy, h) for src, sx, sy, h in part._pieces]
+        return RowDocument(pieces, r.width())
+
+
+def _split(pieces, y: int) -> Tuple[List[Piece], List[Piece]]:
+    """Разрезать список кусков на высоте y (строки документа)."""
+    y = max(0, int(y))
+    head: List[Piece] = []
+    tail: List[Piece] = []
+    top = 0
+    for piece in pieces:
+        src, sx, sy, h = piece
+        if top + h <= y:
+            head.append(piece)
+        elif top >= y:
+            tail.append(piece)
+        else:
+            k = y - top
+            head.append((src, sx, sy, k))
+            tail.append((src, sx, sy + k, h - k))
+        top += h
+    return head, tail
+
+
+def as_document(img: Union[QImage, RowDocument]) -> RowDocument:
+    return img if isinstance(img, RowDocument) else RowDocument.from_image(img)
+
+
+def as_qimage(img: Union[QImage, RowDocument, None]):
+    return img.to_qimage() if isinstance(img, RowDocument) else img
@@ -0,0 +1,402 @@
+from __future__ import annotations
+
+import bisect
+import itertools
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from PySide6.QtCore import Qt, QRect
+from PySide6.QtGui import QImage, QPainter
+
+from .document import as_document, as_qimage
+from .utils import force_dpi72
+
+# Общий бюджет истории в памяти (все файлы вместе); остальное уходит во временный файл.
+UNDO_MEMORY_BUDGET = 256 * 1024 * 1024
+
+
+# ---------- pixel helpers ----------
+def _blank_like(img: QImage, w: int, h: int) -> QImage:
+    fmt = img.format() if img.format() != QImage.Format_Indexed8 else QImage.Format_RGB32
+    out = QImage(max(1, int(w)), max(1, int(h)), fmt)
+    force_dpi72(out)
+    out.fill(Qt.transparent if out.hasAlphaChannel() else Qt.white)
+    return out
+
+
+def _painter(img: QImage) -> QPainter:
+    p = QPainter(img)
+    # Source, а не SourceOver: пиксели копируются байт в байт (важно для сравнения с диском).
+    p.setCompositionMode(QPainter.CompositionMode_Source)
+    return p
+
+
+# Правки строк и кадрирование работают с таблицей кусков: пиксели не копируются.
+def remove_rows(img, y: int, h: int):
+    W, H = img.width(), img.height()
+    y = max(0, min(H, int(y)))
+    y2 = max(y, min(H, y + int(h)))
+    if y == 0 and y2 == H:
+        # Вырезано всё: пустой картинки превью не бывает, остаётся одна пустая строка.
+        # RowsRemoved(whole=True) при undo возвращает исходник целиком, без этой строки.
+        return _blank_like(img, W, 1)
+    return as_document(img).remove_rows(y, y2 - y)
+
+
+def insert_rows(img, y: int, strip: QImage):
+    y = max(0, min(img.height(), int(y)))
+    return as_document(img).insert_rows(y, strip)
+
+
+def crop_rect(img, rect: QRect):
+    return as_document(img).crop(rect)
+
+
+# ---------- payload (in memory or spilled) ----------
+class _Strip:
+    """Кусок пикселей истории. Живёт либо как QImage, либо как смещение во временном файле."""
+
+    __slots__ = ("img", "w", "h", "bpl", "fmt", "offset", "nbytes", "seq")
+
+    def __init__(self, img: QImage, seq: int):
+        self.img: Optional[QImage] = img
+        self.w = int(img.width())
+        self.h = int(img.height())
+        self.bpl = int(img.bytesPerLine())
+        self.fmt = img.format()
+        self.offset: Optional[int] = None
+        self.nbytes = int(img.sizeInBytes())
+        self.seq = seq
+
+    @property
+    def in_memory(self) -> bool:
+        return self.img is not None
+
+    def spill(self, f, offset: int) -> None:
+        if self.img is None:
+            return
+        f.seek(int(offset))
+        f.write(bytes(self.img.constBits())[: self.nbytes])
+        self.offset = int(offset)
+        self.img = None
+
+    def load(self, f) -> QImage:
+        if self.img is not None:
+            return self.img
+        f.seek(int(self.offset))
+        data = f.read(self.nbytes)
+        img = QImage(data, self.w, self.h, self.bpl, self.fmt).copy()
+        force_dpi72(img)
+        return img
+
+
+# ---------- entries ----------
+class UndoEntry(ABC):
+    """Одна правка. undo/redo получают текущее изображение и возвращают новое."""
+
+    kind = "snapshot"
+
+    def __init__(self, strips: List[_Strip]):
+        self.strips = strips
+        # Ревизии документа до/после правки — по ним dirty считается за O(1)
+        self.rev_before = 0
+        self.rev_after = 0
+
+    @abstractmethod
+    def undo(self, img: QImage, f) -> QImage:
+        ...
+
+    @abstractmethod
+    def redo(self, img: QImage, f) -> QImage:
+        ...
+
+
+class RowsRemoved(UndoEntry):
+    """Вырезана горизонтальная полоса [y, y+h): храним только её.
+
+    whole — вырезано всё изображение (на его месте пустая строка-заглушка).
+    """
+
+    kind = "rows_removed"
+
+    def __init__(self, y: int, strip: _Strip, whole: bool = False):
+        super().__init__([strip])
+        self.y = int(y)
+        self.whole = bool(whole)
+
+    def undo(self, img, f):
+        if self.whole:
+            return as_document(self.strips[0].load(f))
+        return insert_rows(img, self.y, self.strips[0].load(f))
+
+    def redo(self, img, f):
+        return remove_rows(img, self.y, self.strips[0].h)
+
+
+class RowsInserted(UndoEntry):
+    """Вставлена полоса на высоте y: храним вставленный фрагмент (для redo)."""
+
+    kind = "rows_inserted"
+
+    def __init__(self, y: int, strip: _Strip):
+        super().__init__([strip])
+        self.y = int(y)
+
+    def undo(self, img, f):
+        return remove_rows(img, self.y, self.strips[0].h)
+
+    def redo(self, img, f):
+        return insert_rows(img, self.y, self.strips[0].load(f))
+
+
+class Cropped(UndoEntry):
+    """Кадрирование: храним четыре поля вокруг прямоугольника (верх, низ, лево, право)."""
+
+    kind = "crop"
+
+    def __init__(self, rect: QRect, old_w: int, old_h: int, strips: List[Optional[_Strip]]):
+        super().__init__([s for s in strips if s is not None])
+        self.rect = QRect(rect)
+        self.old_w = int(old_w)
+        self.old_h = int(old_h)
+        self._parts = strips  # top, bottom, left, right (None = пусто)
+
+    def undo(self, img, f):
+        r = self.rect
+        out = _blank_like(img, self.old_w, self.old_h)
+        p = _painter(out)
+        top, bottom, left, right = self._parts
+        if top is not None:
+            p.drawImage(0, 0, top.load(f))
+        if bottom is not None:
+            p.drawImage(0, r.y() + r.height(), bottom.load(f))
+        if left is not None:
+            p.drawImage(0, r.y(), left.load(f))
+        if right is not None:
+            p.drawImage(r.x() + r.width(), r.y(), right.load(f))
+        p.drawImage(r.x(), r.y(), as_qimage(img))
+        p.end()
+        return out
+
+    def redo(self, img, f):
+        return crop_rect(img, self.rect)
+
+
+class Snapshot(UndoEntry):
+    """Запасной вариант для произвольных правок: полная копия, undo/redo меняют их местами."""
+
+    kind = "snapshot"
+
+    def __init__(self, strip: _Strip, history: "UndoHistory"):
+        super().__init__([strip])
+        self._history = history
+
+    def _swap(self, img, f):
+        old = self.strips[0]
+        prev = old.load(f)
+        self._history._release_strip(old)
+        self.strips = [self._history._new_strip(img)]
+        self._history._mem_bytes += self.strips[0].nbytes  # запись уже в стеке
+        return prev
+
+    def undo(self, img, f):
+        return self._swap(img, f)
+
+    def redo(self, img, f):
+        return self._swap(img, f)
+
+
+class UndoHistory:
+    """Дельта-история правок превью для всех открытых файлов.
+
+    Вместо полной копии изображения на каждую правку храним только то, что
+    изменилось (вырезанную/вставленную полосу, поля при кадрировании).
+    Суммарный объём в памяти ограничен `max_bytes`: самые старые куски
+    выгружаются во временный файл и читаются обратно при undo/redo.
+    """
+
+    def __init__(self, max_bytes: int = UNDO_MEMORY_BUDGET):
+        self._max_bytes = max(0, int(max_bytes))
+        self._undo: Dict[str, List[UndoEntry]] = {}
+        self._redo: Dict[str, List[UndoEntry]] = {}
+        self._seq = itertools.count()
+        self._mem_bytes = 0
+        self._spill = None  # tempfile, создаётся лениво
+        # Свободные участки временного файла [(offset, size)] по возрастанию offset:
+        # место выгруженных и уже ненужных кусков занимают новые, файл не растёт без предела
+        self._spill_free: List[Tuple[int, int]] = []
+        self._spill_size = 0
+
+    # ---- construction helpers ----
+    def _new_strip(self, img: QImage) -> _Strip:
+        # Память учитывается в push(): запись могут построить и не положить в историю
+        return _Strip(img, next(self._seq))
+
+    def rows_removed(self, y: int, strip: QImage, whole: bool = False) -> UndoEntry:
+        return RowsRemoved(y, self._new_strip(strip), whole)
+
+    def rows_inserted(self, y: int, strip: QImage) -> UndoEntry:
+        return RowsInserted(y, self._new_strip(strip))
+
+    def cropped(self, img: QImage, rect: QRect) -> UndoEntry:
+        W, H = img.width(), img.height()
+        x, y, w, h = rect.x(), rect.y(), rect.width(), rect.height()
+
+        def part(px, py, pw, ph):
+            if pw <= 0 or ph <= 0:
+                return None
+            return self._new_strip(img.copy(px, py, pw, ph))
+
+        parts = [
+            part(0, 0, W, y),  # top
+            part(0, y + h, W, H - (y + h)),  # bottom
+            part(0, y, x, h),  # left
+            part(x + w, y, W - (x + w), h),  # right
+        ]
+        return Cropped(rect, W, H, parts)
+
+    def snapshot(self, img: QImage) -> UndoEntry:
+        return Snapshot(self._new_strip(img.copy()), self)
+
+    # ---- stacks ----
+    def push(self, path: str, entry: UndoEntry, rev_before: int = 0, rev_after: int = 0) -> None:
+        entry.rev_before = int(rev_before)
+        entry.rev_after = int(rev_after)
+        self._drop_entries(self._redo.pop(path, []))
+        self._undo.setdefault(path, []).append(entry)
+        self._mem_bytes += self._entry_mem(entry)
+        self._enforce_budget()
+
+    def can_undo(self, path: Optional[str]) -> bool:
+        return bool(path and self._undo.get(path))
+
+    def can_redo(self, path: Optional[str]) -> bool:
+        return bool(path and self._redo.get(path))
+
+    def undo(self, path: str, img: QImage) -> Optional[Tuple[QImage, int]]:
+        """Откатить последнюю правку: (новое изображение, ревизия после отката) или None."""
+        st = self._undo.get(path)
+        if not st:
+            return None
+        entry = st.pop()
+        out = self._apply(entry, img, undo=True)
+        self._redo.setdefault(path, []).append(entry)
+        return out, entry.rev_before
+
+    def redo(self, path: str, img: QImage) -> Optional[Tuple[QImage, int]]:
+        st = self._redo.get(path)
+        if not st:
+            return None
+        entry = st.pop()
+        out = self._apply(entry, img, undo=False)
+        self._undo.setdefault(path, []).append(entry)
+        return out, entry.rev_after
+
+    def _apply(self, entry: UndoEntry, img: QImage, *, undo: bool) -> QImage:
+        out = entry.undo(img, self._spill) if undo else entry.redo(img, self._spill)
+        self._enforce_budget()
+        return out
+
+    def clear(self, path: Optional[str] = None) -> None:
+        paths = [path] if path else list(set(self._undo) | set(self._redo))
+        for p in paths:
+            self._drop_entries(self._undo.pop(p, []))
+            self._drop_entries(self._redo.pop(p, []))
+        self._maybe_close_spill()
+
+    def rename(self, old: str, new: str) -> None:
+        self.clear(new)
+        if old in self._undo:
+            self._undo[new] = self._undo.pop(old)
+        if old in self._redo:
+            self._redo[new] = self._redo.pop(old)
+
+    # ---- memory ----
+    @staticmethod
+    def _entry_mem(entry: UndoEntry) -> int:
+        return sum(s.nbytes for s in entry.strips if s.in_memory)
+
+    def _drop_entries(self, entries: List[UndoEntry]) -> None:
+        for e in entries:
+            for s in e.strips:
+                self._release_strip(s)
+
+    def _release_strip(self, s: _Strip) -> None:
+        if s.in_memory:
+            self._mem_bytes -= s.nbytes
+        elif s.offset is not None:
+            self._spill_release(s.offset, s.nbytes)
+            s.offset = None
+
+    # ---- spill file space ----
+    def _spill_alloc(self, n: int) -> int:
+        for i, (off, size) in enumerate(self._spill_free):
+            if size >= n:
+                if size == n:
+                    del self._spill_free[i]
+                else:
+                    self._spill_free[i] = (off + n, size - n)
+                return off
+        off = self._spill_size
+        self._spill_size += n
+        return off
+
+    def _spill_release(self, off: int, n: int) -> None:
+        free = self._spill_free
+        i = bisect.bisect_left(free, (off, 0))
+        # Склеиваем с соседними свободными участками
+        if i < len(free) and off + n == free[i][0]:
+            n += free.pop(i)[1]
+        if i > 0 and free[i - 1][0] + free[i - 1][1] == off:
+            off, n = free[i - 1][0], free[i - 1][1] + n
+            i -= 1
+            free.pop(i)
+        if off + n >= self._spill_size:
+            # Хвост файла — просто укорачиваем файл
+            self._spill_size = off
+            try:
+                self._spill.truncate(off)
+            except Exception:
+                pass
+        else:
+            free.insert(i, (off, n))
+
+    def _enforce_budget(self) -> None:
+        if self._mem_bytes <= self._max_bytes:
+            return
+        strips = [
+            s
+            for stacks in (self._undo, self._redo)
+            for entries in stacks.values()
+            for e in entries
+            for s in e.strips
+            if s.in_memory
+        ]
+        strips.sort(key=lambda s: s.seq)  # самые старые — первыми на диск
+        for s in strips:
+            if self._mem_bytes <= self._max_bytes:
+                break
+            try:
+                if self._spill is None:
+                    self._spill = tempfile.TemporaryFile(prefix="smithanatool_undo_")
+                off = self._spill_alloc(s.nbytes)
+            except Exception:
+                break
+            try:
+                s.spill(self._spill, off)
+            except Exception:
+                self._spill_release(off, s.nbytes)
+                break
+            self._mem_bytes -= s.nbytes
+
+    def _maybe_close_spill(self) -> None:
+        if self._spill is None or any(self._undo.values()) or any(self._redo.values()):
+            return
+        try:
+            self._spill.close()
+        except Exception:
+            pass
+        self._spill = None
+        self._spill_free = []
+        self._spill_size = 0
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Iterator, MutableMapping, Optional, Tuple
+
+from PySide6.QtGui import QImage
+
+from .document import RowDocument
+
+# (width, height, format, digest)
+ImageFingerprint = Tuple[int, int, int, bytes]
+
+
+def image_bytes(img: Optional[QImage]) -> int:
+    if img is None or img.isNull():
+        return 0
+    try:
+        return int(img.sizeInBytes())
+    except Exception:
+        return int(img.bytesPerLine()) * int(img.height())
+
+
+def image_fingerprint(img: Optional[QImage]) -> Optional[ImageFingerprint]:
+    """Cheap stand-in for a pixel copy: geometry + format + BLAKE2 of the raw buffer."""
+    if img is None or img.isNull():
+        return None
+    try:
+        if isinstance(img, RowDocument):
+            parts = img.row_buffers()
+            if parts is None:
+                img = img.to_qimage()
+                parts = [img.constBits()]
+        else:
+            parts = [img.constBits()]
+        h = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            h.update(part)
+        digest = h.digest()
+    except Exception:
+        digest = b""
+    fmt = img.format()
+    return int(img.width()), int(img.height()), int(getattr(fmt, "value", fmt)), digest
+
+
+class ImageCache(MutableMapping[str, QImage]):
+    """LRU-кэш открытых изображений с бюджетом по байтам.
+
+    Вытесняются только "чистые" изображения — их можно заново прочитать с диска.
+    `is_pinned(path)` решает, что трогать нельзя (текущий файл, несохранённые правки).
+    """
+
+    def __init__(self, max_bytes: int, is_pinned: Optional[Callable[[str], bool]] = None):
+        self._items: "OrderedDict[str, QImage]" = OrderedDict()
+        self._sizes: dict[str, int] = {}
+        self._bytes = 0
+        self._max_bytes = max(0, int(max_bytes))
+        self._is_pinned = is_pinned
+
+    # ---- budget ----
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @property
+    def used_bytes(self) -> int:
+        return self._bytes
+
+    def set_max_bytes(self, max_bytes: int) -> None:
+        self._max_bytes = max(0, int(max_bytes))
+        self.trim()
+
+    def trim(self) -> list[str]:
+        """Вытеснить самые старые незакреплённые изображения, пока не влезем в бюджет."""
+        evicted: list[str] = []
+        if self._bytes <= self._max_bytes:
+            return evicted
+        for key in list(self._items.keys()):
+            if self._bytes <= self._max_bytes:
+                break
+            try:
+                if self._is_pinned is not None and self._is_pinned(key):
+                    continue
+            except Exception:
+                continue
+            self._drop(key)
+            evicted.append(key)
+        return evicted
+
+    # ---- mapping ----
+    def __getitem__(self, key: str) -> QImage:
+        img = self._items[key]
+        self._items.move_to_end(key)
+        return img
+
+    def __setitem__(self, key: str, img: QImage) -> None:
+        if key in self._items:
+            self._drop(key)
+        n = image_bytes(img)
+        self._items[key] = img
+        self._sizes[key] = n
+        self._bytes += n
+        self.trim()
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self._items:
+            raise KeyError(key)
+        self._drop(key)
+
+    def __contains__(self, key) -> bool:
+        # Без touch: проверки "есть ли картинка" идут на каждом событии мыши.
+        return key in self._items
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._items.keys()))
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def peek(self, key: str) -> Optional[QImage]:
+        return self._items.get(key)
+
+    def _drop(self, key: str) -> None:
+        self._items.pop(key, None)
+        self._bytes -= self._sizes.pop(key, 0)
@@ -2,16 +2,23 @@ from __future__ import annotations
 
 import os
 import math
+import itertools
 from pathlib import Path
 from typing import Optional, Dict, List
 
-from PySide6.QtCore import Qt, QSize, QPoint, QRect, Signal, QTimer, QEvent, QRectF
+from PySide6.QtCore import Qt, QSize, QPoint, QRect, Signal, QTimer, QEvent, QRectF, QThreadPool
 from PySide6.QtGui import QImage, QPainterPath, QRegion
 from PySide6.QtWidgets import QWidget, QSizePolicy, QMessageBox, QApplication, QLineEdit, QTextEdit, QPlainTextEdit
 
 from .ui import setup_preview_ui
 from .io import load_qimage, is_psd_path
 from .utils import memory_image_for
+from .tiles import TileCache
+from .image_cache import ImageCache, ImageFingerprint, image_fingerprint
+from .history import UndoHistory
+from .workers import FnTask, TaskSignals
+from .saver import SaveJob, SaveQueue
+from .virtual_strip import VIRTUAL_STRIP_PATH, VirtualStrip, is_virtual_path
 
 from .state import StateMixin
 from .behaviors.selection import SelectionMixin
@@ -23,9 +30,15 @@ from PySide6.QtGui import QShortcut, QKeySequence
 
 from .utils import memory_image_for, unregister_memory_images
 
+from smithanatool_qt.settings_bind import group, get_value
+
+# Бюджет кэша открытых изображений по умолчанию (МБ), переопределяется в INI: [PreviewPanel] image_cache_mb
+IMAGE_CACHE_MB_DEFAULT = 1024
+
 class PreviewPanel(StateMixin, SelectionMixin, UndoMixin, ZoomMixin, SliceMixin, FrameMixin, QWidget):
     currentPathChanged = Signal(str)
     dirtyChanged = Signal(str, bool)
+    pathRelinked = Signal(str, str)  # old, new — документ переехал на новый путь (Save As)
     sliceCountChanged = Signal(int)
 
     ocrSortRectsRequested = Signal()
@@ -39,12 +52,40 @@ class PreviewPanel(StateMixin, SelectionMixin, UndoMixin, ZoomMixin, SliceMixin,
         self._pan_passthrough_widget = None
 
         # Кэш изображений и история
-        self._images: Dict[str, QImage] = {}
-        self._loaded_from_disk: Dict[str, QImage] = {}
         self._dirty: Dict[str, bool] = {}
-
-        self._undo: Dict[str, List[QImage]] = {}
-        self._redo: Dict[str, List[QImage]] = {}
+        self._images: ImageCache = ImageCache(self._read_image_cache_budget(), is_pinned=self._is_image_pinned)
+        # "Как на диске": ревизия документа + (фоново) отпечаток вместо второй пиксельной копии
+        self._disk_sig: Dict[str, Optional[ImageFingerprint]] = {}
+        self._rev: Dict[str, int] = {}
+        self._saved_rev: Dict[str, int] = {}
+        self._rev_counter = itertools.count(1)
+        self._content_hash_enabled = True
+
+        # Фоновые задачи превью (хеши, загрузка, сохранение)
+        self._bg_pool = QThreadPool(self)
+        self._bg_pool.setMaxThreadCount(2)
+        self._bg_signals = TaskSignals()
+        self._bg_signals.done.connect(self._on_bg_done)
+        self._bg_signals.failed.connect(self._on_bg_failed)
+        self._bg_tasks: Dict[object, FnTask] = {}
+
+        # Фоновая загрузка изображений (+ предзагрузка соседей по галерее)
+        self._load_pool = QThreadPool(self)
+        self._load_pool.setMaxThreadCount(2)
+        self._pending_loads: Dict[str, FnTask] = {}
+
+        # Сохранение: в фоне, через временный файл + атомарная подмена
+        self._saver = SaveQueue(self)
+        self._saver.progressed.connect(self._on_save_progress)
+        self._saver.finished.connect(self._on_save_finished)
+        # target -> ключ документа: после успешного Save As документ переедет на target
+        self._pending_relinks: Dict[str, str] = {}
+
+        self._history = UndoHistory()
+
+        # Режим "лента": файлы галереи как один виртуальный холст
+        self._strip: Optional[VirtualStrip] = None
+        self._strip_return_path: Optional[str] = None
         self._clip: List[QImage] = []
 
         self._current_path: Optional[str] = None
@@ -95,9 +136,14 @@ class PreviewPanel(StateMixin, SelectionMixin, UndoMixin, ZoomMixin, SliceMixin,
         self._levels_black = 0
         self._levels_gamma = 1.0
         self._levels_white = 255
+        self._levels_interacting = False  # пока ползунок двигается — рисуем грубый уровень пирамиды
 
         # UI
         setup_preview_ui(self)
+
+        # Тайловый кэш с mip-пирамидой для отрисовки холста
+        self._tiles = TileCache(self)
+        self._tiles.tilesReady.connect(self.label.update)
         QApplication.instance().installEventFilter(self)
 
         # Соединения
@@ -105,6 +151,7 @@ class PreviewPanel(StateMixin, SelectionMixin, UndoMixin, ZoomMixin, SliceMixin,
         self.btn_zoom_out.clicked.connect(lambda: self._zoom_by(1 / 1.1))
         self.btn_zoom_reset.clicked.connect(self._zoom_reset)
         self.btn_fit.clicked.connect(lambda: self._set_fit(True))
+        self.btn_strip.toggled.connect(self.set_virtual_strip)
 
         self.action_btn_cut.clicked.connect(self._cut_selection)
 
@@ -179,6 +226,27 @@ class PreviewPanel(StateMixin, SelectionMixin, UndoMixin, ZoomMixin, SliceMixin,
 
 
 
+    # ---------- Image cache ----------
+    def _read_image_cache_budget(self) -> int:
+        mb = IMAGE_CACHE_MB_DEFAULT
+        try:
+            with group("PreviewPanel"):
+                mb = int(get_value("image_cache_mb", IMAGE_CACHE_MB_DEFAULT, typ=int))
+        except Exception:
+            mb = IMAGE_CACHE_MB_DEFAULT
+        return max(64, mb) * 1024 * 1024
+
+    def set_image_cache_budget(self, mb: int) -> None:
+        """Лимит памяти под открытые изображения (МБ). Грязные и текущее не вытесняются."""
+        self._images.set_max_bytes(max(64, int(mb)) * 1024 * 1024)
+
+    def _is_image_pinned(self, path: str) -> bool:
+        if path == getattr(self, "_current_path", None) or bool(self._dirty.get(path, False)):
+            return True
+        # Дельты истории привязаны к точному состоянию изображения — не вытесняем.
+        hist = getattr(self, "_history", None)
+        return hist is not None and (hist.can_undo(path) or hist.can_redo(path))
+
     def _dispatch_undo_action(self) -> None:
         if getattr(self, "_actions_profile", "transform") == "ocr":
             try:
@@ -411,6 +479,7 @@ class PreviewPanel(StateMixin, SelectionMixin, UndoMixin, ZoomMixin, SliceMixin,
         self._levels_black, self._levels_gamma, self._levels_white = b, g, w
         self._levels_enabled = not (b == 0 and abs(g - 1.0) < 1e-6 and w == 255)
         if changed:
+            self._mark_levels_interacting()
             self._update_preview_pixmap()
 
     def reset_levels_preview(self) -> None:
@@ -476,15 +545,14 @@ class PreviewPanel(StateMixin, SelectionMixin, UndoMixin, ZoomMixin, SliceMixin,
     # ---------- Save ----------
     def _on_save(self) -> None:
         """Сохранить в исходный файл (или, если из буфера, запросить Save As)."""
+        if self._is_current_readonly():
+            return
         if self._is_current_psd():
             QMessageBox.information(self, "Сохранение недоступно", "Для сохранения перейдите в секцию конвертации.")
             return
 
 
-        ok = self.save_current_overwrite()
-        if ok and self._current_path:
-            self._loaded_from_disk[self._current_path] = self._images[self._current_path].copy()
-            self._dirty[self._current_path] = False
+        self.save_current_overwrite()
 
     # ---------- Reset empty ----------
     def _reset_empty_preview(self, text: str = "Нет изображения") -> None:
@@ -493,7 +561,7 @@ class PreviewPanel(StateMixin, SelectionMixin, UndoMixin, ZoomMixin, SliceMixin,
         try:
             self._view_img = None
             self._view_img_key = None
-            self._view_pm = None
+            self._tiles.clear()
             self._display_size = QSize(0, 0)
         except Exception:
             pass
@@ -565,7 +633,20 @@ class PreviewPanel(StateMixin, SelectionMixin, UndoMixin, ZoomMixin, SliceMixin,
             pass
 
     # ---------- Public API: show image ----------
-    def show_path(self, path: Optional[str]) -> None:
+    def show_path(self, path: Optional[str], *, block: bool = True) -> None:
+        """Показать файл. По умолчанию загружается синхронно: после возврата
+        изображение уже показано, и вызывающий может с ним работать.
+
+        block=False — для листания галереи: если файла нет в кэше, декодирование
+        уходит в фон, до прихода изображения показывается лёгкая заглушка.
+        """
+        if self._strip is not None and path != VIRTUAL_STRIP_PATH:
+            top = self._strip.file_top(path) if path else None
+            if top is not None:
+                self._scroll_strip_to(top)  # выбор файла в галерее — прокрутка ленты к нему
+                return
+            self._leave_strip()
+
         prev = getattr(self, "_current_path", None)
         if prev:
             self._remember_scroll(prev)
@@ -580,28 +661,37 @@ class PreviewPanel(StateMixin, SelectionMixin, UndoMixin, ZoomMixin, SliceMixin,
             self._frame_rect_img = None
 
         if not path:
+            self._cancel_stale_loads(set())
             self._reset_empty_preview("Нет изображения")
             return
 
-        qimg: QImage | None = None
+        qimg: QImage | None = self._images.get(path)
+        if qimg is None:
+            qimg = memory_image_for(path)
+        if qimg is None:
+            if not block:
+                self._show_loading_placeholder()
+                self._request_load(path)
+                self._prefetch_neighbors(path)
+                return
+            self._cancel_stale_loads(set())
+            qimg = load_qimage(path)
+            if qimg is None or qimg.isNull():
+                self._reset_empty_preview("Не удалось открыть изображение")
+                self._update_info_label()
+                return
 
-        img = self._images.get(path)
-        if img is not None:
-            qimg = img
-        else:
-            mem_img = memory_image_for(path)
-            if mem_img is not None:
-                qimg = mem_img
-            else:
-                qimg = load_qimage(path)
-                if qimg is None or qimg.isNull():
-                    self._reset_empty_preview("Не удалось открыть изображение")
-                    self._update_info_label()
-                    return
+        self._finish_show_path(path, qimg)
+        if not block:
+            self._prefetch_neighbors(path)
 
+    def _finish_show_path(self, path: str, qimg: QImage) -> None:
         self._images[path] = qimg
 
-        self._loaded_from_disk.setdefault(path, qimg.copy())
+        if path not in self._rev:
+            self._revision(path)
+            if not is_virtual_path(path):
+                self._run_bg(("disk_sig", path, self._saved_rev[path]), image_fingerprint, qimg)
         self._dirty.setdefault(path, False)
 
         self._restore_slice_state(path)
@@ -625,8 +715,160 @@ class PreviewPanel(StateMixin, SelectionMixin, UndoMixin, ZoomMixin, SliceMixin,
         except Exception:
             pass
 
+        # Предыдущий файл больше не закреплён — можно освободить память.
+        self._images.trim()
+
         self.currentPathChanged.emit(path)
 
+    # ---------- Virtual strip ----------
+    def set_virtual_strip(self, on: bool) -> None:
+        """Режим "лента": упорядоченные файлы галереи как один вертикальный холст.
+
+        Декодируются только файлы в области видимости; выделение и нарезка
+        работают в координатах ленты, правки и сохранение отключены.
+        """
+        on = bool(on)
+        if on == (self._strip is not None):
+            self._set_strip_button(on)
+            return
+
+        if not on:
+            back = self._strip_return_path
+            was_current = self._current_path == VIRTUAL_STRIP_PATH
+            self._leave_strip()
+            if was_current:
+                self.show_path(back)
+            return
+
+        gallery = getattr(self, "gallery_panel", None)
+        try:
+            files = list(gallery.files()) if gallery is not None else []
+        except Exception:
+            files = []
+        strip = VirtualStrip(files)
+        if strip.isNull():
+            self._set_strip_button(False)
+            self.show_toast("Нет файлов для ленты", 2000)
+            return
+
+        self._strip_return_path = self._current_path
+        self._strip = strip
+        # Новая раскладка — старые границы нарезки ленты к ней не относятся
+        self._slice_state.pop(VIRTUAL_STRIP_PATH, None)
+        self._scroll_pos.pop(VIRTUAL_STRIP_PATH, None)
+        self._images[VIRTUAL_STRIP_PATH] = strip
+        self._set_strip_button(True)
+        self.show_path(VIRTUAL_STRIP_PATH)
+        self._zoom_reset()
+
+        ret = self._strip_return_path
+        top = strip.file_top(ret) if ret else None
+        if top:
+            self._scroll_strip_to(top)
+
+    def _leave_strip(self) -> None:
+        self._strip = None
+        self._strip_return_path = None
+        self._images.pop(VIRTUAL_STRIP_PATH, None)
+        self._forget_revision(VIRTUAL_STRIP_PATH)
+        self._set_strip_button(False)
+
+    def _set_strip_button(self, on: bool) -> None:
+        btn = getattr(self, "btn_strip", None)
+        if btn is None:
+            return
+        btn.blockSignals(True)
+        btn.setChecked(bool(on))
+        btn.blockSignals(False)
+
+    def _scroll_strip_to(self, y_img: int) -> None:
+        strip = self._strip
+        if strip is None or self._current_path != VIRTUAL_STRIP_PATH:
+            return
+        if self._fit_to_window:
+            self._zoom_reset()
+        ds = getattr(self, "_display_size", None)
+        if not ds or ds.height() <= 0:
+            return
+        vb = self.scroll.verticalScrollBar()
+        vb.setValue(int(y_img * ds.height() / max(1, strip.height())))
+
+    def _is_current_readonly(self) -> bool:
+        return is_virtual_path(getattr(self, "_current_path", None))
+
+    # ---------- Async loading / prefetch ----------
+    def _show_loading_placeholder(self) -> None:
+        """Заглушка на время фоновой загрузки: без сброса зума/режима fit."""
+        self._view_img = None
+        self._view_img_key = None
+        self._tiles.clear()
+        try:
+            self.label.setText("Загрузка…")
+            self.label.update()
+        except Exception:
+            pass
+        self._update_info_label()
+        self._update_actions_enabled()
+        self._update_zoom_controls_enabled()
+
+    def _request_load(self, path: str) -> None:
+        if path in self._pending_loads:
+            return
+        tag = ("load", path)
+        task = FnTask(load_qimage, tag, self._bg_signals, path)
+        self._pending_loads[path] = task
+        self._bg_tasks[tag] = task
+        self._load_pool.start(task)
+
+    def _neighbor_paths(self, path: str) -> List[str]:
+        gallery = getattr(self, "gallery_panel", None)
+        try:
+            files = list(gallery.files()) if gallery is not None else []
+        except Exception:
+            files = []
+        if path not in files:
+            return []
+        i = files.index(path)
+        out = []
+        for j in (i + 1, i - 1):
+            if 0 <= j < len(files) and not self._is_memory_path(files[j]):
+                out.append(files[j])
+        return out
+
+    def _prefetch_neighbors(self, path: str) -> None:
+        """Подгрузить следующий и предыдущий файлы галереи; остальные запросы отменить."""
+        neighbors = self._neighbor_paths(path)
+        self._cancel_stale_loads({path, *neighbors})
+        for p in neighbors:
+            if p not in self._images:
+                self._request_load(p)
+
+    def _cancel_stale_loads(self, keep: set) -> None:
+        for p, task in list(self._pending_loads.items()):
+            if p in keep:
+                continue
+            # Уже начатую задачу не прервать — её результат просто ляжет в кэш.
+            try:
+                if self._load_pool.tryTake(task):
+                    self._pending_loads.pop(p, None)
+                    self._bg_tasks.pop(task.tag, None)
+            except Exception:
+                pass
+
+    def _on_image_loaded(self, path: str, qimg) -> None:
+        if self._pending_loads.pop(path, None) is None:
+            return  # путь забыт (forget_paths) — результат не нужен
+        ok = qimg is not None and not qimg.isNull()
+        if path == self._current_path and path not in self._images:
+            if not ok:
+                self._reset_empty_preview("Не удалось открыть изображение")
+                self._update_info_label()
+                return
+            self._finish_show_path(path, qimg)
+            return
+        if ok and path not in self._images:
+            self._images[path] = qimg
+
     def save_current_overwrite(self) -> bool:
         if self._is_memory_path(self._current_path):
             return False
@@ -635,36 +877,35 @@ class PreviewPanel(StateMixin, SelectionMixin, UndoMixin, ZoomMixin, SliceMixin,
         if self._is_current_psd():
             return False
 
-        ok = self._images[self._current_path].save(self._current_path)
-        if ok:
-            self._loaded_from_disk[self._current_path] = self._images[self._current_path].copy()
-            self._set_dirty(self._current_path, False)
-        return bool(ok)
+        return self._enqueue_save(self._current_path)
 
     def relink_current_to(self, new_path: str) -> bool:
         """После Save As: сделать текущий документ 'файловым' вместо mem://... (с сохранением undo/redo и т.п.)."""
-        old = getattr(self, "_current_path", None)
+        return self._relink_doc(getattr(self, "_current_path", None), new_path)
+
+    def _relink_doc(self, old: Optional[str], new_path: str, rev: int | None = None, img=None) -> bool:
+        """Перенести документ old на new_path. rev/img — что реально записано на диск."""
         if not old or not new_path or old == new_path:
             return False
-        if old not in self._images:
+        if old not in self._images and old not in self._rev:
             return False
 
         # Если вдруг new_path уже был открыт/в кэше — уберём, чтобы не смешать состояния
         self._images.pop(new_path, None)
-        self._loaded_from_disk.pop(new_path, None)
+        self._forget_revision(new_path)
         self._dirty.pop(new_path, None)
-        self._undo.pop(new_path, None)
-        self._redo.pop(new_path, None)
         if hasattr(self, "_scroll_pos"):
             self._scroll_pos.pop(new_path, None)
         if hasattr(self, "_slice_state"):
             self._slice_state.pop(new_path, None)
 
         # Переносим всё состояние со старого ключа на новый
-        self._images[new_path] = self._images.pop(old)
+        moved = self._images.pop(old, None)
+        if moved is not None:
+            self._images[new_path] = moved
 
-        self._undo[new_path] = self._undo.pop(old, [])
-        self._redo[new_path] = self._redo.pop(old, [])
+        self._history.rename(old, new_path)
+        self._saver.rename_doc(old, new_path)
 
         if hasattr(self, "_scroll_pos") and old in self._scroll_pos:
             self._scroll_pos[new_path] = self._scroll_pos.pop(old)
@@ -672,14 +913,17 @@ class PreviewPanel(StateMixin, SelectionMixin, UndoMixin, ZoomMixin, SliceMixin,
         if hasattr(self, "_slice_state") and old in self._slice_state:
             self._slice_state[new_path] = self._slice_state.pop(old)
 
-        # После успешного сохранения считаем, что это “состояние на диске”
-        self._loaded_from_disk.pop(old, None)
-        self._loaded_from_disk[new_path] = self._images[new_path].copy()
+        # Ревизии переезжают вместе с историей (её дельты ссылаются на них)
+        if old in self._rev:
+            self._rev[new_path] = self._rev.pop(old)
+        self._saved_rev.pop(old, None)
+        self._disk_sig.pop(old, None)
 
-        # dirty: старый ключ удаляем, новый = False
-        was_dirty = self._dirty.pop(old, False)
+        # dirty: старый ключ удаляем, новый считаем по записанной ревизии
+        self._dirty.pop(old, False)
         self._dirty.setdefault(new_path, False)
-        self._set_dirty(new_path, False)
+        # После успешного сохранения считаем, что это “состояние на диске”
+        self._mark_saved(new_path, rev=rev, img=img)
 
         # Если это был mem:// — вычистим registry, чтобы не держать лишнюю копию
         try:
@@ -688,34 +932,84 @@ class PreviewPanel(StateMixin, SelectionMixin, UndoMixin, ZoomMixin, SliceMixin,
         except Exception:
             pass
 
-        # Переключаем текущий путь БЕЗ show_path (чтобы не сбрасывать выделение)
-        self._current_path = new_path
+        if self._current_path == old:
+            # Переключаем текущий путь БЕЗ show_path (чтобы не сбрасывать выделение)
+            self._current_path = new_path
 
-        try:
-            self._update_preview_pixmap()
-            self._update_actions_enabled()
-            self._update_zoom_controls_enabled()
-            self._update_info_label()
-        except Exception:
-            pass
+            try:
+                self._update_preview_pixmap()
+                self._update_actions_enabled()
+                self._update_zoom_controls_enabled()
+                self._update_info_label()
+            except Exception:
+                pass
 
-        try:
-            self.currentPathChanged.emit(new_path)
-        except Exception:
-            pass
+            try:
+                self.currentPathChanged.emit(new_path)
+            except Exception:
+                pass
 
+        self.pathRelinked.emit(old, new_path)
         return True
-    def save_current_as(self, target_path: str) -> bool:
+
+    def save_current_as(self, target_path: str, *, relink: bool = False) -> bool:
+        """Сохранить текущий документ в target_path (в фоне).
+
+        relink=True — после успешной записи документ переедет на target_path
+        (pathRelinked); до этого старый ключ (mem://...) остаётся рабочим.
+        """
         if not self._current_path or self._current_path not in self._images:
             return False
         if self._is_current_psd():
             return False
 
-        ok = self._images[self._current_path].save(target_path)
+        if not self._enqueue_save(target_path):
+            return False
+        if relink:
+            self._pending_relinks[target_path] = self._current_path
+        return True
+
+    # ---------- Background save ----------
+    def _enqueue_save(self, target_path: str) -> bool:
+        """Поставить текущий документ в очередь сохранения. True — задача принята.
+
+        Результат приходит позже: тост "Сохранено" или сообщение об ошибке.
+        """
+        path = self._current_path
+        img = self._images.peek(path) if path else None
+        if img is None or not target_path or self._is_current_readonly():
+            return False
+        self._saver.submit(SaveJob(path, target_path, img, self._revision(path)))
+        return True
+
+    def flush_saves(self) -> None:
+        """Дописать на диск все поставленные сохранения (блокирует; вызывается при закрытии)."""
+        self._saver.wait()
+
+    def _on_save_progress(self, target: str, pending: int) -> None:
+        name = os.path.basename(target)
+        more = f" (в очереди: {pending - 1})" if pending > 1 else ""
+        self.show_toast(f"Сохраняю {name}…{more}", 60000)
+
+    def _on_save_finished(self, job: SaveJob, ok: bool, err: str) -> None:
+        path = job.doc_path
+        relink_from = self._pending_relinks.pop(job.target, None)
         if ok:
-            self._loaded_from_disk[self._current_path] = self._images[self._current_path].copy()
-            self._set_dirty(self._current_path, False)
-        return bool(ok)
+            if relink_from is not None and relink_from == path:
+                self._relink_doc(path, job.target, rev=job.rev, img=job.img)
+            elif path in self._rev:
+                self._mark_saved(path, rev=job.rev, img=job.img)
+
+        pending = self._saver.pending()
+        if pending:
+            self._on_save_progress(job.target, pending)
+        elif ok:
+            self.show_toast(f"Сохранено: {os.path.basename(job.target)}", 3000)
+        else:
+            self._toast.hide()
+
+        if not ok:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось сохранить изображение.\n{job.target}\n{err}".rstrip())
 
     # ---------- Selection service ----------
     def _end_resize(self) -> None:
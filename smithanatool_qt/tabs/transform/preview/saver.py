@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from PySide6.QtCore import QCoreApplication, QEvent, QObject, QThreadPool, Signal
+from PySide6.QtGui import QImage
+
+from .document import as_qimage
+from .workers import FnTask, TaskSignals
+
+
+def _fsync_dir(d: str) -> None:
+    if not hasattr(os, "O_DIRECTORY"):
+        return  # Windows: os.replace уже атомарен, каталог не fsync-ается
+    try:
+        fd = os.open(d, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_save(img, target: str) -> str:
+    """Записать изображение во временный файл рядом с целью, fsync и атомарно подменить цель.
+
+    При сбое на середине на диске остаётся либо старый файл, либо новый — не половина.
+    """
+    flat: QImage = as_qimage(img)
+    target = os.path.abspath(target)
+    d = os.path.dirname(target) or "."
+    base, ext = os.path.splitext(os.path.basename(target))
+    fd, tmp = tempfile.mkstemp(prefix=f".{base}.", suffix=(ext or ".png") + ".tmp", dir=d)
+    os.close(fd)
+    try:
+        fmt = (ext[1:] if ext else "png").upper()
+        fmt = {"JPG": "JPEG", "TIF": "TIFF"}.get(fmt, fmt)
+        if not flat.save(tmp, fmt):
+            raise OSError(f"Не удалось записать {target}")
+        with open(tmp, "rb+") as f:
+            os.fsync(f.fileno())
+        if os.path.exists(target):
+            shutil.copymode(target, tmp)
+        else:
+            os.chmod(tmp, 0o644)
+        os.replace(tmp, target)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    _fsync_dir(d)
+    return target
+
+
+@dataclass
+class SaveJob:
+    doc_path: str  # ключ документа в превью (чья ревизия станет "сохранённой")
+    target: str
+    img: object  # QImage | RowDocument, неизменяемый снимок на момент постановки
+    rev: int
+
+
+class SaveQueue(QObject):
+    """Очередь фоновых сохранений.
+
+    Один поток: сохранения идут по порядку. Пока файл пишется, новые запросы
+    на тот же путь не копятся — остаётся только последний (coalesce).
+    """
+
+    progressed = Signal(str, int)  # target, сколько ещё сохранений впереди (включая текущее)
+    finished = Signal(object, bool, str)  # SaveJob, ok, error
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self._signals = TaskSignals()
+        self._signals.done.connect(self._on_done)
+        self._signals.failed.connect(self._on_failed)
+        self._running: Dict[str, SaveJob] = {}
+        self._waiting: Dict[str, SaveJob] = {}
+
+    @staticmethod
+    def _key(target: str) -> str:
+        return os.path.normcase(os.path.abspath(target))
+
+    def pending(self) -> int:
+        return len(self._running) + len(self._waiting)
+
+    def is_saving(self, doc_path: Optional[str] = None) -> bool:
+        jobs = list(self._running.values()) + list(self._waiting.values())
+        return any(doc_path is None or j.doc_path == doc_path for j in jobs)
+
+    def submit(self, job: SaveJob) -> None:
+        key = self._key(job.target)
+        if key in self._running:
+            self._waiting[key] = job  # более старый ожидающий снимок больше не нужен
+        else:
+            self._start(key, job)
+        self.progressed.emit(job.target, self.pending())
+
+    def rename_doc(self, old: str, new: str) -> None:
+        for job in list(self._running.values()) + list(self._waiting.values()):
+            if job.doc_path == old:
+                job.doc_path = new
+
+    def wait(self) -> None:
+        """Дождаться записи всего, что стоит в очереди (при закрытии).
+
+        Результаты приходят обычным `finished`, так что владелец успевает
+        отметить файлы сохранёнными до проверки несохранённых изменений.
+        """
+        while self.pending():
+            before = self.pending()
+            self._pool.waitForDone()
+            # done/failed из потока пула стоят в очереди событий — доставляем сейчас
+            QCoreApplication.sendPostedEvents(None, QEvent.MetaCall)
+            if self.pending() >= before:
+                break
+        waiting, self._waiting = list(self._waiting.values()), {}
+        for job in waiting:
+            try:
+                atomic_save(job.img, job.target)
+            except Exception as e:
+                self.finished.emit(job, False, str(e))
+            else:
+                self.finished.emit(job, True, "")
+
+    def _start(self, key: str, job: SaveJob) -> None:
+        self._running[key] = job
+        self._pool.start(FnTask(atomic_save, (key, job), self._signals, job.img, job.target))
+
+    def _advance(self, key: str) -> None:
+        nxt = self._waiting.pop(key, None)
+        if nxt is not None:
+            self._start(key, nxt)
+            self.progressed.emit(nxt.target, self.pending())
+
+    def _on_done(self, tag, _result) -> None:
+        key, job = tag
+        self._running.pop(key, None)
+        self.finished.emit(job, True, "")
+        self._advance(key)
+
+    def _on_failed(self, tag, tb: str) -> None:
+        key, job = tag
+        self._running.pop(key, None)
+        err = (tb or "").strip().splitlines()[-1:] or [""]
+        self.finished.emit(job, False, err[0])
+        self._advance(key)
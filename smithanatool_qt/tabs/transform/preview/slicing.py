@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+from PySide6.QtGui import QImage
+
+from .io import load_qimage
+
+
+# ---------- bounds ----------
+def bounds_by_height(h: int, step: int) -> List[int]:
+    step = max(1, int(step))
+    bounds = [0]
+    y = 0
+    while y + step < h:
+        y += step
+        bounds.append(y)
+    bounds.append(int(h))
+    return bounds
+
+
+def bounds_by_count(h: int, n: int) -> List[int]:
+    n = max(2, int(n))
+    step = h / n
+
+    ys = [0]
+    acc = 0.0
+    for _ in range(1, n):
+        acc += step
+        ys.append(int(round(acc)))
+    ys.append(int(h))
+
+    ys2 = [ys[0]]
+    for y in ys[1:]:
+        if y <= ys2[-1]:
+            y = ys2[-1] + 1
+        ys2.append(min(y, h))
+    ys2[-1] = int(h)
+    return ys2
+
+
+def resolve_bounds(state: dict, h: int) -> List[int]:
+    """Границы нарезки из сохранённого состояния (как при восстановлении в превью)."""
+    h = int(h)
+    bounds = sorted(set(max(0, min(h, int(y))) for y in (state.get("bounds") or [])))
+    if not bounds or bounds[0] != 0:
+        bounds = [0] + bounds
+    if bounds[-1] != h:
+        bounds.append(h)
+    if len(bounds) >= 3 and any(bounds[i + 1] > bounds[i] for i in range(len(bounds) - 1)):
+        return bounds
+    if state.get("by") == "height":
+        return bounds_by_height(h, int(state.get("height_px", 2000)))
+    return bounds_by_count(h, int(state.get("count", 2)))
+
+
+def fragment_path(out_dir: str, src_path: str, index: int) -> str:
+    base = os.path.splitext(os.path.basename(src_path))[0]
+    return os.path.join(out_dir, f"{base}_{str(index + 1).zfill(2)}.png")
+
+
+# ---------- engine ----------
+@dataclass
+class SliceJob:
+    path: str
+    state: dict
+    image: Optional[QImage] = None  # уже открытое (возможно, с правками); иначе читаем с диска
+
+
+@dataclass
+class SliceResult:
+    saved: int = 0
+    skipped: List[str] = field(default_factory=list)
+
+
+def _decode(job: SliceJob) -> Optional[QImage]:
+    img = job.image if job.image is not None else load_qimage(job.path)
+    if img is None or img.isNull():
+        return None
+    return img
+
+
+def _save_fragment(img: QImage, dst: str, y1: int, y2: int) -> bool:
+    frag = img.copy(0, y1, img.width(), max(1, y2 - y1))
+    return bool(frag.save(dst))
+
+
+def slice_files(
+    jobs: Sequence[SliceJob],
+    out_dir: str,
+    *,
+    workers: int,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> SliceResult:
+    """Нарезать файлы по их состоянию нарезки без участия виджета превью.
+
+    Один пул на весь пакет: чтение следующих файлов идёт параллельно с
+    кадрированием и кодированием фрагментов предыдущих. Одновременно
+    в памяти держится не больше `workers` декодированных файлов.
+    """
+    result = SliceResult()
+    total = len(jobs)
+    if total == 0:
+        return result
+
+    workers = max(1, int(workers))
+    lookahead = max(1, min(workers, total))
+    done_files = 0
+
+    def _file_done() -> None:
+        nonlocal done_files
+        done_files += 1
+        if progress_callback:
+            progress_callback(done_files, total)
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        queue = iter(enumerate(jobs))
+        decodes: Dict[object, tuple] = {}  # future → (index, job)
+        encodes: Dict[object, int] = {}  # future → index
+        remaining: Dict[int, int] = {}  # index → несохранённых фрагментов
+
+        def _submit_next_decode() -> None:
+            item = next(queue, None)
+            if item is not None:
+                decodes[ex.submit(_decode, item[1])] = item
+
+        for _ in range(lookahead):
+            _submit_next_decode()
+
+        while decodes or encodes:
+            finished, _ = wait(list(decodes) + list(encodes), return_when=FIRST_COMPLETED)
+            for fut in finished:
+                if fut in decodes:
+                    idx, job = decodes.pop(fut)
+                    try:
+                        img = fut.result()
+                    except Exception:
+                        img = None
+                    bounds = resolve_bounds(job.state, img.height()) if img is not None else []
+                    spans = [(i, bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i + 1] > bounds[i]]
+                    if not spans:
+                        result.skipped.append(job.path)
+                        _file_done()
+                    else:
+                        remaining[idx] = len(spans)
+                        for i, y1, y2 in spans:
+                            dst = fragment_path(out_dir, job.path, i)
+                            encodes[ex.submit(_save_fragment, img, dst, y1, y2)] = idx
+                    if len(remaining) + len(decodes) < lookahead:
+                        _submit_next_decode()
+                else:
+                    idx = encodes.pop(fut)
+                    try:
+                        if fut.result():
+                            result.saved += 1
+                    except Exception:
+                        pass
+                    remaining[idx] -= 1
+                    if remaining[idx] == 0:
+                        del remaining[idx]
+                        _file_done()
+                        if len(remaining) + len(decodes) < lookahead:
+                            _submit_next_decode()
+
+    return result
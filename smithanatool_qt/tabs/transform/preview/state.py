@@ -4,6 +4,9 @@ from typing import Optional
 
 from PySide6.QtGui import QImage
 
+from .image_cache import image_fingerprint
+from .workers import FnTask
+
 
 class StateMixin:
 
@@ -28,27 +31,125 @@ class StateMixin:
     def has_unsaved_changes(self) -> bool:
         return any(getattr(self, "_dirty", {}).values())
 
+    # ---- Revisions (O(1) dirty tracking) ----
+    def _revision(self, path: str) -> int:
+        rev = self._rev.get(path)
+        if rev is None:
+            rev = self._rev[path] = self._saved_rev[path] = next(self._rev_counter)
+        return rev
+
+    def _bump_revision(self, path: str) -> int:
+        """Новая уникальная ревизия после правки."""
+        self._revision(path)
+        rev = self._rev[path] = next(self._rev_counter)
+        return rev
+
+    def _set_revision(self, path: str, rev: int) -> None:
+        self._revision(path)
+        self._rev[path] = int(rev)
+
+    def _mark_saved(self, path: str, rev: int | None = None, img=None) -> None:
+        """Состояние rev (по умолчанию текущее) == файл на диске.
+
+        Фоновое сохранение передаёт ревизию и снимок, которые реально записаны:
+        правки, сделанные пока файл писался, остаются несохранёнными.
+        """
+        self._saved_rev[path] = self._revision(path) if rev is None else int(rev)
+        self._set_dirty(path, self._revision(path) != self._saved_rev[path])
+        if img is None:
+            img = self._images.peek(path)
+        if img is not None:
+            self._disk_sig.pop(path, None)
+            self._run_bg(("disk_sig", path, self._saved_rev[path]), image_fingerprint, img)
+
     def _recalc_dirty_vs_disk(self, path: str | None = None) -> None:
         p = path or getattr(self, "_current_path", None)
         if not p:
             return
-        base = getattr(self, "_loaded_from_disk", {}).get(p)
-        cur = getattr(self, "_images", {}).get(p)
-        if base is None or cur is None:
+        dirty = self._revision(p) != self._saved_rev.get(p)
+        self._set_dirty(p, dirty)
+        if dirty:
+            self._schedule_content_check(p)
+
+    # ---- Optional background content check ----
+    def set_content_hash_check(self, on: bool) -> None:
+        """Фоново сверять хеш содержимого с диском: правка+обратная правка снова даёт "чисто"."""
+        self._content_hash_enabled = bool(on)
+
+    def _schedule_content_check(self, path: str) -> None:
+        if not getattr(self, "_content_hash_enabled", True):
+            return
+        base = self._disk_sig.get(path)
+        img = self._images.peek(path)
+        if base is None or img is None:
+            return
+        # Другая геометрия — точно отличается, хешировать незачем
+        if (int(img.width()), int(img.height())) != (base[0], base[1]):
+            return
+        self._run_bg(("content", path, self._revision(path)), image_fingerprint, img)
+
+    def _run_bg(self, tag, fn, *args) -> None:
+        task = FnTask(fn, tag, self._bg_signals, *args)
+        self._bg_tasks[tag] = task
+        self._bg_pool.start(task)
+
+    def _on_bg_failed(self, tag, tb: str) -> None:
+        self._bg_tasks.pop(tag, None)
+        if isinstance(tag, tuple) and tag and tag[0] == "load":
+            self._on_image_loaded(tag[1], None)
+
+    def _on_bg_done(self, tag, result) -> None:
+        self._bg_tasks.pop(tag, None)
+        kind = tag[0] if isinstance(tag, tuple) and tag else None
+
+        if kind == "load":
+            self._on_image_loaded(tag[1], result)
+            return
+
+        if kind == "disk_sig":
+            _, path, saved_rev = tag
+            if self._saved_rev.get(path) == saved_rev:
+                self._disk_sig[path] = result
+            return
+
+        if kind == "content":
+            _, path, rev = tag
+            # Пока считали, документ могли снова изменить — такой результат устарел
+            if self._rev.get(path) != rev or result is None:
+                return
+            if result == self._disk_sig.get(path):
+                self._saved_rev[path] = rev
+                self._set_dirty(path, False)
             return
-        # QImage == compares content + geometry + format
-        self._set_dirty(p, not (cur == base))
+
+    def _forget_revision(self, path: str) -> None:
+        self._rev.pop(path, None)
+        self._saved_rev.pop(path, None)
+        self._disk_sig.pop(path, None)
 
     def discard_changes(self, path: Optional[str] = None) -> None:
-        """Revert image(s) to the disk-loaded base state without writing to disk."""
+        """Revert image(s) to the disk-loaded base state without writing to disk.
+
+        Грязное изображение просто выбрасывается из кэша — при следующем показе
+        оно будет прочитано с диска заново.
+        """
         paths = [path] if path else list(getattr(self, "_images", {}).keys())
+        cur_path = getattr(self, "_current_path", None)
+        reload_current = False
         for p in paths:
-            base = getattr(self, "_loaded_from_disk", {}).get(p)
-            if base is not None:
-                self._images[p] = base.copy()
-                self._undo[p] = []
-                self._redo[p] = []
+            if self._dirty.get(p, False):
                 self._set_dirty(p, False)
+                self._images.pop(p, None)
+                self._forget_revision(p)
+                reload_current = reload_current or p == cur_path
+            self._history.clear(p)
+
+        if reload_current:
+            try:
+                self._current_path = None
+                self.show_path(cur_path)
+            except Exception:
+                pass
 
         try:
             self._update_preview_pixmap()
@@ -107,6 +208,8 @@ class StateMixin:
                     pass
 
         for p in paths:
+            if hasattr(self, "_pending_loads"):
+                self._pending_loads.pop(p, None)
             try:
                 if getattr(self, "_dirty", {}).get(p, False):
                     self.dirtyChanged.emit(p, False)
@@ -115,12 +218,10 @@ class StateMixin:
 
             if hasattr(self, "_images"):
                 self._images.pop(p, None)
-            if hasattr(self, "_undo"):
-                self._undo.pop(p, None)
-            if hasattr(self, "_redo"):
-                self._redo.pop(p, None)
-            if hasattr(self, "_loaded_from_disk"):
-                self._loaded_from_disk.pop(p, None)
+            if hasattr(self, "_history"):
+                self._history.clear(p)
+            if hasattr(self, "_rev"):
+                self._forget_revision(p)
             if hasattr(self, "_dirty"):
                 self._dirty.pop(p, None)
             if hasattr(self, "_scroll_pos"):
@@ -0,0 +1,429 @@
+from __future__ import annotations
+
+import math
+import os
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from PySide6.QtCore import Qt, QObject, QRect, QRunnable, QThreadPool, Signal
+from PySide6.QtGui import QImage, QPainter, QPixmap
+
+TILE_SIZE = 512
+
+# (level, tx, ty)
+TileKey = Tuple[int, int, int]
+
+
+def render_tile(source, level: int, tx: int, ty: int, tile_size: int = TILE_SIZE) -> Optional[QImage]:
+    """Build one tile of mip level `level` from the full-resolution source.
+
+    `source` only needs width(), height() and copy(x, y, w, h) -> QImage,
+    so plain QImage works as well as any lazy document. An optional
+    scaled_copy(x, y, w, h, tw, th) is used for levels > 0.
+    """
+    f = 1 << int(level)
+    W, H = int(source.width()), int(source.height())
+    x0 = int(tx) * tile_size * f
+    y0 = int(ty) * tile_size * f
+    if x0 >= W or y0 >= H:
+        return None
+    w0 = min(tile_size * f, W - x0)
+    h0 = min(tile_size * f, H - y0)
+
+    scaled_copy = getattr(source, "scaled_copy", None)
+    if f > 1 and scaled_copy is not None:
+        # Ленивый источник (лента файлов) сам читает уменьшенные пиксели
+        return scaled_copy(x0, y0, w0, h0, max(1, int(math.ceil(w0 / f))), max(1, int(math.ceil(h0 / f))))
+
+    img = source.copy(x0, y0, w0, h0)
+    if img is None or img.isNull():
+        return None
+    if f > 1:
+        tw = max(1, int(math.ceil(w0 / f)))
+        th = max(1, int(math.ceil(h0 / f)))
+        img = img.scaled(tw, th, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+    return img
+
+
+def _rgba_view(img: QImage, *, writable: bool) -> np.ndarray:
+    """(h, w, 4) numpy view over an RGBA8888 QImage buffer, no copy."""
+    w, h, bpl = img.width(), img.height(), img.bytesPerLine()
+    buf = img.bits() if writable else img.constBits()
+    arr = np.frombuffer(buf, dtype=np.uint8, count=h * bpl).reshape(h, bpl)
+    return arr[:, : w * 4].reshape(h, w, 4)
+
+
+def levels_lut(black: int, gamma: float, white: int) -> np.ndarray:
+    """256-entry LUT for black/gamma/white levels."""
+    rng = max(1, int(white) - int(black))
+    x = np.arange(256, dtype=np.float32)
+    u = np.clip((x - int(black)) / float(rng), 0.0, 1.0)
+    y = np.power(u, float(gamma)) * 255.0
+    return np.clip(y + 0.5, 0, 255).astype(np.uint8)
+
+
+class _TileSignals(QObject):
+    done = Signal(int, int, int, int, object)  # gen, level, tx, ty, QImage | None
+
+
+class _TileTask(QRunnable):
+    def __init__(self, source, gen: int, key: TileKey, tile_size: int, signals: _TileSignals):
+        super().__init__()
+        self._source = source
+        self._gen = gen
+        self._key = key
+        self._tile_size = tile_size
+        self.signals = signals
+
+    def run(self):
+        level, tx, ty = self._key
+        try:
+            img = render_tile(self._source, level, tx, ty, self._tile_size)
+        except Exception:
+            img = None
+        self.signals.done.emit(self._gen, level, tx, ty, img)
+
+
+class _ByteLRU:
+    """OrderedDict-based LRU with a byte budget."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = int(max_bytes)
+        self.bytes = 0
+        self._items: "OrderedDict[TileKey, tuple[object, int]]" = OrderedDict()
+
+    def get(self, key):
+        it = self._items.get(key)
+        if it is None:
+            return None
+        self._items.move_to_end(key)
+        return it[0]
+
+    def peek(self, key):
+        it = self._items.get(key)
+        return None if it is None else it[0]
+
+    def put(self, key, value, nbytes: int) -> None:
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+        self._items[key] = (value, int(nbytes))
+        self.bytes += int(nbytes)
+        while self.bytes > self.max_bytes and len(self._items) > 1:
+            _, (_, b) = self._items.popitem(last=False)
+            self.bytes -= b
+
+    def discard(self, key) -> None:
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+
+    def clear(self) -> None:
+        self._items.clear()
+        self.bytes = 0
+
+
+class TileCache(QObject):
+    """Tile cache with a lazily built mip pyramid for the preview canvas.
+
+    Level 0 is the full-resolution image, level N is downscaled by 2**N.
+    Paint only touches tiles intersecting the update rect at the level nearest
+    to the current display scale, so cost does not depend on image height.
+    Tiles for levels > 0 are rendered on a background pool; until they arrive
+    a cached coarser tile is stretched in their place, or cached finer tiles
+    are drawn downscaled (first zoom-out: nothing coarser exists yet).
+    """
+
+    tilesReady = Signal()
+
+    def __init__(
+        self,
+        parent=None,
+        *,
+        tile_size: int = TILE_SIZE,
+        max_image_bytes: int = 192 * 1024 * 1024,
+        max_pixmap_bytes: int = 128 * 1024 * 1024,
+    ):
+        super().__init__(parent)
+        self._tile_size = int(tile_size)
+        self._source = None
+        self._source_key = None
+        self._gen = 0
+
+        self._images = _ByteLRU(max_image_bytes)
+        self._pixmaps = _ByteLRU(max_pixmap_bytes)
+        self._pending: Dict[TileKey, _TileTask] = {}
+
+        # Уровни (только отображение): LUT применяется к видимым тайлам при сборке pixmap
+        self._lut: Optional[np.ndarray] = None
+        self._lut_key = None
+        self._level_bias = 0
+        self._scratch: Dict[Tuple[int, int], QImage] = {}
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max(1, min(4, (os.cpu_count() or 2) - 1)))
+
+        self._signals = _TileSignals()
+        self._signals.done.connect(self._on_tile_done)
+
+    # ---- source ----
+    def set_source(self, source, key=None) -> None:
+        """Attach a new source. Same key → caches are kept."""
+        if source is self._source and key == self._source_key:
+            return
+        self._source = source
+        self._source_key = key
+        self._invalidate()
+
+    def set_lut(self, lut: Optional[np.ndarray], key=None) -> None:
+        """Display LUT for RGB channels. Raw tiles stay cached; only pixmaps are rebuilt."""
+        if key == self._lut_key and (lut is None) == (self._lut is None):
+            return
+        self._lut = lut
+        self._lut_key = key
+        self._pixmaps.clear()
+
+    def set_level_bias(self, bias: int) -> None:
+        """Draw N levels coarser than needed (cheap preview while a slider is dragged)."""
+        self._level_bias = max(0, int(bias))
+
+    def clear(self) -> None:
+        self._source = None
+        self._source_key = None
+        self._invalidate()
+
+    def has_source(self) -> bool:
+        src = self._source
+        return src is not None and src.width() > 0 and src.height() > 0
+
+    def _invalidate(self) -> None:
+        self._gen += 1
+        try:
+            self._pool.clear()  # queued (not started) tasks of the old source
+        except Exception:
+            pass
+        self._pending.clear()
+        self._images.clear()
+        self._pixmaps.clear()
+
+    # ---- geometry ----
+    def max_level(self) -> int:
+        if not self.has_source():
+            return 0
+        longest = max(int(self._source.width()), int(self._source.height()))
+        return max(0, int(math.ceil(math.log2(max(1.0, longest / self._tile_size)))))
+
+    def level_for_scale(self, scale: float) -> int:
+        """Nearest level that is still at least as detailed as the display."""
+        if scale <= 0:
+            return self.max_level()
+        lvl = int(math.floor(math.log2(max(1.0, 1.0 / scale))))
+        return max(0, min(self.max_level(), lvl))
+
+    def _tile_rect_img(self, level: int, tx: int, ty: int) -> QRect:
+        """Tile rect in full-resolution image coordinates."""
+        span = self._tile_size << level
+        W, H = int(self._source.width()), int(self._source.height())
+        x0, y0 = tx * span, ty * span
+        return QRect(x0, y0, max(0, min(span, W - x0)), max(0, min(span, H - y0)))
+
+    # ---- tiles ----
+    def _pixmap_for(self, key: TileKey) -> Optional[QPixmap]:
+        pm = self._pixmaps.get(key)
+        if pm is not None:
+            return pm
+        img = self._images.get(key)
+        if img is None:
+            return None
+        pm = self._make_pixmap(key, img)
+        if pm is not None:
+            self._pixmaps.put(key, pm, int(pm.width()) * int(pm.height()) * 4)
+        return pm
+
+    def _make_pixmap(self, key: TileKey, img: QImage) -> Optional[QPixmap]:
+        try:
+            if self._lut is not None:
+                img = self._apply_lut(img)
+            return QPixmap.fromImage(img)
+        except Exception:
+            return None
+
+    def _apply_lut(self, img: QImage) -> QImage:
+        """LUT → reusable per-size scratch image (fromImage copies it into the pixmap)."""
+        if img.format() != QImage.Format_RGBA8888:
+            img = img.convertToFormat(QImage.Format_RGBA8888)
+        size = (int(img.width()), int(img.height()))
+        scratch = self._scratch.get(size)
+        if scratch is None:
+            if len(self._scratch) > 8:
+                self._scratch.clear()
+            scratch = QImage(size[0], size[1], QImage.Format_RGBA8888)
+            self._scratch[size] = scratch
+
+        src = _rgba_view(img, writable=False)
+        dst = _rgba_view(scratch, writable=True)
+        np.take(self._lut, src[..., :3], out=dst[..., :3], mode="clip")
+        dst[..., 3] = src[..., 3]
+        return scratch
+
+    def _store_image(self, key: TileKey, img: QImage) -> None:
+        self._images.put(key, img, int(img.sizeInBytes()))
+
+    def _request(self, key: TileKey) -> None:
+        if key in self._pending or self._images.peek(key) is not None or not self.has_source():
+            return
+        task = _TileTask(self._source, self._gen, key, self._tile_size, self._signals)
+        self._pending[key] = task
+        self._pool.start(task)
+
+    def _sync_ok(self, key: TileKey) -> bool:
+        """Lazy sources render inline only when their pixels are already decoded."""
+        if not getattr(self._source, "lazy", False):
+            return True
+        r = self._tile_rect_img(*key)
+        try:
+            return bool(self._source.is_ready(r.x(), r.y(), r.width(), r.height()))
+        except Exception:
+            return False
+
+    def _render_sync(self, key: TileKey) -> Optional[QImage]:
+        level, tx, ty = key
+        try:
+            img = render_tile(self._source, level, tx, ty, self._tile_size)
+        except Exception:
+            img = None
+        if img is not None:
+            self._store_image(key, img)
+        return img
+
+    def _on_tile_done(self, gen: int, level: int, tx: int, ty: int, img) -> None:
+        key = (int(level), int(tx), int(ty))
+        if gen != self._gen:
+            return
+        self._pending.pop(key, None)
+        if img is None or img.isNull():
+            return
+        self._store_image(key, img)
+        self._pixmaps.discard(key)
+        self.tilesReady.emit()
+
+    def _fallback(self, level: int, tx: int, ty: int) -> Optional[Tuple[QPixmap, QRect]]:
+        """Closest cached coarser tile covering (level, tx, ty) + its source sub-rect."""
+        ts = self._tile_size
+        top = self.max_level()
+        for up in range(level + 1, top + 1):
+            d = up - level
+            ptx, pty = tx >> d, ty >> d
+            pkey = (up, ptx, pty)
+            if self._images.peek(pkey) is None and self._pixmaps.peek(pkey) is None:
+                continue
+            pm = self._pixmap_for(pkey)
+            if pm is None:
+                continue
+            # sub-rect of the parent tile that corresponds to the child tile
+            sub = ts >> d
+            sx = (tx - (ptx << d)) * sub
+            sy = (ty - (pty << d)) * sub
+            src = QRect(sx, sy, max(1, sub), max(1, sub)).intersected(QRect(0, 0, pm.width(), pm.height()))
+            if src.isEmpty():
+                continue
+            return pm, src
+        return None
+
+    # Глубже не спускаемся: 4**d тайлов на один — дороже, чем подождать фон
+    _FINER_FALLBACK_DEPTH = 2
+
+    def _finer_fallback(self, level: int, tx: int, ty: int) -> list[TileKey]:
+        """Cached tiles of the nearest finer level inside (level, tx, ty)."""
+        for d in range(1, min(level, self._FINER_FALLBACK_DEPTH) + 1):
+            n = 1 << d
+            found = []
+            for cy in range(n):
+                for cx in range(n):
+                    key = (level - d, (tx << d) + cx, (ty << d) + cy)
+                    if self._pixmaps.peek(key) is not None or self._images.peek(key) is not None:
+                        found.append(key)
+            if found:
+                return found
+        return []
+
+    # ---- paint ----
+    def paint(self, p: QPainter, pmr: QRect, update_rect: QRect, *, smooth: bool = True, prefetch: bool = True) -> None:
+        """Draw the visible part of the source.
+
+        pmr: image rect in widget coordinates (already scaled to display size).
+        update_rect: dirty rect of the paint event.
+        """
+        if not self.has_source() or pmr.isEmpty():
+            return
+        target = update_rect.intersected(pmr)
+        if target.isEmpty():
+            return
+
+        W, H = int(self._source.width()), int(self._source.height())
+        sx_scale = pmr.width() / max(1, W)
+        sy_scale = pmr.height() / max(1, H)
+        level = min(self.max_level(), self.level_for_scale(min(sx_scale, sy_scale)) + self._level_bias)
+        span = self._tile_size << level
+
+        # visible area in image coordinates → tile index range
+        ix0 = max(0, int((target.left() - pmr.left()) / sx_scale))
+        iy0 = max(0, int((target.top() - pmr.top()) / sy_scale))
+        ix1 = min(W - 1, int((target.right() + 1 - pmr.left()) / sx_scale))
+        iy1 = min(H - 1, int((target.bottom() + 1 - pmr.top()) / sy_scale))
+        tx0, tx1 = ix0 // span, ix1 // span
+        ty0, ty1 = iy0 // span, iy1 // span
+
+        p.setRenderHint(QPainter.SmoothPixmapTransform, bool(smooth))
+
+        def _to_widget(r: QRect) -> QRect:
+            # Integer edges computed the same way for neighbours → no seams between tiles.
+            left = pmr.left() + int(round(r.x() * sx_scale))
+            top = pmr.top() + int(round(r.y() * sy_scale))
+            right = pmr.left() + int(round((r.x() + r.width()) * sx_scale))
+            bottom = pmr.top() + int(round((r.y() + r.height()) * sy_scale))
+            return QRect(left, top, max(1, right - left), max(1, bottom - top))
+
+        for ty in range(ty0, ty1 + 1):
+            for tx in range(tx0, tx1 + 1):
+                key = (level, tx, ty)
+                dst = _to_widget(self._tile_rect_img(level, tx, ty))
+
+                pm = self._pixmap_for(key)
+                if pm is None and level == 0 and self._sync_ok(key):
+                    # Level 0 is a plain memory copy — cheap enough to do inline.
+                    if self._render_sync(key) is not None:
+                        pm = self._pixmap_for(key)
+
+                if pm is not None:
+                    p.drawPixmap(dst, pm, QRect(0, 0, pm.width(), pm.height()))
+                    continue
+
+                self._request(key)
+                fb = self._fallback(level, tx, ty)
+                if fb is not None:
+                    fpm, src = fb
+                    p.drawPixmap(dst, fpm, src)
+                    continue
+                for ckey in self._finer_fallback(level, tx, ty):
+                    cpm = self._pixmap_for(ckey)
+                    if cpm is not None:
+                        p.drawPixmap(_to_widget(self._tile_rect_img(*ckey)), cpm, QRect(0, 0, cpm.width(), cpm.height()))
+
+        if prefetch:
+            self._prefetch_ring(level, tx0, ty0, tx1, ty1)
+
+    def _prefetch_ring(self, level: int, tx0: int, ty0: int, tx1: int, ty1: int) -> None:
+        """Queue one ring of tiles around the viewport so panning finds them ready."""
+        if level == 0 and not getattr(self._source, "lazy", False):
+            return
+        span = self._tile_size << level
+        ntx = (int(self._source.width()) + span - 1) // span
+        nty = (int(self._source.height()) + span - 1) // span
+        for ty in range(max(0, ty0 - 1), min(nty, ty1 + 2)):
+            for tx in range(max(0, tx0 - 1), min(ntx, tx1 + 2)):
+                if tx0 <= tx <= tx1 and ty0 <= ty <= ty1:
+                    continue
+                self._request((level, tx, ty))
@@ -275,12 +275,16 @@ def setup_preview_ui(panel: "PreviewPanel") -> None:
     panel.btn_zoom_reset = QPushButton("По ширине")
     panel.lbl_zoom = QLabel("100%")
     panel.btn_fit = QPushButton("По высоте")
+    panel.btn_strip = QPushButton("Лента")
+    panel.btn_strip.setCheckable(True)
+    panel.btn_strip.setToolTip("Все файлы галереи подряд как одна лента (просмотр и нарезка)")
 
     controls.addWidget(panel.lbl_zoom)
     controls.addWidget(panel.btn_zoom_out)
     controls.addWidget(panel.btn_zoom_in)
     controls.addWidget(panel.btn_zoom_reset)
     controls.addWidget(panel.btn_fit)
+    controls.addWidget(panel.btn_strip)
 
     panel._controls_row_widgets = [
         panel.lbl_info,
@@ -289,6 +293,7 @@ def setup_preview_ui(panel: "PreviewPanel") -> None:
         panel.btn_zoom_in,
         panel.btn_zoom_reset,
         panel.btn_fit,
+        panel.btn_strip,
     ]
 
     v.addLayout(controls)
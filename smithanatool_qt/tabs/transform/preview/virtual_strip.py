@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import bisect
+import itertools
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+from PySide6.QtCore import Qt, QRect, QRectF, QSize
+from PySide6.QtGui import QImage, QImageReader, QPainter
+
+from .io import is_psd_path, load_qimage
+from .utils import force_dpi72
+
+VIRTUAL_STRIP_PATH = "virtual://strip"
+
+# Декодированные файлы ленты (полное разрешение), общий бюджет
+STRIP_CACHE_BYTES = 384 * 1024 * 1024
+
+# (path, y0, y1) — строки одного файла
+Segment = Tuple[str, int, int]
+
+_keys = itertools.count(1 << 40)
+
+
+def is_virtual_path(path: Optional[str]) -> bool:
+    return bool(path and str(path).startswith("virtual://"))
+
+
+def _header_size(path: str) -> Optional[QSize]:
+    """Размер из заголовка файла, без декодирования пикселей."""
+    if not path or is_psd_path(path):
+        return None
+    try:
+        size = QImageReader(path).size()
+    except Exception:
+        return None
+    if not size.isValid() or size.width() <= 0 or size.height() <= 0:
+        return None
+    return size
+
+
+class VirtualStrip:
+    """Упорядоченные файлы галереи как один вертикальный холст.
+
+    Раскладка строится по заголовкам; пиксели декодируются только для файлов,
+    попавших в запрошенную область, через ограниченный LRU. Файлы прижаты к
+    левому краю, остаток строки — белый (как у склейки).
+
+    API как у QImage/RowDocument в той части, которой пользуется превью, плюс
+    `scaled_copy` для уменьшенных тайлов и `is_ready` для синхронной отрисовки.
+    """
+
+    lazy = True
+
+    def __init__(self, paths: Sequence[str], cache_bytes: int = STRIP_CACHE_BYTES):
+        self._paths: List[str] = []
+        self._sizes: List[QSize] = []
+        self._tops: List[int] = []
+        y = 0
+        for p in paths:
+            size = _header_size(p)
+            if size is None:
+                continue
+            self._paths.append(p)
+            self._sizes.append(size)
+            self._tops.append(y)
+            y += int(size.height())
+        self._w = max((s.width() for s in self._sizes), default=0)
+        self._h = y
+        self._key = next(_keys)
+
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[int, QImage]" = OrderedDict()
+        self._cache_used = 0
+        self._cache_max = max(0, int(cache_bytes))
+
+    # ---- layout ----
+    def paths(self) -> List[str]:
+        return list(self._paths)
+
+    def file_top(self, path: str) -> Optional[int]:
+        try:
+            return self._tops[self._paths.index(path)]
+        except ValueError:
+            return None
+
+    def file_at(self, y: int) -> Tuple[int, int]:
+        """(индекс файла, y внутри файла) для строки ленты."""
+        i = max(0, bisect.bisect_right(self._tops, int(y)) - 1)
+        return i, int(y) - self._tops[i]
+
+    def _spans(self, y: int, h: int) -> List[Tuple[int, int, int]]:
+        """(индекс файла, y0, y1) в координатах файла для строк [y, y+h)."""
+        y = max(0, int(y))
+        end = min(self._h, y + max(0, int(h)))
+        out = []
+        if not self._paths or y >= end:
+            return out
+        i, _ = self.file_at(y)
+        while i < len(self._paths) and self._tops[i] < end:
+            top = self._tops[i]
+            fh = int(self._sizes[i].height())
+            a, b = max(y, top), min(end, top + fh)
+            if a < b:
+                out.append((i, a - top, b - top))
+            i += 1
+        return out
+
+    def slice_plan(self, bounds: Sequence[int]) -> List[List[Segment]]:
+        """Для каждого фрагмента [bounds[k], bounds[k+1]) — список кусков исходных файлов."""
+        pts = [int(b) for b in bounds]
+        return [
+            [(self._paths[i], y0, y1) for i, y0, y1 in self._spans(a, b - a)]
+            for a, b in zip(pts, pts[1:])
+            if b > a
+        ]
+
+    # ---- QImage-like API ----
+    def width(self) -> int:
+        return self._w
+
+    def height(self) -> int:
+        return self._h
+
+    def size(self) -> QSize:
+        return QSize(self._w, self._h)
+
+    def isNull(self) -> bool:
+        return self._w <= 0 or self._h <= 0
+
+    def format(self):
+        return QImage.Format_RGB32
+
+    def hasAlphaChannel(self) -> bool:
+        return False
+
+    def cacheKey(self) -> int:
+        return self._key
+
+    def sizeInBytes(self) -> int:
+        # Декодированные файлы ограничены собственным бюджетом ленты
+        return 0
+
+    def save(self, *args, **kwargs) -> bool:
+        return False  # лента только для просмотра; фрагменты сохраняются через план нарезки
+
+    def to_qimage(self) -> QImage:
+        return self.copy()
+
+    # ---- pixels ----
+    def _decoded(self, i: int) -> Optional[QImage]:
+        with self._lock:
+            img = self._cache.get(i)
+            if img is not None:
+                self._cache.move_to_end(i)
+                return img
+        img = load_qimage(self._paths[i])
+        if img is None or img.isNull():
+            return None
+        with self._lock:
+            if i not in self._cache:
+                self._cache[i] = img
+                self._cache_used += int(img.sizeInBytes())
+                while self._cache_used > self._cache_max and len(self._cache) > 1:
+                    _, old = self._cache.popitem(last=False)
+                    self._cache_used -= int(old.sizeInBytes())
+        return img
+
+    def is_ready(self, x: int, y: int, w: int, h: int) -> bool:
+        with self._lock:
+            return all(i in self._cache for i, _, _ in self._spans(y, h))
+
+    def _blank(self, w: int, h: int) -> QImage:
+        out = QImage(max(1, int(w)), max(1, int(h)), QImage.Format_RGB32)
+        force_dpi72(out)
+        out.fill(Qt.white)
+        return out
+
+    def copy(self, *args) -> QImage:
+        if not args:
+            x, y, w, h = 0, 0, self._w, self._h
+        elif len(args) == 1:
+            r: QRect = args[0]
+            x, y, w, h = r.x(), r.y(), r.width(), r.height()
+        else:
+            x, y, w, h = (int(a) for a in args)
+
+        out = self._blank(w, h)
+        p = QPainter(out)
+        try:
+            for i, y0, y1 in self._spans(y, h):
+                src = self._decoded(i)
+                if src is None:
+                    continue
+                dst_y = self._tops[i] + y0 - y
+                p.drawImage(0, dst_y, src, x, y0, w, y1 - y0)
+        finally:
+            p.end()
+        return out
+
+    def scaled_copy(self, x: int, y: int, w: int, h: int, tw: int, th: int) -> QImage:
+        """Область [x, y, w, h], уменьшенная до tw×th, без полного декодирования далёких файлов."""
+        out = self._blank(tw, th)
+        sx = tw / max(1, w)
+        sy = th / max(1, h)
+        p = QPainter(out)
+        p.setRenderHint(QPainter.SmoothPixmapTransform, True)
+        try:
+            for i, y0, y1 in self._spans(y, h):
+                size = self._sizes[i]
+                with self._lock:
+                    full = self._cache.get(i)
+                if full is not None:
+                    src, k = full, 1.0
+                else:
+                    # Уменьшенное чтение: JPEG/WebP декодируются сразу в нужном размере
+                    k = min(1.0, max(sx, sy) * 2)
+                    reader = QImageReader(self._paths[i])
+                    reader.setScaledSize(QSize(max(1, round(size.width() * k)), max(1, round(size.height() * k))))
+                    src = reader.read()
+                    if src.isNull():
+                        continue
+                    k = src.height() / max(1, size.height())
+                top = self._tops[i]
+                fw = min(w, int(size.width()) - x)
+                if fw <= 0:
+                    continue
+                dst = QRectF(0, (top + y0 - y) * sy, fw * sx, (y1 - y0) * sy)
+                srect = QRectF(x * k, y0 * k, fw * k, (y1 - y0) * k)
+                p.drawImage(dst, src, srect)
+        finally:
+            p.end()
+        return out
@@ -227,14 +227,10 @@ class PanZoomLabel(QLabel):
 
     def paintEvent(self, ev):
         owner = getattr(self, "_owner", None)
-        pm = getattr(owner, "_view_pm", None) if owner is not None else None
-        img = getattr(owner, "_view_img", None) if owner is not None else None
+        tiles = getattr(owner, "_tiles", None) if owner is not None else None
 
         # No image? fall back to the default QLabel painting (text like "Нет изображения").
-        has_pm = pm is not None and getattr(pm, "isNull", lambda: True)() is False
-        has_img = img is not None and getattr(img, "isNull", lambda: True)() is False
-
-        if not has_pm and not has_img:
+        if tiles is None or not tiles.has_source():
             super().paintEvent(ev)
             return
 
@@ -245,32 +241,14 @@ class PanZoomLabel(QLabel):
         if pmr.isNull() or pmr.width() <= 0 or pmr.height() <= 0:
             return
 
-        # Draw only the visible part of the image (clipped by Qt to the update region).
+        # Draw only the tiles intersecting the update region, at the nearest mip level.
         p = QPainter(self)
-
-        # Use the paint event rect as the update region (more robust than clipBoundingRect across styles/platforms).
-        target = ev.rect().intersected(pmr)
-        if not target.isNull() and target.width() > 0 and target.height() > 0:
-            # Map target rect (label coords) -> source rect (image coords)
-            if has_pm:
-                iw = max(1, int(pm.width()))
-                ih = max(1, int(pm.height()))
-            else:
-                iw = max(1, int(img.width()))
-                ih = max(1, int(img.height()))
-            rw = max(1, int(pmr.width()))
-            rh = max(1, int(pmr.height()))
-
-            sx = (target.left() - pmr.left()) * iw / rw
-            sy = (target.top() - pmr.top()) * ih / rh
-            sw = target.width() * iw / rw
-            sh = target.height() * ih / rh
-            src_rect = QRect(int(sx), int(sy), max(1, int(sw)), max(1, int(sh)))
-            if has_pm:
-                p.drawPixmap(target, pm, src_rect)
-            else:
-                p.drawImage(target, img, src_rect)
-
+        tiles.paint(
+            p,
+            pmr,
+            ev.rect(),
+            smooth=not bool(getattr(owner, "_zoom_interacting", False)),
+        )
         p.end()
 
         # Рамка (кадрирование) рисуется поверх всех остальных оверлеев.
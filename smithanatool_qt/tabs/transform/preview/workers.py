@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import traceback
+
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+
+class TaskSignals(QObject):
+    done = Signal(object, object)  # tag, result
+    failed = Signal(object, str)  # tag, traceback
+
+
+class FnTask(QRunnable):
+    """QRunnable for preview background work: fn(*args) → signals.done(tag, result)."""
+
+    def __init__(self, fn, tag, signals: TaskSignals, *args, **kwargs):
+        super().__init__()
+        self._fn = fn
+        self._args = args
+        self._kwargs = kwargs
+        self.tag = tag
+        self.signals = signals
+
+    def run(self):
+        try:
+            result = self._fn(*self._args, **self._kwargs)
+            self.signals.done.emit(self.tag, result)
+        except Exception:
+            self.signals.failed.emit(self.tag, traceback.format_exc())
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import os
 
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtCore import QObject, Qt, QTimer, Signal
 from PySide6.QtWidgets import (
     QApplication,
     QCheckBox,
@@ -27,7 +27,15 @@ from smithanatool_qt.tabs.common.bind import (
     ini_save_str,
 )
 from smithanatool_qt.tabs.common.defaults import DEFAULTS
+from smithanatool_qt.tabs.transform.preview.slicing import slice_files
 from smithanatool_qt.tabs.transform.utils.fs import open_in_explorer
+from smithanatool_qt.utils.threading import run_in_thread
+
+
+class _BatchProgress(QObject):
+    """Прогресс пакетной нарезки: emit из рабочего потока доходит до GUI очередью."""
+
+    progressed = Signal(int, int)
 
 
 class CutSection(QWidget):
@@ -35,6 +43,8 @@ class CutSection(QWidget):
         super().__init__(parent)
         self._preview = preview
         self._paths_provider = paths_provider
+        self._batch_thread = None
+        self._batch_worker = None
 
         self._slice_by_le = QLineEdit(self)
         self._slice_by_le.setVisible(False)
@@ -285,6 +295,8 @@ class CutSection(QWidget):
         if not self._preview:
             QMessageBox.warning(self, "Нарезка", "Нет панели предпросмотра.")
             return
+        if self._batch_thread is not None:
+            return
 
         paths = self._selected_paths()
         if not paths:
@@ -301,45 +313,55 @@ class CutSection(QWidget):
 
         auto_threads = bool(self.chk_auto_threads.isChecked())
         threads = int(self.spin_threads.value())
+        if auto_threads:
+            cpu = os.cpu_count() or 4
+            threads = max(2, min(8, cpu))
+
+        # Файлы режутся прямо с диска по сохранённому состоянию нарезки — превью не переключается
+        jobs = self._preview.slice_jobs(paths)
+        job_paths = {j.path for j in jobs}
+        not_enabled = [p for p in paths if p not in job_paths]
+        if not jobs:
+            QMessageBox.information(self, "Нарезка", "Ни у одного выбранного файла не включена нарезка.")
+            return
 
-        dlg = QProgressDialog("Режу выделенные файлы…", None, 0, 0, self)
+        dlg = QProgressDialog("Режу выделенные файлы…", None, 0, len(jobs), self)
         dlg.setWindowTitle("Нарезка")
         dlg.setWindowModality(Qt.ApplicationModal)
         dlg.setCancelButton(None)
         dlg.setMinimumDuration(0)
+        dlg.setAutoClose(False)
+        dlg.setValue(0)
         dlg.show()
-        QApplication.processEvents()
 
-        total_saved = 0
-        skipped: list[str] = []
-        current_before = getattr(self._preview, "_current_path", None)
+        progress = _BatchProgress(self)
+        progress.progressed.connect(lambda done, _total: dlg.setValue(done))
 
-        try:
-            for path in paths:
-                try:
-                    self._preview.show_path(path)
-                    st = self._preview.get_slice_state()
-                    if not bool(st.get("enabled")):
-                        skipped.append(path)
-                        continue
-
-                    bounds = list(st.get("bounds") or [])
-                    if len(bounds) < 2:
-                        skipped.append(path)
-                        continue
-
-                    saved = self._preview.save_slices(out_dir, threads=threads, auto_threads=auto_threads)
-                    total_saved += int(saved or 0)
-                except Exception:
-                    skipped.append(path)
-        finally:
+        def _finish(result):
             dlg.close()
-            try:
-                if current_before:
-                    self._preview.show_path(current_before)
-            except Exception:
-                pass
+            progress.deleteLater()
+            self._batch_thread = self._batch_worker = None
+            skipped = not_enabled + list(getattr(result, "skipped", []) or [])
+            self._show_batch_done(out_dir, int(getattr(result, "saved", 0) or 0), skipped)
+
+        def _failed(exc):
+            dlg.close()
+            progress.deleteLater()
+            self._batch_thread = self._batch_worker = None
+            QMessageBox.critical(self, "Нарезка", f"Не удалось нарезать файлы: {exc}")
+
+        self._batch_thread, self._batch_worker = run_in_thread(
+            self,
+            slice_files,
+            jobs,
+            out_dir,
+            workers=threads,
+            progress_callback=progress.progressed.emit,
+            on_finished=_finish,
+            on_failed=_failed,
+        )
 
+    def _show_batch_done(self, out_dir: str, total_saved: int, skipped: list[str]) -> None:
         msg = [f"Сохранено фрагментов: {total_saved}"]
         if skipped:
             msg.append(f"Пропущено файлов: {len(skipped)}")
@@ -9,7 +9,10 @@ from PySide6.QtCore import Qt
 from PySide6.QtWidgets import QApplication, QFileDialog, QMessageBox, QProgressDialog
 
 from smithanatool_qt.tabs.transform.utils.fs import open_in_explorer
+from smithanatool_qt.utils.threading import run_in_thread
 
+from .proxy import build_proxy
+from .proxy_dialog import StitchProxyDialog, layout_to_qimage
 from .service import (
     natural_key,
     normalize_files,
@@ -23,6 +26,11 @@ IMAGE_FILTER = "Изображения (*.png *.jpg *.jpeg *.bmp *.webp)"
 SMART_IMAGE_FILTER = "Изображения (*.png *.jpg *.jpeg *.bmp *.webp *.tif *.tiff *.tga)"
 
 
+def _build_proxy_image(files, **params):
+    layout = build_proxy(files, **params)
+    return layout, layout_to_qimage(layout)
+
+
 class StitchSectionActionsMixin:
     def _show_done_box(self, out_dir: str, message: str):
         box = QMessageBox(self)
@@ -321,3 +329,83 @@ class StitchSectionActionsMixin:
 
         progress.close()
         return int(total_saved or 0)
+
+    # ---- предпросмотр ----
+    def _on_preview_clicked(self):
+        if self._proxy_dialog is None:
+            self._proxy_dialog = StitchProxyDialog(self)
+            self._proxy_dialog.runRequested.connect(self._on_run_clicked)
+        self._proxy_dialog.show()
+        self._proxy_dialog.raise_()
+        self._proxy_dialog.activateWindow()
+        self._refresh_proxy()
+
+    def _schedule_proxy_refresh(self, *_args):
+        if self._proxy_dialog is not None and self._proxy_dialog.isVisible():
+            self._proxy_timer.start()
+
+    def _proxy_params(self) -> dict:
+        _, dim_val, *_ = self._build_output_params()
+        return dict(
+            mode=self._current_stitch_mode(),
+            target_width=0 if dim_val is None else int(dim_val),
+            group_by="count" if self.combo_auto_mode.currentIndex() == 0 else "height",
+            per_group=int(self.spin_group.value()),
+            max_h=int(self.spin_max_h.value()),
+            detector=self._current_smart_detector_key(),
+            slice_height=int(self.spin_smart_height.value()),
+            sensitivity=int(self.spin_smart_sensitivity.value()),
+            scan_step=int(self.spin_smart_scan_step.value()),
+            ignore_borders=int(self.spin_smart_ignore.value()),
+        )
+
+    def _refresh_proxy(self):
+        dlg = self._proxy_dialog
+        if dlg is None or not dlg.isVisible():
+            return
+        if self._proxy_thread is not None:
+            self._proxy_pending = True  # перезапустим после текущего прохода
+            return
+        if self.cmb_dir.currentText() != "По вертикали":
+            dlg.set_error("Предпросмотр доступен только для вертикальной склейки.")
+            return
+
+        params = self._proxy_params()
+        files = normalize_files(self._ask_selected_paths())
+        if params["mode"] == "smart":
+            try:
+                files = sorted(files, key=lambda path: natural_key(Path(path).name))
+            except Exception:
+                pass
+        if not files:
+            dlg.set_error("Нет файлов для предпросмотра.")
+            return
+
+        dlg.set_busy(True)
+        self._proxy_thread, _ = run_in_thread(
+            self,
+            _build_proxy_image,
+            files,
+            on_finished=self._on_proxy_ready,
+            on_failed=self._on_proxy_failed,
+            **params,
+        )
+
+    def _proxy_done(self):
+        self._proxy_thread = None
+        if self._proxy_dialog is not None:
+            self._proxy_dialog.set_busy(False)
+        if self._proxy_pending:
+            self._proxy_pending = False
+            self._refresh_proxy()
+
+    def _on_proxy_ready(self, result):
+        layout, img = result
+        if self._proxy_dialog is not None:
+            self._proxy_dialog.set_layout(layout, img)
+        self._proxy_done()
+
+    def _on_proxy_failed(self, exc: Exception):
+        if self._proxy_dialog is not None:
+            self._proxy_dialog.set_error(f"Не удалось построить предпросмотр:\n{exc}")
+        self._proxy_done()
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Sequence
+
+from PIL import Image
+
+from .smartstitch_engine import build_bounds_direct, build_bounds_smartstitch, combine_images_vertically
+
+# Ширина прокси-холста: детектор SmartStitch на ней проходит строку в сотни раз быстрее
+PROXY_WIDTH = 360
+
+# Уменьшенные декоды между перезапусками предпросмотра (меняются параметры, не файлы)
+PROXY_CACHE_BYTES = 96 * 1024 * 1024
+
+
+class _ProxyCache:
+    def __init__(self, max_bytes: int):
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._used = 0
+        self._max = max(0, int(max_bytes))
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+            return item
+
+    def put(self, key, item) -> None:
+        cost = item[0].width * item[0].height * 3
+        with self._lock:
+            if key in self._items:
+                return
+            self._items[key] = item
+            self._used += cost
+            while self._used > self._max and len(self._items) > 1:
+                _, (old, *_rest) = self._items.popitem(last=False)
+                self._used -= old.width * old.height * 3
+
+
+_cache = _ProxyCache(PROXY_CACHE_BYTES)
+
+
+def load_proxy(path: str, proxy_width: int = PROXY_WIDTH) -> tuple[Image.Image, int, int]:
+    """(уменьшенный RGB, исходная ширина, исходная высота). JPEG декодируется сразу уменьшенным."""
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size, int(proxy_width))
+    hit = _cache.get(key)
+    if hit is not None:
+        return hit
+
+    with Image.open(path) as img:
+        full_w, full_h = int(img.width), int(img.height)
+        if full_w <= 0 or full_h <= 1:
+            raise RuntimeError('Некорректный размер изображения.')
+        img.draft('RGB', (proxy_width, max(1, round(full_h * proxy_width / full_w))))
+        img.load()
+        small = img.convert('RGB') if img.mode != 'RGB' else img.copy()
+    if small.width > proxy_width:
+        small = small.resize(
+            (int(proxy_width), max(1, round(small.height * proxy_width / small.width))),
+            Image.BILINEAR,
+        )
+
+    item = (small, full_w, full_h)
+    _cache.put(key, item)
+    return item
+
+
+@dataclass
+class ProxyLayout:
+    """Раскладка результата в координатах вывода и её уменьшенная картинка."""
+
+    image: Image.Image  # прокси-холст
+    scale: float  # пикселей прокси на пиксель вывода
+    width: int  # размеры результата в полном разрешении
+    height: int
+    bounds: list[int] = field(default_factory=list)  # границы файлов вывода, 0..height
+    skipped: list[str] = field(default_factory=list)
+
+    def pieces(self) -> list[tuple[int, int]]:
+        return [(a, b) for a, b in zip(self.bounds, self.bounds[1:]) if b > a]
+
+    def piece_at(self, y: int) -> int:
+        """Индекс фрагмента под строкой вывода y."""
+        for i, (a, b) in enumerate(self.pieces()):
+            if a <= y < b:
+                return i
+        return max(0, len(self.pieces()) - 1)
+
+
+def _group_bounds(heights: Sequence[int], *, group_by: str, per_group: int, max_h: int) -> list[int]:
+    """Границы групп автосклейки (как в `_stitch_and_save_groups` для вертикали)."""
+    bounds = [0]
+    y = 0
+    count = 0
+    group_h = 0
+    for h in heights:
+        if group_by == 'count':
+            full = count >= max(1, per_group)
+        else:
+            full = count > 0 and group_h + h > max_h
+        if full:
+            bounds.append(y)
+            count, group_h = 0, 0
+        y += h
+        count += 1
+        group_h += h
+    bounds.append(y)
+    return bounds
+
+
+def build_proxy(
+    files: Sequence[str],
+    *,
+    mode: str,
+    target_width: int = 0,
+    group_by: str = 'count',
+    per_group: int = 12,
+    max_h: int = 10000,
+    detector: str = 'smart',
+    slice_height: int = 8000,
+    sensitivity: int = 90,
+    scan_step: int = 5,
+    ignore_borders: int = 5,
+    proxy_width: int = PROXY_WIDTH,
+) -> ProxyLayout:
+    """Быстрый предпросмотр вертикальной склейки/нарезки по уменьшенным декодам.
+
+    Высоты и границы групп считаются точно, по размерам файлов. Границы
+    SmartStitch ищутся на прокси-холсте с пересчитанными в его масштаб
+    параметрами и переводятся обратно — это приближение: на полном
+    разрешении разрез может сместиться на несколько строк.
+
+    mode — 'one' | 'multi' | 'smart', как в `_current_stitch_mode` секции.
+    """
+    if mode not in ('one', 'multi', 'smart'):
+        raise ValueError(f'Неизвестный режим склейки: {mode!r}')
+    entries = []
+    skipped: list[str] = []
+    for path in files:
+        try:
+            entries.append((path, *load_proxy(path, proxy_width)))
+        except Exception:
+            skipped.append(path)
+    if not entries:
+        raise RuntimeError('Нет изображений для предпросмотра.')
+
+    # Размеры в выводе (с приведением к ширине, как при полной склейке)
+    sizes = []
+    for _, _, w, h in entries:
+        if target_width and target_width > 0 and w != target_width:
+            sizes.append((int(target_width), max(1, round(h * (target_width / w)))))
+        else:
+            sizes.append((w, h))
+    out_w = max(w for w, _ in sizes)
+    heights = [h for _, h in sizes]
+    out_h = sum(heights)
+
+    scale = min(1.0, proxy_width / out_w)
+    tiles = []
+    for (_, small, _, _), (w, h) in zip(entries, sizes):
+        size = (max(1, round(w * scale)), max(1, round(h * scale)))
+        tiles.append(small if small.size == size else small.resize(size, Image.BILINEAR))
+    canvas = combine_images_vertically(tiles)
+
+    if mode == 'one':
+        bounds = [0, out_h]
+    elif mode == 'multi':
+        bounds = _group_bounds(heights, group_by=group_by, per_group=per_group, max_h=max_h)
+    elif str(detector).lower() == 'direct':
+        bounds = build_bounds_direct(out_h, slice_height)
+    else:
+        ky = canvas.height / out_h
+        proxy_bounds = build_bounds_smartstitch(
+            canvas,
+            slice_height=max(1, round(slice_height * ky)),
+            sensitivity=sensitivity,
+            scan_step=max(1, round(scan_step * ky)),
+            ignore_borders=round(ignore_borders * scale),
+        )
+        bounds = [0]
+        for b in proxy_bounds[1:-1]:
+            y = min(out_h, round(b / ky))
+            if y > bounds[-1]:
+                bounds.append(y)
+        if bounds[-1] != out_h:
+            bounds.append(out_h)
+
+    return ProxyLayout(image=canvas, scale=scale, width=out_w, height=out_h, bounds=bounds, skipped=skipped)
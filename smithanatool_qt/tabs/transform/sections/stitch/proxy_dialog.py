@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from PySide6.QtCore import QSize, Qt, Signal
+from PySide6.QtGui import QColor, QImage, QPainter, QPen, QPixmap
+from PySide6.QtWidgets import QDialog, QHBoxLayout, QLabel, QPushButton, QScrollArea, QVBoxLayout, QWidget
+
+from .proxy import ProxyLayout
+
+
+def layout_to_qimage(layout: ProxyLayout) -> QImage:
+    """PIL-холст прокси → QImage (можно вызывать в рабочем потоке)."""
+    img = layout.image
+    data = img.tobytes('raw', 'RGB')
+    return QImage(data, img.width, img.height, img.width * 3, QImage.Format_RGB888).copy()
+
+
+class _ProxyCanvas(QWidget):
+    pieceClicked = Signal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pix = QPixmap()
+        self._layout: ProxyLayout | None = None
+        self._selected = -1
+        self.setCursor(Qt.PointingHandCursor)
+
+    def set_layout(self, layout: ProxyLayout, img: QImage) -> None:
+        self._layout = layout
+        self._pix = QPixmap.fromImage(img)
+        self._selected = min(self._selected, len(layout.pieces()) - 1)
+        self.setFixedSize(self._pix.size())
+        self.update()
+
+    def selected(self) -> int:
+        return self._selected
+
+    def set_selected(self, index: int) -> None:
+        self._selected = index
+        self.update()
+
+    def _ky(self) -> float:
+        lay = self._layout
+        return self._pix.height() / lay.height if lay and lay.height else 1.0
+
+    def sizeHint(self) -> QSize:
+        return self._pix.size()
+
+    def paintEvent(self, _e):
+        p = QPainter(self)
+        if self._pix.isNull() or self._layout is None:
+            p.end()
+            return
+        p.drawPixmap(0, 0, self._pix)
+        ky = self._ky()
+        w = self._pix.width()
+
+        pieces = self._layout.pieces()
+        if 0 <= self._selected < len(pieces):
+            a, b = pieces[self._selected]
+            p.fillRect(0, round(a * ky), w, max(1, round((b - a) * ky)), QColor(40, 120, 255, 60))
+
+        p.setPen(QPen(QColor(230, 40, 40), 1))
+        for y in self._layout.bounds[1:-1]:
+            yy = round(y * ky)
+            p.drawLine(0, yy, w, yy)
+
+        p.setPen(QColor(230, 40, 40))
+        for i, (a, _b) in enumerate(pieces):
+            p.drawText(4, round(a * ky) + 14, str(i + 1))
+        p.end()
+
+    def mousePressEvent(self, e):
+        if self._layout is None or e.button() != Qt.LeftButton:
+            return super().mousePressEvent(e)
+        y = int(e.position().y() / self._ky())
+        self.pieceClicked.emit(self._layout.piece_at(y))
+
+
+class StitchProxyDialog(QDialog):
+    """Немодальный предпросмотр результата склейки; обновляется при смене параметров."""
+
+    runRequested = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Предпросмотр склейки")
+        self.resize(460, 720)
+        self._layout: ProxyLayout | None = None
+
+        self.lbl_summary = QLabel("Подготовка предпросмотра…")
+        self.lbl_summary.setWordWrap(True)
+        self.lbl_piece = QLabel("")
+        self.lbl_piece.setStyleSheet("color:#666;")
+
+        self.canvas = _ProxyCanvas()
+        self.canvas.pieceClicked.connect(self._on_piece_clicked)
+        self.scroll = QScrollArea(self)
+        self.scroll.setWidget(self.canvas)
+        self.scroll.setAlignment(Qt.AlignHCenter | Qt.AlignTop)
+
+        self.btn_run = QPushButton("Склеить")
+        self.btn_close = QPushButton("Закрыть")
+        self.btn_run.clicked.connect(self.runRequested.emit)
+        self.btn_close.clicked.connect(self.close)
+
+        lay = QVBoxLayout(self)
+        lay.addWidget(self.lbl_summary)
+        lay.addWidget(self.lbl_piece)
+        lay.addWidget(self.scroll, 1)
+        row = QHBoxLayout()
+        row.addStretch(1)
+        row.addWidget(self.btn_run)
+        row.addWidget(self.btn_close)
+        lay.addLayout(row)
+
+    def set_busy(self, busy: bool) -> None:
+        if busy and self._layout is None:
+            self.lbl_summary.setText("Подготовка предпросмотра…")
+        self.setWindowTitle("Предпросмотр склейки…" if busy else "Предпросмотр склейки")
+
+    def set_error(self, text: str) -> None:
+        self.lbl_summary.setText(text)
+
+    def set_layout(self, layout: ProxyLayout, img: QImage) -> None:
+        self._layout = layout
+        self.canvas.set_layout(layout, img)
+        n = len(layout.pieces())
+        text = f"Файлов на выходе: {n} · {layout.width}×{layout.height} px"
+        if layout.skipped:
+            text += f" · пропущено: {len(layout.skipped)}"
+        self.lbl_summary.setText(text)
+        self._on_piece_clicked(max(0, self.canvas.selected()))
+
+    def _on_piece_clicked(self, index: int) -> None:
+        if self._layout is None:
+            return
+        pieces = self._layout.pieces()
+        if not 0 <= index < len(pieces):
+            self.lbl_piece.setText("")
+            return
+        a, b = pieces[index]
+        self.canvas.set_selected(index)
+        self.lbl_piece.setText(f"Фрагмент {index + 1} из {len(pieces)}: {self._layout.width}×{b - a} px (строки {a}–{b})")
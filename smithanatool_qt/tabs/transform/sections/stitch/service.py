@@ -15,7 +15,7 @@ from smithanatool_qt.tabs.transform.core.stitcher import (
     save_png,
 )
 
-from .smartstitch_engine import process_as_smartstitch
+from .smartstitch_engine import PageSource, open_page, process_as_smartstitch
 
 
 _IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".bmp", ".webp", ".tif", ".tiff", ".tga"}
@@ -247,7 +247,7 @@ def list_chapter_images(chapter_dir: str) -> list[str]:
 
 
 def stitch_group(
-    img_paths: Sequence[str],
+    img_paths: Sequence[PageSource],
     out_path: str,
     *,
     target_width: int,
@@ -257,7 +257,7 @@ def stitch_group(
 ) -> bool:
     images: list[Image.Image] = []
     for path in img_paths:
-        img = Image.open(path)
+        img = open_page(path)
         img.load()
         if target_width and target_width > 0 and img.width != target_width:
             new_height = round(img.height * (target_width / img.width))
@@ -290,20 +290,20 @@ def stitch_group(
     return True
 
 
-def plan_groups_by_count(files: Sequence[str], per: int) -> list[list[str]]:
+def plan_groups_by_count(files: Sequence[PageSource], per: int) -> list[list[PageSource]]:
     per = max(1, int(per))
     return [list(files[i : i + per]) for i in range(0, len(files), per)]
 
 
-def plan_groups_by_height(files: Sequence[str], max_h: int, target_w: int) -> list[list[str]]:
+def plan_groups_by_height(files: Sequence[PageSource], max_h: int, target_w: int) -> list[list[PageSource]]:
     max_h = max(100, int(max_h))
-    groups: list[list[str]] = []
-    current: list[str] = []
+    groups: list[list[PageSource]] = []
+    current: list[PageSource] = []
     current_h = 0
 
     for path in files:
         try:
-            with Image.open(path) as img:
+            with open_page(path) as img:
                 width, height = img.size
         except Exception:
             width, height = 0, 0
@@ -327,7 +327,7 @@ def auto_stitch_chapter_simple(
     chapter_dir: str,
     *,
     auto_cfg: dict,
-    files: Sequence[str],
+    files: Sequence[PageSource],
     out_dir: str,
     target_width: int,
     strip_metadata: bool,
@@ -335,7 +335,8 @@ def auto_stitch_chapter_simple(
     compress_level: int,
     log=None,
     stop_flag: Optional[Callable[[], bool]] = None,
-):
+) -> bool:
+    """True — все группы склеены и записаны, остановки не было."""
     per = max(1, int(auto_cfg.get("per") or 1))
     auto_threads = bool(auto_cfg.get("auto_threads"))
     threads = int(auto_cfg.get("threads") or 4)
@@ -356,7 +357,7 @@ def auto_stitch_chapter_simple(
     def out_name(index: int) -> str:
         return f"{index:0{digits}d}.png"
 
-    def _stitch_one(index: int, group: Sequence[str]):
+    def _stitch_one(index: int, group: Sequence[PageSource]):
         if stop_flag and stop_flag():
             return index, False, ""
         out_path = os.path.join(out_dir, out_name(index))
@@ -371,6 +372,7 @@ def auto_stitch_chapter_simple(
         return index, ok, out_path
 
     max_workers = resolve_threads(auto_threads, threads)
+    written = 0
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
         futures = {
             executor.submit(_stitch_one, index + 1, group): index
@@ -378,20 +380,22 @@ def auto_stitch_chapter_simple(
         }
         for future in as_completed(futures):
             if stop_flag and stop_flag():
-                break
+                return False
             index, ok, path = future.result()
             if ok:
+                written += 1
                 if log:
                     log(f"[OK] Склейка {index:0{digits}d} → {path}")
             elif log:
                 log(f"[WARN] Склейка {index:0{digits}d} не удалась.")
+    return bool(groups) and written == len(groups)
 
 
 def auto_stitch_chapter_smart(
     chapter_dir: str,
     *,
     auto_cfg: dict,
-    files: Sequence[str],
+    files: Sequence[PageSource],
     out_dir: str,
     target_width: int,
     strip_metadata: bool,
@@ -399,9 +403,10 @@ def auto_stitch_chapter_smart(
     compress_level: int,
     log=None,
     stop_flag: Optional[Callable[[], bool]] = None,
-):
+) -> bool:
+    """True — записан хотя бы один фрагмент, остановки не было."""
     if stop_flag and stop_flag():
-        return
+        return False
 
     digits = max(1, min(6, int(auto_cfg.get("zeros") or auto_cfg.get("digits") or 2)))
     detector = str(auto_cfg.get("smart_detector") or "smart").lower()
@@ -421,6 +426,7 @@ def auto_stitch_chapter_smart(
     )
     if log:
         log(f"[OK] SmartStitch: сохранено фрагментов {saved} в {out_dir}")
+    return bool(saved) and not (stop_flag and stop_flag())
 
 
 def auto_stitch_chapter(
@@ -429,9 +435,16 @@ def auto_stitch_chapter(
     auto_cfg: dict,
     log=None,
     stop_flag: Optional[Callable[[], bool]] = None,
-):
+    pages: Optional[Sequence[bytes]] = None,
+) -> bool:
+    """Склеить главу по настройкам автосклейки. True — склейка удалась целиком.
+
+    pages — байты страниц по порядку, уже скачанные в память: тогда файлы
+    главы не читаются и не удаляются (их на диске нет).
+    Исходники (delete_sources) удаляются только после полной удачной склейки.
+    """
     if not (auto_cfg and auto_cfg.get("enable")):
-        return
+        return False
 
     same_dir = bool(auto_cfg.get("same_dir"))
     target_width = int(auto_cfg.get("target_width") or 0)
@@ -466,14 +479,14 @@ def auto_stitch_chapter(
     out_dir = chapter_dir if (same_dir or not out_dir_pref) else out_dir_pref
     os.makedirs(out_dir, exist_ok=True)
 
-    files = list_chapter_images(chapter_dir)
+    files = list(pages) if pages is not None else list_chapter_images(chapter_dir)
     if not files:
         if log:
             log("[WARN] Автосклейка: нет файлов для склейки.")
-        return
+        return False
 
     if stitch_mode == "smart":
-        auto_stitch_chapter_smart(
+        ok = auto_stitch_chapter_smart(
             chapter_dir,
             auto_cfg=auto_cfg,
             files=files,
@@ -486,7 +499,7 @@ def auto_stitch_chapter(
             stop_flag=stop_flag,
         )
     else:
-        auto_stitch_chapter_simple(
+        ok = auto_stitch_chapter_simple(
             chapter_dir,
             auto_cfg=auto_cfg,
             files=files,
@@ -499,7 +512,7 @@ def auto_stitch_chapter(
             stop_flag=stop_flag,
         )
 
-    if delete_sources and not (stop_flag and stop_flag()):
+    if ok and delete_sources and pages is None:
         try:
             for path in files:
                 try:
@@ -511,3 +524,6 @@ def auto_stitch_chapter(
         except Exception:
             if log:
                 log("[WARN] Не удалось удалить исходники.")
+    elif delete_sources and pages is None and log:
+        log("[WARN] Склейка не завершена — исходники оставлены.")
+    return ok
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import os
-from typing import Iterable, Sequence
+from io import BytesIO
+from typing import Iterable, Sequence, Union
 
 import numpy as np
 from PIL import Image, ImageFile
@@ -9,6 +10,13 @@ from PIL import Image, ImageFile
 Image.MAX_IMAGE_PIXELS = None
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 
+# Страница: путь к файлу или уже скачанные байты (склейка без промежуточных файлов)
+PageSource = Union[str, bytes]
+
+
+def open_page(page: PageSource) -> Image.Image:
+    return Image.open(BytesIO(page) if isinstance(page, (bytes, bytearray)) else page)
+
 
 def _normalize_rgb_image(
     img: Image.Image,
@@ -35,14 +43,14 @@ def _normalize_rgb_image(
 
 
 def load_images_rgb(
-    paths: Sequence[str],
+    paths: Sequence[PageSource],
     *,
     target_width: int = 0,
     strip_metadata: bool = True,
 ) -> list[Image.Image]:
     images: list[Image.Image] = []
     for path in paths:
-        with Image.open(path) as img:
+        with open_page(path) as img:
             img.load()
             images.append(
                 _normalize_rgb_image(
@@ -181,8 +189,101 @@ def save_slices(
     return saved
 
 
+def save_slices_from_plan(
+    plan: Sequence[Sequence[tuple[PageSource, int, int]]],
+    width: int,
+    out_dir: str,
+    *,
+    base_name: str = '',
+    digits: int = 2,
+    optimize_png: bool = True,
+    compress_level: int = 6,
+) -> int:
+    """Save slices described as (path, y0, y1) row ranges of the source files.
+
+    Same output as save_slices() over the combined canvas, but only the files
+    of the current slice are open at a time — the strip is never built.
+    """
+    if not plan or width <= 0:
+        return 0
+
+    digits = max(1, min(6, int(digits)))
+    compress_level = max(0, min(9, int(compress_level)))
+    os.makedirs(out_dir, exist_ok=True)
+
+    opened: dict[PageSource, Image.Image] = {}
+    saved = 0
+    prefix = f'{base_name}_' if base_name else ''
+    for idx, segments in enumerate(plan, start=1):
+        height = sum(max(0, int(y1) - int(y0)) for _, y0, y1 in segments)
+        if height <= 0:
+            continue
+        # Держим открытыми только файлы текущего фрагмента
+        for path in [p for p in opened if all(p != seg[0] for seg in segments)]:
+            opened.pop(path).close()
+
+        part = Image.new('RGB', (int(width), height), (255, 255, 255))
+        y = 0
+        for path, y0, y1 in segments:
+            src = opened.get(path)
+            if src is None:
+                with open_page(path) as img:
+                    img.load()
+                    src = opened[path] = img.convert('RGB')
+            part.paste(src.crop((0, int(y0), src.width, int(y1))), (0, y))
+            y += int(y1) - int(y0)
+
+        out_name = f'{prefix}{idx:0{digits}d}.png'
+        part.save(
+            os.path.join(out_dir, out_name),
+            format='PNG',
+            optimize=bool(optimize_png),
+            compress_level=compress_level,
+        )
+        saved += 1
+
+    for img in opened.values():
+        img.close()
+    return saved
+
+
+def plan_for_files(
+    files: Sequence[PageSource],
+    bounds: Sequence[int],
+    heights: Sequence[int] | None = None,
+) -> list[list[tuple[PageSource, int, int]]]:
+    """Map bounds on the virtually stacked files to per-file row ranges (headers only)."""
+    if heights is None:
+        heights = [h for _, h in _header_sizes(files)]
+    tops: list[tuple[PageSource, int, int]] = []
+    y = 0
+    for path, h in zip(files, heights):
+        tops.append((path, y, int(h)))
+        y += int(h)
+
+    plan: list[list[tuple[str, int, int]]] = []
+    for a, b in zip(bounds, bounds[1:]):
+        if b <= a:
+            continue
+        segments = []
+        for path, top, h in tops:
+            lo, hi = max(a, top), min(b, top + h)
+            if lo < hi:
+                segments.append((path, lo - top, hi - top))
+        plan.append(segments)
+    return plan
+
+
+def _header_sizes(files: Sequence[PageSource]) -> list[tuple[int, int]]:
+    sizes = []
+    for path in files:
+        with open_page(path) as img:
+            sizes.append((int(img.width), int(img.height)))
+    return sizes
+
+
 def process_as_smartstitch(
-    files: Sequence[str],
+    files: Sequence[PageSource],
     out_dir: str,
     *,
     detector: str = 'smart',
@@ -200,6 +301,24 @@ def process_as_smartstitch(
     if slice_height <= 0:
         raise RuntimeError('Высота нарезки должна быть больше нуля.')
 
+    detector_key = str(detector or 'smart').lower()
+    if detector_key == 'direct':
+        # Границы не зависят от пикселей: режем по плану, без общего холста
+        sizes = _header_sizes(files)
+        if any(w <= 0 or h <= 1 for w, h in sizes):
+            raise RuntimeError('Некорректный размер изображения.')
+        if sizes and (not target_width or all(w == target_width for w, _ in sizes)):
+            heights = [h for _, h in sizes]
+            return save_slices_from_plan(
+                plan_for_files(files, build_bounds_direct(sum(heights), slice_height), heights),
+                max(w for w, _ in sizes),
+                out_dir,
+                base_name=base_name,
+                digits=digits,
+                optimize_png=optimize_png,
+                compress_level=compress_level,
+            )
+
     images = load_images_rgb(
         files,
         target_width=target_width,
@@ -207,7 +326,6 @@ def process_as_smartstitch(
     )
     combined = combine_images_vertically(images)
 
-    detector_key = str(detector or 'smart').lower()
     if detector_key == 'direct':
         bounds = build_bounds_direct(combined.height, slice_height)
     else:
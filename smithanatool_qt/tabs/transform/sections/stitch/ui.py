@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import os
 
+from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import (
     QButtonGroup,
     QCheckBox,
@@ -214,9 +215,11 @@ class StitchSectionUiMixin:
         row.setSpacing(6)
         row.addStretch(1)
 
+        self.btn_preview = QPushButton("Предпросмотр")
         self.btn_run = QPushButton("Склеить")
         self.btn_pick = QPushButton("Выбрать файлы…")
 
+        row.addWidget(self.btn_preview)
         row.addWidget(self.btn_run)
         row.addWidget(self.btn_pick)
         root.addLayout(row)
@@ -234,5 +237,30 @@ class StitchSectionUiMixin:
 
         self.btn_run.clicked.connect(self._on_run_clicked)
         self.btn_pick.clicked.connect(self._on_pick_clicked)
+        self.btn_preview.clicked.connect(self._on_preview_clicked)
+
+        # Предпросмотр следует за параметрами, с небольшой задержкой
+        self._proxy_dialog = None
+        self._proxy_thread = None
+        self._proxy_pending = False
+        self._proxy_timer = QTimer(self)
+        self._proxy_timer.setSingleShot(True)
+        self._proxy_timer.setInterval(200)
+        self._proxy_timer.timeout.connect(self._refresh_proxy)
+        for rb in (self.rb_one, self.rb_auto, self.rb_smart):
+            rb.toggled.connect(self._schedule_proxy_refresh)
+        for cmb in (self.cmb_dir, self.combo_auto_mode, self.combo_smart_detector):
+            cmb.currentIndexChanged.connect(self._schedule_proxy_refresh)
+        for spin in (
+            self.spin_dim,
+            self.spin_group,
+            self.spin_max_h,
+            self.spin_smart_height,
+            self.spin_smart_sensitivity,
+            self.spin_smart_scan_step,
+            self.spin_smart_ignore,
+        ):
+            spin.valueChanged.connect(self._schedule_proxy_refresh)
+        self.chk_no_resize.toggled.connect(self._schedule_proxy_refresh)
 
         self.chk_auto_threads.toggled.connect(self._apply_threads_state)
@@ -84,6 +84,7 @@ class WorkshopTab(QWidget):
         # Сохранение (как в TransformTab)
         self.preview.action_btn_save.clicked.connect(self._save)
         self.preview.action_btn_save_as.clicked.connect(self._save_as)
+        self.preview.pathRelinked.connect(self._on_preview_path_relinked)
         self.preview.ocrSortRectsRequested.connect(self._on_preview_ocr_sort_requested)
         self.preview.ocrDeleteRectsRequested.connect(self._on_preview_ocr_delete_requested)
         self.preview.ocrUndoRequested.connect(self._on_preview_ocr_undo_requested)
@@ -168,9 +169,8 @@ class WorkshopTab(QWidget):
             self._save_as()
             return
 
-        if self.preview.save_current_overwrite():
-            self.preview.show_toast("Сохранено!", 3000)
-        else:
+        # Запись идёт в фоне; о результате превью сообщит тостом
+        if not self.preview.save_current_overwrite():
             QMessageBox.warning(self, "Ошибка", "Не удалось сохранить изображение.")
 
     def _save_as(self):
@@ -210,14 +210,13 @@ class WorkshopTab(QWidget):
             else:
                 path += ".png"
 
-        # 5) Сохранение и обновление INI-папки
-        if self.preview.save_current_as(path):
-            if old and (
-                (getattr(self.preview, "_is_memory_path", None) and self.preview._is_memory_path(old))
-                or (getattr(self.preview, "_is_pasted_temp_path", None) and self.preview._is_pasted_temp_path(old))
-            ):
-                self.preview.relink_current_to(path)
-                self.gallery.apply_path_mapping({old: path}, call_forget_cb=False)
+        # 5) Сохранение и обновление INI-папки.
+        # Документ из памяти переедет на новый путь только после успешной записи (pathRelinked).
+        relink = bool(old) and (
+            (getattr(self.preview, "_is_memory_path", None) and self.preview._is_memory_path(old))
+            or (getattr(self.preview, "_is_pasted_temp_path", None) and self.preview._is_pasted_temp_path(old))
+        )
+        if self.preview.save_current_as(path, relink=bool(relink)):
 
             new_dir = os.path.dirname(path)
             if new_dir and os.path.isdir(new_dir):
@@ -225,11 +224,12 @@ class WorkshopTab(QWidget):
                 # сохраняем папку в INI (тот же namespace, что и раньше)
                 with group("TransformTab"):
                     save_attr_string(self, "_save_dir", "save_dir")
-
-            QMessageBox.information(self, "Сохранено", f"Сохранено: {path}")
         else:
             QMessageBox.warning(self, "Ошибка", "Не удалось сохранить изображение.")
 
+    def _on_preview_path_relinked(self, old: str, new: str) -> None:
+        self.gallery.apply_path_mapping({old: new}, call_forget_cb=False)
+
     # ---------------- OCR wiring ----------------
     def _on_gallery_path_changed(self, path) -> None:
         """Единая точка реакции на смену выбранного файла в галерее."""
@@ -242,11 +242,11 @@ class WorkshopTab(QWidget):
                 except Exception:
                     pass
             # fallback
-            self.preview.show_path(path)
+            self.preview.show_path(path, block=False)
             return
 
-        # transform
-        self.preview.show_path(path)
+        # transform: листание галереи — загрузка в фоне
+        self.preview.show_path(path, block=False)
 
     def _on_mode_changed(self, mode: str) -> None:
         """mode: 'transform' | 'ocr'"""